@@ -0,0 +1,40 @@
+import subprocess
+import sys
+
+# modules that are imported by every worker process and must load with numpy and pandas only
+NUMERIC_MODULES = ['pydataman.meteo.rainfall', 'pydataman.meteo.pipeline', 'pydataman.meteo.streaming']
+HEAVY_PACKAGES = ('matplotlib', 'plotly', 'requests', 'urllib3')
+
+
+def _import_time_us(module):
+    """
+    Cumulative import time of module in microseconds as reported by python -X importtime in a fresh process.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise RuntimeError(f'{module} not found in the import time report')
+
+
+class ImportTime:
+    params = NUMERIC_MODULES
+    param_names = ['module']
+
+    def timeraw_import(self, module):
+        return f'import {module}'
+
+    def track_importtime(self, module):
+        return _import_time_us(module)
+
+    track_importtime.unit = 'us'
+
+    def track_heavy_packages(self, module):
+        # number of plotting and HTTP packages loaded by the import, should stay 0
+        code = f'import sys, {module}; print(sum(name in sys.modules for name in {HEAVY_PACKAGES!r}))'
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        return int(result.stdout)
+
+    track_heavy_packages.unit = 'packages'
@@ -0,0 +1,24 @@
+from pydataman.ioutils.meterac.stub_server import MeterAcStub
+from pydataman.meteo.rainfall import read_rainfall_data
+
+from .common import SIZES
+
+
+class ReadRainfallData:
+    params = SIZES
+    param_names = ['rows']
+    timeout = 600
+
+    def setup(self, rows):
+        self.stub = MeterAcStub(['M01'], rows).start()
+        # build the payload before timing
+        self.stub.payload('/gs/meteo/M01/data-rain.php')
+
+    def teardown(self, rows):
+        self.stub.stop()
+
+    def time_read_rainfall_data(self, rows):
+        read_rainfall_data('M01', url=self.stub.rainfall_url)
+
+    def peakmem_read_rainfall_data(self, rows):
+        read_rainfall_data('M01', url=self.stub.rainfall_url)
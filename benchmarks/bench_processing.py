@@ -0,0 +1,75 @@
+import pandas as pd
+
+from pydataman.meteo.synthetic import synthetic_rainfall
+from pydataman.processing.convert_units import convert_unix_time
+from pydataman.processing.filters import filter_df_by_date_range, index_by_date
+from pydataman.processing import time_mapping
+
+from .common import SIZES, station_frame
+
+
+class ConvertUnixTime:
+    params = SIZES
+    param_names = ['rows']
+    timeout = 600
+
+    def setup(self, rows):
+        self.raw = synthetic_rainfall(rows)
+
+    def time_convert_unix_time(self, rows):
+        convert_unix_time(self.raw, 'UnixTime', inplace=False)
+
+    def time_convert_unix_time_no_derived(self, rows):
+        convert_unix_time(self.raw, 'UnixTime', inplace=False, derived=())
+
+    def peakmem_convert_unix_time(self, rows):
+        convert_unix_time(self.raw, 'UnixTime', inplace=False)
+
+
+class FilterByDateRange:
+    params = SIZES
+    param_names = ['rows']
+    timeout = 600
+
+    def setup(self, rows):
+        self.df = station_frame(rows)
+        self.indexed = index_by_date(self.df)
+        middle = self.df['Date/Time'].iloc[len(self.df) // 2]
+        self.start_date = middle.strftime('%Y-%m-%d')
+        self.end_date = (middle + pd.Timedelta(days=7)).strftime('%Y-%m-%d')
+        self.shuffled = self.df.sample(frac=1, random_state=0)
+
+    def time_sorted_column(self, rows):
+        filter_df_by_date_range(self.df, self.start_date, self.end_date)
+
+    def time_date_index(self, rows):
+        filter_df_by_date_range(self.indexed, self.start_date, self.end_date)
+
+    def time_unsorted_column(self, rows):
+        filter_df_by_date_range(self.shuffled, self.start_date, self.end_date)
+
+    def peakmem_sorted_column(self, rows):
+        filter_df_by_date_range(self.df, self.start_date, self.end_date)
+
+
+class TimeMapping:
+    params = SIZES
+    param_names = ['rows']
+    timeout = 600
+
+    def setup(self, rows):
+        self.target = station_frame(rows, seed=1)
+        source = station_frame(rows, seed=2)
+        # shift the source grid so that every timestamp has to be interpolated
+        source['Date/Time'] = source['Date/Time'] + pd.Timedelta(seconds=17)
+        self.source = source
+        self.sources = {f'N{i}': source for i in range(8)}
+
+    def time_time_mapping(self, rows):
+        time_mapping.time_mapping(self.target, self.source, 'pq', 'Date/Time')
+
+    def peakmem_time_mapping(self, rows):
+        time_mapping.time_mapping(self.target, self.source, 'pq', 'Date/Time')
+
+    def time_time_mapping_many(self, rows):
+        time_mapping.time_mapping_many(self.target, self.sources, ['pq', 'unixtime'], 'Date/Time')
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from pydataman.meteo.areal import ArealInterpolator
+from pydataman.meteo.intensity import max_rainfall_intensity
+from pydataman.meteo.rainfall import amount_precipitation, find_rain_periods, subtract_next_value, sum_by_period
+
+from .common import SIZES, station_frame
+
+
+class Rainfall:
+    params = SIZES
+    param_names = ['rows']
+    timeout = 600
+
+    def setup(self, rows):
+        self.df = station_frame(rows)
+        self.increments = subtract_next_value(self.df, 'pq')
+
+    def time_subtract_next_value(self, rows):
+        subtract_next_value(self.df, 'pq')
+
+    def peakmem_subtract_next_value(self, rows):
+        subtract_next_value(self.df, 'pq')
+
+    def time_find_rain_periods(self, rows):
+        find_rain_periods(self.increments, 'pq')
+
+    def peakmem_find_rain_periods(self, rows):
+        find_rain_periods(self.increments, 'pq')
+
+    def time_sum_by_period_hourly(self, rows):
+        sum_by_period(self.increments, 'pq', interval_hours=1)
+
+    def time_sum_by_period_daily_bg(self, rows):
+        sum_by_period(self.increments, 'pq', standard='bg')
+
+    def peakmem_sum_by_period_hourly(self, rows):
+        sum_by_period(self.increments, 'pq', interval_hours=1)
+
+    def time_amount_precipitation_hourly(self, rows):
+        amount_precipitation(self.increments, interval_h=1, rainfall_column='pq')
+
+    def time_amount_precipitation_rows(self, rows):
+        amount_precipitation(self.increments, interval_h=0, rainfall_column='pq')
+
+    def peakmem_amount_precipitation_hourly(self, rows):
+        amount_precipitation(self.increments, interval_h=1, rainfall_column='pq')
+
+    def time_max_rainfall_intensity_yearly(self, rows):
+        max_rainfall_intensity(self.increments, 'pq', by='year')
+
+    def time_max_rainfall_intensity_events(self, rows):
+        max_rainfall_intensity(self.increments, 'pq', by='event')
+
+    def peakmem_max_rainfall_intensity_yearly(self, rows):
+        max_rainfall_intensity(self.increments, 'pq', by='year')
+
+
+class Areal:
+    """
+    A daily map of Bulgaria on a 0.05 degree grid from 150 stations.
+    """
+
+    def setup(self):
+        rng = np.random.default_rng(8)
+        stations = [f'S{i:03d}' for i in range(150)]
+        self.interpolator = ArealInterpolator(stations, rng.uniform(41.2, 44.2, 150), rng.uniform(22.4, 28.6, 150))
+        self.lat, self.lon = np.arange(41.2, 44.3, 0.05), np.arange(22.3, 28.7, 0.05)
+        self.daily = pd.DataFrame(rng.gamma(0.3, 5, (150, 365)), index=stations,
+                                  columns=pd.date_range('2024-01-01', periods=365, freq='D'))
+        self.weights = self.interpolator.grid_weights(self.lat, self.lon)
+
+    def time_grid_weights(self):
+        self.interpolator.clear()
+        self.interpolator.grid_weights(self.lat, self.lon)
+
+    def time_interpolate_year(self):
+        self.interpolator.interpolate(self.daily, self.weights)
+
+    def time_interpolate_day(self):
+        self.interpolator.interpolate(self.daily.iloc[:, :1], self.weights)
@@ -0,0 +1,16 @@
+import os
+
+from pydataman.meteo.synthetic import synthetic_rainfall
+from pydataman.processing.convert_units import convert_unix_time
+
+# sizes of the synthetic series, e.g. PYDATAMAN_BENCH_SIZES=10000,1000000,50000000 asv run
+SIZES = [int(size) for size in os.environ.get('PYDATAMAN_BENCH_SIZES', '10000,1000000').split(',')]
+
+
+def station_frame(rows, seed=8):
+    """
+    Synthetic station data as it looks after read_rainfall_data and convert_unix_time.
+    """
+    df = synthetic_rainfall(rows, seed=seed)
+    convert_unix_time(df, 'UnixTime')
+    return df
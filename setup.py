@@ -11,6 +11,7 @@ INSTALL_REQUIRES = [
     'matplotlib',
     'numpy',
     'pandas',
+    'pyarrow',
     'scikit_learn',
     'scipy',
     'requests',
@@ -24,6 +25,8 @@ PACKAGE_DIR = {'': 'src'}
 
 #PACKAGE_DATA = {}
 
+ENTRY_POINTS = {'console_scripts': ['pydataman = pydataman.cli:main']}
+
 CLASSIFIERS = ["Example :: Invalid"]
 
 
@@ -35,5 +38,6 @@ setup(
     package_dir=PACKAGE_DIR,
     # package_data=PACKAGE_DATA,
     classifiers=CLASSIFIERS,
+    entry_points=ENTRY_POINTS,
     version=VERSION
 )
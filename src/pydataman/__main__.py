@@ -0,0 +1,6 @@
+import sys
+
+from pydataman.cli import main
+
+
+sys.exit(main())
@@ -0,0 +1,215 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from pydataman import instrumentation
+
+
+OPERATIONS = ('fetch', 'convert', 'filter', 'periods', 'sums')
+FORMATS = ('parquet', 'csv')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='pydataman',
+        description='Fetch the rainfall data of meter.ac stations, find rain periods and daily sums and write them '
+                    'to Parquet or CSV files.',
+        epilog="Example: pydataman M08 M09 --start 2024-01-01 --end 2024-02-01 --ops periods,sums --output out")
+    parser.add_argument('stations', nargs='+', help="station IDs, e.g. M08, or 'all' for every station of meteo.csv")
+    parser.add_argument('--start', help='first day of the date window, e.g. 2024-01-01, used with --end')
+    parser.add_argument('--end', help='last day of the date window, e.g. 2024-01-31')
+    parser.add_argument('--last-year', action='store_true', help='use the last calendar year as the date window')
+    parser.add_argument('--last-month', action='store_true', help='use the last calendar month as the date window')
+    parser.add_argument('--ops', default='periods,sums',
+                        help=f"comma separated operations out of {', '.join(OPERATIONS)}; fetch, convert and filter "
+                             f"write the station rows, periods the rain periods, sums the daily and monthly sums "
+                             f"(default: periods,sums)")
+    parser.add_argument('--standard', choices=('bg', 'international'), default='bg',
+                        help='day start of the daily sums, 07:30 (bg) or 00:00 (default: bg)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='concurrent downloads and worker processes (default: number of CPUs)')
+    parser.add_argument('--output', default='.', help='output directory (default: current directory)')
+    parser.add_argument('--format', choices=FORMATS, default='parquet', help='output format (default: parquet)')
+    parser.add_argument('--url', help="rainfall URL template with '{device}' (default: meter.ac)")
+    parser.add_argument('--metadata-url', help="catalogue URL template with '{name}' (default: meter.ac)")
+    parser.add_argument('--cache', metavar='DIR', help='keep the downloads in a RainfallCache in DIR')
+    parser.add_argument('--timeout', type=float, default=30, help='timeout of every request in seconds')
+    parser.add_argument('--retries', type=int, default=3, help='retries of a failed request')
+    parser.add_argument('--stub', type=int, nargs='?', const=10_000, metavar='ROWS',
+                        help='serve synthetic data with a local meter.ac stand-in (default ROWS: 10000)')
+    parser.add_argument('--trace', metavar='FILE', help='append instrumentation records to a JSON lines file')
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the station pipeline from the command line, see pydataman --help.
+
+    Returns 0 if every station was processed, 1 if some failed and 2 if none succeeded.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    ops = [op.strip() for op in args.ops.split(',') if op.strip()]
+    unknown = sorted(set(ops) - set(OPERATIONS))
+    if unknown:
+        parser.error(f"unknown operations: {', '.join(unknown)}")
+    if bool(args.start) != bool(args.end):
+        parser.error('--start and --end must be given together')
+
+    stub = None
+    if args.stub is not None:
+        from pydataman.ioutils.meterac.stub_server import MeterAcStub
+
+        stub = MeterAcStub(rows=args.stub).start()
+        args.url = args.url or stub.rainfall_url
+        args.metadata_url = args.metadata_url or stub.base_url + '/gs/metadata/{name}'
+
+    # the records of the run give the downloaded bytes of the summary
+    records = instrumentation.MemorySink()
+    sink = records
+    if args.trace:
+        trace = instrumentation.JsonLinesSink(args.trace)
+
+        def sink(record):
+            records(record)
+            trace(record)
+
+    try:
+        with instrumentation.enabled(sink):
+            return _run(args, ops, records)
+    finally:
+        if args.trace:
+            trace.close()
+        if stub is not None:
+            stub.stop()
+
+
+def _run(args, ops, records):
+    from pydataman.ioutils.meterac.cache import RainfallCache
+    from pydataman.ioutils.meterac.metadata import find_column
+    from pydataman.meteo.pipeline import process_stations
+    from pydataman.meteo.rainfall import read_rainfall_data_many
+    from pydataman.processing.convert_units import convert_unix_time
+    from pydataman.processing.filters import filter_df_by_date_range
+
+    timings = {}
+    started = time.perf_counter()
+    windowed = any([args.start, args.end, args.last_year, args.last_month])
+
+    devices = _devices(args)
+    cache = RainfallCache(args.cache) if args.cache else None
+    frames, errors = read_rainfall_data_many(devices, url=args.url, cache=cache, max_workers=args.workers,
+                                             timeout=args.timeout, retries=args.retries)
+    # stations without any rows are reported as failed instead of giving empty results
+    for device in [device for device, df in frames.items() if df.empty]:
+        del frames[device]
+        errors[device] = {'error': 'EmptyData', 'message': 'no rows', 'status': None}
+    timings['fetch'] = time.perf_counter() - started
+    rows = sum(len(df) for df in frames.values())
+
+    outputs = {}
+    checkpoint = time.perf_counter()
+    if {'fetch', 'convert', 'filter'} & set(ops):
+        data = {}
+        for device, df in frames.items():
+            if 'convert' in ops or 'filter' in ops:
+                df = convert_unix_time(df, find_column(df, ('unixtime',)), inplace=False, derived=())
+            if 'filter' in ops and windowed:
+                df = filter_df_by_date_range(df, args.start, args.end, args.last_year, args.last_month)
+            data[device] = df
+        outputs['data'] = _long(data)
+
+    if 'periods' in ops or 'sums' in ops:
+        bounds = _window(args) if windowed else (None, None)
+        results, failed = process_stations(frames, max_workers=args.workers, standard=args.standard,
+                                           start_date=bounds[0], end_date=bounds[1])
+        for device, error in failed.items():
+            errors[device] = dict(error, status=None)
+        if 'periods' in ops:
+            outputs['periods'] = results['periods']
+        if 'sums' in ops:
+            outputs['daily'] = results['daily']
+            outputs['monthly'] = results['monthly']
+    timings['process'] = time.perf_counter() - checkpoint
+
+    checkpoint = time.perf_counter()
+    os.makedirs(args.output, exist_ok=True)
+    written = [_write(df, args.output, name, args.format) for name, df in outputs.items()]
+    timings['write'] = time.perf_counter() - checkpoint
+    timings['total'] = time.perf_counter() - started
+
+    downloaded = sum(record.get('bytes') or 0 for record in records.records if record['name'] == 'http')
+    _summary(devices, frames, errors, rows, downloaded, timings, written)
+    if errors:
+        return 2 if len(errors) == len(devices) else 1
+    return 0
+
+
+def _devices(args):
+    """
+    Return the requested station IDs, all those of meteo.csv for 'all'.
+    """
+    if [station.lower() for station in args.stations] != ['all']:
+        return list(dict.fromkeys(args.stations))
+
+    from pydataman.ioutils.meterac.metadata import MetadataRegistry, station_id_column
+
+    # a stand-in catalogue is not kept in the metadata cache
+    registry = MetadataRegistry(url=args.metadata_url, timeout=args.timeout,
+                                **({'cache_dir': None} if args.stub is not None else {}))
+    catalogue = registry.catalogue('meteo.csv')
+    return catalogue[station_id_column(catalogue)].dropna().astype(str).tolist()
+
+
+def _window(args):
+    """
+    Return the first and the last day of the date window for process_stations.
+    """
+    from pydataman.processing.filters import date_range_bounds
+
+    start, stop = date_range_bounds(args.start, args.end, args.last_year, args.last_month)
+    return str(start.date()), str((stop - pd.Timedelta(days=1)).date())
+
+
+def _long(frames):
+    """
+    Concatenate the frames of the stations into one with a leading 'MeteoID' column.
+    """
+    if not frames:
+        return pd.DataFrame(columns=['MeteoID'])
+    df = pd.concat(frames, names=['MeteoID', None]).reset_index(level='MeteoID')
+    return df.reset_index(drop=True)
+
+
+def _write(df, directory, name, file_format):
+    path = os.path.join(directory, f'{name}.{file_format}')
+    if file_format == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path, len(df)
+
+
+def _summary(devices, frames, errors, rows, downloaded, timings, written, file=None):
+    file = file or sys.stdout
+    print(f'stations  {len(frames)} of {len(devices)} processed, {len(errors)} failed', file=file)
+    print(f"fetch     {timings['fetch']:8.2f} s  {rows} rows  {downloaded / 2**20:.1f} MiB  "
+          f"{_rate(rows, timings['fetch'])} rows/s  {_rate(len(frames), timings['fetch'])} stations/s", file=file)
+    print(f"process   {timings['process']:8.2f} s  {_rate(rows, timings['process'])} rows/s", file=file)
+    print(f"write     {timings['write']:8.2f} s", file=file)
+    print(f"total     {timings['total']:8.2f} s  {_rate(rows, timings['total'])} rows/s", file=file)
+    for path, count in written:
+        print(f'wrote     {path} ({count} rows)', file=file)
+    for device, error in sorted(errors.items()):
+        print(f"failed    {device}: {error['error']} {error['message']}", file=sys.stderr)
+
+
+def _rate(count, seconds):
+    return f'{count / seconds:.0f}' if seconds > 0 else '-'
+
+
+if __name__ == '__main__':
+    sys.exit(main())
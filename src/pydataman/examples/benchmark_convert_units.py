@@ -0,0 +1,44 @@
+import time
+
+import numpy as np
+import pandas as pd
+from processing.convert_units import convert_unix_time
+
+
+def convert_unix_time_lists(df, unixtime_column):
+    # the previous implementation, deriving 'Date' and 'Time' with list comprehensions
+    df.columns = df.columns.str.lower()
+    df['Date/Time'] = pd.to_datetime(df[unixtime_column.lower()], unit='s')
+    df['Date'] = [d.date() for d in df['Date/Time']]
+    df['Date'] = pd.to_datetime(df['Date'])
+
+    df['Time'] = [d.time() for d in df['Date/Time']]
+
+
+def measure(label, function, df):
+    start = time.perf_counter()
+    result = function(df)
+    elapsed = time.perf_counter() - start
+    memory = result.memory_usage(deep=True).sum() / 2**20
+    print(f'{label}: {elapsed:.2f} s, {memory:.1f} MiB')
+    return elapsed
+
+
+for rows in [100_000, 1_000_000, 5_000_000]:
+    rng = np.random.default_rng(0)
+    raw = pd.DataFrame({'UnixTime': 1672531200 + 60 * np.arange(rows),
+                        'PQ': np.round(np.cumsum(rng.choice([0, 0, 0, 0, 0.2], size=rows)), 1)})
+    print(f'{rows} rows')
+
+    def legacy(df):
+        df = df.copy()
+        convert_unix_time_lists(df, 'unixtime')
+        return df
+
+    baseline = measure('  list comprehensions', legacy, raw)
+    for label, kwargs in [('timedelta Time', {}),
+                          ('seconds Time', {'time_format': 'seconds'}),
+                          ('no derived columns', {'derived': ()}),
+                          ('Europe/Sofia', {'tz': 'Europe/Sofia'})]:
+        elapsed = measure(f'  {label}', lambda df: convert_unix_time(df, 'unixtime', inplace=False, **kwargs), raw)
+        print(f'    {baseline / elapsed:.0f}x faster')
@@ -0,0 +1,27 @@
+import io
+import time
+
+import numpy as np
+import pandas as pd
+from ioutils.meterac.parsing import parse_rainfall_csv
+
+# synthetic data-rain.php payload: one row per minute with a cumulative tipping bucket counter
+rows = 3_000_000
+rng = np.random.default_rng(0)
+unixtime = 1672531200 + 60 * np.arange(rows)
+pq = np.round(np.cumsum(rng.choice([0, 0, 0, 0, 0.2], size=rows)), 1)
+payload = pd.DataFrame({'UnixTime': unixtime, 'PQ': pq}).to_csv(sep=';', index=False).encode('utf-8')
+print(f'payload: {rows} rows, {len(payload) / 2**20:.1f} MiB')
+
+start = time.perf_counter()
+df_regex = pd.read_csv(io.StringIO(payload.decode('utf-8')), sep="[;, ]+", engine='python')
+regex_time = time.perf_counter() - start
+print(f'python engine, [;, ]+ separator: {regex_time:.2f} s')
+
+for engine in ['c', 'pyarrow']:
+    for value_dtype in ['float64', 'float32']:
+        start = time.perf_counter()
+        df = parse_rainfall_csv(io.BytesIO(payload), value_dtype=value_dtype, engine=engine)
+        elapsed = time.perf_counter() - start
+        print(f'{engine} engine, {value_dtype} values: {elapsed:.2f} s ({regex_time / elapsed:.0f}x), '
+              f'{df.memory_usage(deep=True).sum() / 2**20:.1f} MiB')
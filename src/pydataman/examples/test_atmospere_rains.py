@@ -1,5 +1,5 @@
 import pandas as pd
-from ioutils.meterac.data_access import read_metadata
+from ioutils.meterac.metadata import MetadataRegistry
 from meteo.rainfall import read_rainfall_data, amount_precipitation, find_rain_periods, sum_by_period
 from processing.convert_units import convert_unix_time
 from processing.filters import filter_df_by_date_range
@@ -7,10 +7,11 @@ from processing.filters import filter_df_by_date_range
 pd.set_option('display.max_rows', None)
 pd.set_option('display.max_columns', None)
 
-df_meteo = read_metadata('https://meter.ac/gs/metadata/meteo.csv')
-metadata_dict = df_meteo.set_index('MeteoID')[['Location']].to_dict(orient='index')
+registry = MetadataRegistry()
+df_meteo = registry.catalogue('meteo.csv')
 
 device = 'M08'
+print(registry.station(device)['Location'])
 
 rainfall_df = read_rainfall_data(device)
 
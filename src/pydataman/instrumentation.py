@@ -0,0 +1,301 @@
+import functools
+import json
+import logging
+import threading
+import time
+import tracemalloc
+
+
+class LoggingSink:
+    """
+    Write every record as one line to a logger.
+
+    Parameters:
+    -----------
+    logger : str or logging.Logger, optional
+        The logger or its name. Default is 'pydataman'.
+
+    level : int, optional
+        The level of the messages. Default is logging.INFO.
+    """
+
+    def __init__(self, logger='pydataman', level=logging.INFO):
+        self.logger = logging.getLogger(logger) if isinstance(logger, str) else logger
+        self.level = level
+
+    def __call__(self, record):
+        if self.logger.isEnabledFor(self.level):
+            fields = ' '.join(f'{name}={value}' for name, value in record.items() if name != 'name')
+            self.logger.log(self.level, '%s %s', record['name'], fields)
+
+
+class JsonLinesSink:
+    """
+    Append every record as a JSON object to a file, one per line.
+
+    Parameters:
+    -----------
+    path : str
+        The file, created if needed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class MemorySink:
+    """
+    Keep the records in a list, e.g. for tests.
+
+    Example:
+    --------
+     sink = MemorySink()
+     with instrumentation.enabled(sink):
+         sum_by_period(df, 'pq')
+     sink.find('pydataman.meteo.rainfall.sum_by_period')[0]['seconds']
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+    def find(self, name):
+        """
+        Return the records of the spans with the given name.
+        """
+        return [record for record in self.records if record['name'] == name]
+
+    def clear(self):
+        self.records.clear()
+
+
+class _State:
+    __slots__ = ('sink', 'memory')
+
+    def __init__(self):
+        self.sink = None
+        self.memory = False
+
+
+_state = _State()
+_local = threading.local()
+
+
+def enable(sink=None, memory=False):
+    """
+    Start sending a record of every instrumented call to a sink.
+
+    Every public function of the package reports its name, start time (Unix seconds), duration ('seconds'), the
+    rows of its data input and output ('rows_in', 'rows_out'), the enclosing span ('parent') and the exception
+    name if it failed ('error'). The HTTP requests of read_rainfall_data, read_metadata and MetadataRegistry
+    report 'url', 'status', the body size ('bytes') and the time to the response headers ('latency') as spans
+    named 'http'. While disabled, an instrumented call costs one attribute lookup.
+
+    Parameters:
+    -----------
+    sink : callable, optional
+        Called with every record (a dict), e.g. LoggingSink, JsonLinesSink or MemorySink. It must be safe to call
+        from several threads. Default is LoggingSink().
+
+    memory : bool, optional
+        Also report the peak of the memory traced by tracemalloc during every span above its start
+        ('peak_bytes'). Tracing slows Python allocations down considerably and covers all threads. Default is
+        False.
+
+    Example:
+    --------
+     from pydataman import instrumentation
+     instrumentation.enable(instrumentation.JsonLinesSink('nightly.jsonl'), memory=True)
+    """
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _state.memory = memory
+    _state.sink = sink if sink is not None else LoggingSink()
+
+
+def disable():
+    """
+    Stop reporting, and stop tracemalloc if it was started for the spans.
+    """
+    if _state.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state.sink = None
+    _state.memory = False
+
+
+def is_enabled():
+    """
+    Return whether records are being sent to a sink.
+    """
+    return _state.sink is not None
+
+
+class enabled:
+    """
+    Context manager enabling the instrumentation within a block, see enable.
+    """
+
+    def __init__(self, sink=None, memory=False):
+        self.sink = sink
+        self.memory = memory
+
+    def __enter__(self):
+        self._previous = (_state.sink, _state.memory)
+        enable(self.sink, self.memory)
+        return _state.sink
+
+    def __exit__(self, *exc_info):
+        disable()
+        if self._previous[0] is not None:
+            enable(*self._previous)
+
+
+class _NullRecord(dict):
+    """
+    The record of a span while disabled, which ignores the fields set on it.
+    """
+
+    def __setitem__(self, key, value):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+_NULL_RECORD = _NullRecord()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return _NULL_RECORD
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('record', 'sink', '_start', '_memory_start', '_peak')
+
+    def __init__(self, sink, name, fields):
+        self.sink = sink
+        self.record = {'name': name, **fields}
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        parent = stack[-1] if stack else None
+        self.record['parent'] = parent.record['name'] if parent is not None else None
+        self._memory_start = None
+        if _state.memory and tracemalloc.is_tracing():
+            # the peak is reset for every span, so the enclosing span keeps the peak reached before it
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None and parent._memory_start is not None:
+                parent._peak = max(parent._peak, peak)
+            tracemalloc.reset_peak()
+            self._memory_start = self._peak = current
+        stack.append(self)
+        self.record['start'] = time.time()
+        self._start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.record['seconds'] = time.perf_counter() - self._start
+        if exc_type is not None:
+            self.record['error'] = exc_type.__name__
+        stack = _local.stack
+        stack.pop()
+        if self._memory_start is not None and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], self._peak)
+            self.record['peak_bytes'] = peak - self._memory_start
+            if stack and stack[-1]._memory_start is not None:
+                stack[-1]._peak = max(stack[-1]._peak, peak)
+        self.sink(self.record)
+        return False
+
+
+def span(name, **fields):
+    """
+    Time a block and send its record with the given fields to the sink.
+
+    The record is returned by the context manager, so fields found within the block can be added to it. While
+    disabled, the context manager does nothing.
+
+    Example:
+    --------
+     with span('http', url=url) as record:
+         response = session.get(url)
+         record['status'] = response.status_code
+    """
+    sink = _state.sink
+    if sink is None:
+        return _NULL_SPAN
+    return _Span(sink, name, fields)
+
+
+def instrumented(func):
+    """
+    Decorator reporting a span for every call of func, named by its module and qualified name, with the rows of
+    its first data argument and of its result.
+    """
+    name = f'{func.__module__}.{func.__qualname__}'
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        sink = _state.sink
+        if sink is None:
+            return func(*args, **kwargs)
+        with _Span(sink, name, {'rows_in': _input_rows(args, kwargs)}) as record:
+            result = func(*args, **kwargs)
+            record['rows_out'] = _rows(result)
+        return result
+
+    return wrapper
+
+
+def _input_rows(args, kwargs):
+    for value in args + tuple(kwargs.values()):
+        rows = _rows(value, nested=False)
+        if rows is not None:
+            return rows
+    return None
+
+
+def _rows(value, nested=True):
+    """
+    Return the number of rows of a DataFrame, Series, array or RainfallSeries, for a result also of the first
+    item of a tuple (as (results, errors)) and of the values of a dict, otherwise None.
+    """
+    shape = getattr(value, 'shape', None)
+    if shape:
+        return shape[0]
+    # the class itself, as cls of a classmethod, has the slots of a RainfallSeries as attributes
+    if not isinstance(value, type) and hasattr(value, 'times') and hasattr(value, 'values') \
+            and hasattr(value, '__len__'):
+        return len(value)
+    if nested and isinstance(value, tuple) and value:
+        return _rows(value[0])
+    if nested and isinstance(value, dict):
+        rows = [_rows(item, nested=False) for item in value.values()]
+        rows = [count for count in rows if count is not None]
+        return sum(rows) if rows else None
+    return None
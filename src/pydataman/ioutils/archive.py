@@ -0,0 +1,194 @@
+import os
+import uuid
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from pydataman.instrumentation import instrumented
+from pydataman.processing.filters import date_range_bounds
+
+
+MONTH_PARTITIONING = ds.partitioning(pa.schema([('year', pa.int16()), ('month', pa.int8())]), flavor='hive')
+
+
+class StationArchive:
+    """
+    Parquet archive of station histories partitioned by device, year and month.
+
+    The data is stored under root/device=<ID>/year=<YYYY>/month=<M>/ in files whose row groups are sorted by
+    time. Reads for a date window only open the month partitions overlapping it and skip the row groups whose
+    time statistics fall outside of it, so their cost follows the size of the window, not of the history.
+
+    Parameters:
+    -----------
+    root : str
+        Directory of the archive.
+
+    time_column : str, optional
+        Name of the column with Unix timestamps in seconds. Default is 'unixtime'.
+
+    row_group_size : int, optional
+        Maximal number of rows in a Parquet row group. Default is 65536 (about 45 days of 1-minute data).
+
+    Example:
+    --------
+     archive = StationArchive('/data/meteo')
+     archive.write('M08', read_rainfall_data('M08'))
+     df = archive.read('M08', '2024-01-22', '2024-01-30')
+    """
+
+    def __init__(self, root, time_column='unixtime', row_group_size=65536):
+        self.root = root
+        self.time_column = time_column
+        self.row_group_size = row_group_size
+
+    def devices(self):
+        """
+        Return the IDs of the devices stored in the archive.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(unquote(name[len('device='):]) for name in os.listdir(self.root) if name.startswith('device='))
+
+    @instrumented
+    def write(self, device, df, overwrite=False):
+        """
+        Add the rows of df to the archive of a device.
+
+        Parameters:
+        -----------
+        device : str
+            The device ID.
+
+        df : pandas.DataFrame
+            Raw station data with a column of Unix timestamps.
+
+        overwrite : bool, optional
+            If True, the month partitions present in df replace the stored ones instead of being appended to.
+            Default is False.
+        """
+        if df.empty:
+            return
+
+        df = df.sort_values(self.time_column, kind='stable')
+        times = pd.to_datetime(df[self.time_column], unit='s')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.append_column('year', pa.array(times.dt.year.to_numpy(), pa.int16()))
+        table = table.append_column('month', pa.array(times.dt.month.to_numpy(), pa.int8()))
+
+        ds.write_dataset(table, self._device_dir(device), format='parquet', partitioning=MONTH_PARTITIONING,
+                         basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+                         existing_data_behavior='delete_matching' if overwrite else 'overwrite_or_ignore',
+                         max_rows_per_group=self.row_group_size, min_rows_per_group=min(self.row_group_size, 1024))
+
+    @instrumented
+    def read(self, device, start_date=None, end_date=None, last_year=False, last_month=False, columns=None):
+        """
+        Read the data of a device, optionally limited to a date window.
+
+        The window arguments have the same meaning as in processing.filters.filter_df_by_date_range, with the
+        Unix timestamps taken in UTC.
+
+        Parameters:
+        -----------
+        device : str
+            The device ID.
+
+        start_date, end_date : str, optional
+            First and last day of the window in 'YYYY-MM-DD' format.
+
+        last_year : bool, optional
+            If True, read the last calendar year.
+
+        last_month : bool, optional
+            If True, read the last calendar month.
+
+        columns : list of str, optional
+            Columns to read. Default is all columns.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            The rows of the window sorted by time.
+        """
+        directory = self._device_dir(device)
+        if not os.path.isdir(directory):
+            return pd.DataFrame(columns=columns)
+
+        dataset = ds.dataset(directory, format='parquet', partitioning=MONTH_PARTITIONING)
+        expression = self._window_expression(date_range_bounds(start_date, end_date, last_year, last_month))
+        return self._read_table(dataset, expression, columns)
+
+    def iter_months(self, device, start_date=None, end_date=None, last_year=False, last_month=False,
+                    columns=None):
+        """
+        Read the data of a device month by month, so that a long history can be processed in bounded memory.
+
+        Parameters:
+        -----------
+        device, start_date, end_date, last_year, last_month, columns
+            See read.
+
+        Returns:
+        --------
+        generator
+            One DataFrame sorted by time per stored month of the window, in time order.
+
+        Example:
+        --------
+         chunks = archive.iter_months('M08', columns=['unixtime', 'pq'])
+         daily = sum_by_period_chunks((convert_unix_time(df, 'unixtime', inplace=False) for df in chunks), 'pq')
+        """
+        directory = self._device_dir(device)
+        if not os.path.isdir(directory):
+            return
+
+        months = []
+        for year_dir in os.listdir(directory):
+            if not year_dir.startswith('year='):
+                continue
+            for month_dir in os.listdir(os.path.join(directory, year_dir)):
+                if month_dir.startswith('month='):
+                    months.append((int(year_dir[len('year='):]), int(month_dir[len('month='):])))
+
+        dataset = ds.dataset(directory, format='parquet', partitioning=MONTH_PARTITIONING)
+        window = self._window_expression(date_range_bounds(start_date, end_date, last_year, last_month))
+        for year, month in sorted(months):
+            expression = (ds.field('year') == year) & (ds.field('month') == month)
+            if window is not None:
+                expression = expression & window
+            df = self._read_table(dataset, expression, columns)
+            if len(df):
+                yield df
+
+    def _window_expression(self, bounds):
+        """
+        Build the dataset filter of a (start, stop) window, pruning month partitions and row groups.
+        """
+        if bounds is None:
+            return None
+        start, stop = bounds
+        last = stop - pd.Timedelta(seconds=1)
+        year, month = ds.field('year'), ds.field('month')
+        return (((year > start.year) | ((year == start.year) & (month >= start.month))) &
+                ((year < last.year) | ((year == last.year) & (month <= last.month))) &
+                (ds.field(self.time_column) >= _unix_seconds(start)) &
+                (ds.field(self.time_column) < _unix_seconds(stop)))
+
+    def _read_table(self, dataset, expression, columns):
+        if columns is not None:
+            columns = list(dict.fromkeys(list(columns) + [self.time_column]))
+        table = dataset.to_table(columns=columns, filter=expression)
+
+        df = table.to_pandas()
+        df = df.drop(columns=[c for c in ['year', 'month'] if c in df.columns and c not in (columns or [])])
+        return df.sort_values(self.time_column, kind='stable', ignore_index=True)
+
+    def _device_dir(self, device):
+        return os.path.join(self.root, f'device={quote(str(device), safe="")}')
+
+
+def _unix_seconds(timestamp):
+    return (timestamp - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
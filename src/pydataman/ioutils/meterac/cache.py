@@ -0,0 +1,227 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'pydataman')
+
+
+class RainfallCache:
+    """
+    On-disk store of the rainfall data downloaded for every device.
+
+    Each device gets its own directory with the data split over Parquet parts and a small JSON file with the
+    high-water mark on unixtime, the HTTP validators (ETag/Last-Modified) of the last response and the time it
+    was fetched. New downloads only append the rows past the high-water mark as a new part.
+
+    Parameters:
+    -----------
+    cache_dir : str, optional
+        Directory holding the store. Default is ~/.cache/pydataman/rainfall.
+
+    ttl : float, optional
+        Number of seconds during which stored data is returned without contacting the server. Default is 60.
+
+    max_bytes : int, optional
+        Size limit of the store. When it is exceeded the least recently used devices are evicted. Default is
+        no limit.
+
+    max_parts : int, optional
+        Number of Parquet parts after which the parts of a device are compacted into one. Default is 32.
+
+    Example:
+    --------
+     cache = RainfallCache(ttl=300, max_bytes=500 * 2**20)
+     df = read_rainfall_data('M08', cache=cache)
+    """
+
+    META_FILE = 'meta.json'
+
+    def __init__(self, cache_dir=None, ttl=60, max_bytes=None, max_parts=32):
+        self.cache_dir = cache_dir or os.path.join(DEFAULT_CACHE_DIR, 'rainfall')
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_parts = max_parts
+        # threads sharing the cache (read_rainfall_data_many) must not evict a device while it is written
+        self._lock = threading.RLock()
+
+    def device_dir(self, device):
+        return os.path.join(self.cache_dir, str(device))
+
+    def load(self, device):
+        """
+        Return the stored data of a device and its metadata, or (None, {}) if nothing is stored.
+        """
+        with self._lock:
+            meta = self._read_meta(device)
+            parts = self._parts(device)
+            if not meta or not parts:
+                return None, {}
+
+            df = pd.concat([pd.read_parquet(part) for part in parts], ignore_index=True)
+            meta['accessed'] = time.time()
+            self._write_meta(device, meta)
+            return df, meta
+
+    def is_fresh(self, meta):
+        """
+        Tell whether stored data fetched at meta['fetched'] is still within the TTL.
+        """
+        return bool(meta) and time.time() - meta.get('fetched', 0) < self.ttl
+
+    @staticmethod
+    def validators(meta):
+        """
+        Build the conditional request headers for the stored response validators.
+        """
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def touch(self, device, meta):
+        """
+        Mark stored data as fetched now, used when the server answers 304 Not Modified.
+        """
+        with self._lock:
+            meta['fetched'] = meta['accessed'] = time.time()
+            self._write_meta(device, meta)
+
+    def update(self, device, cached, fetched, response_headers=None):
+        """
+        Append the rows of fetched past the stored high-water mark and return the merged data.
+
+        Parameters:
+        -----------
+        device : str
+            The device ID.
+
+        cached : pandas.DataFrame or None
+            The data currently stored for the device, as returned by load.
+
+        fetched : pandas.DataFrame
+            The data downloaded from the server.
+
+        response_headers : dict, optional
+            Headers of the response, used to keep its ETag and Last-Modified validators.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            The stored data followed by the new rows.
+        """
+        with self._lock:
+            meta = self._read_meta(device)
+            time_column = _unixtime_column(fetched)
+
+            # without a high-water mark (nothing stored had rows) all fetched rows are new
+            if cached is None or time_column is None or time_column != meta.get('time_column') \
+                    or meta.get('high_water') is None:
+                self._clear(device)
+                merged = fetched.reset_index(drop=True)
+                new_rows = merged
+            else:
+                new_rows = fetched[fetched[time_column] > meta['high_water']]
+                merged = pd.concat([cached, new_rows], ignore_index=True)
+
+            if len(new_rows) or not self._parts(device):
+                os.makedirs(self.device_dir(device), exist_ok=True)
+                part = os.path.join(self.device_dir(device), f'part-{len(self._parts(device)):05d}.parquet')
+                new_rows.to_parquet(part, index=False)
+                if len(self._parts(device)) > self.max_parts:
+                    self._clear(device)
+                    os.makedirs(self.device_dir(device), exist_ok=True)
+                    merged.to_parquet(os.path.join(self.device_dir(device), 'part-00000.parquet'), index=False)
+
+            response_headers = response_headers or {}
+            now = time.time()
+            self._write_meta(device, {
+                'time_column': time_column,
+                'high_water': int(merged[time_column].max()) if time_column and len(merged) else None,
+                'etag': response_headers.get('ETag'),
+                'last_modified': response_headers.get('Last-Modified'),
+                'fetched': now,
+                'accessed': now,
+            })
+            self.evict(keep=device)
+            return merged
+
+    def size(self):
+        """
+        Return the number of bytes used by the store.
+        """
+        with self._lock:
+            total = 0
+            for root, _, files in os.walk(self.cache_dir):
+                total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+            return total
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used devices until the store fits in max_bytes.
+
+        Parameters:
+        -----------
+        keep : str, optional
+            A device that is never evicted, normally the one just written.
+        """
+        with self._lock:
+            if self.max_bytes is None or not os.path.isdir(self.cache_dir):
+                return
+
+            devices = [d for d in os.listdir(self.cache_dir) if os.path.isdir(self.device_dir(d)) and d != str(keep)]
+            devices.sort(key=lambda d: self._read_meta(d).get('accessed', 0))
+            size = self.size()
+            for device in devices:
+                if size <= self.max_bytes:
+                    break
+                device_size = sum(os.path.getsize(os.path.join(self.device_dir(device), name))
+                                  for name in os.listdir(self.device_dir(device)))
+                self._clear(device)
+                size -= device_size
+
+    def clear(self):
+        """
+        Remove all stored data.
+        """
+        with self._lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _parts(self, device):
+        directory = self.device_dir(device)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.parquet'))
+
+    def _read_meta(self, device):
+        try:
+            with open(os.path.join(self.device_dir(device), self.META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, device, meta):
+        os.makedirs(self.device_dir(device), exist_ok=True)
+        path = os.path.join(self.device_dir(device), self.META_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+    def _clear(self, device):
+        shutil.rmtree(self.device_dir(device), ignore_errors=True)
+
+
+def _unixtime_column(df):
+    """
+    Return the name of the unixtime column of a raw rainfall DataFrame, whatever its case, or None.
+    """
+    for column in df.columns:
+        if str(column).lower() == 'unixtime':
+            return column
+    return None
@@ -1,8 +1,12 @@
+import io
+
 import requests
-import csv
 import pandas as pd
 
+from pydataman.instrumentation import instrumented, span
+
 
+@instrumented
 def read_metadata(request_url):
     """
     Fetches metadata from a specified URL and converts it into a DataFrame.
@@ -22,19 +26,28 @@ def read_metadata(request_url):
     - The function expects the metadata to be in CSV format.
     - It sends an HTTP GET request to the provided URL to fetch the metadata.
     - If the HTTP response status code is not 200 (OK), it prints the status code.
-    - The fetched metadata is then decoded from UTF-8 and converted into a DataFrame.
+    - The fetched metadata is then parsed as UTF-8 by the C engine of pandas into a DataFrame of strings.
     - The first row of the CSV data is assumed to contain column headers.
     """
 
-    response_nodes = requests.get(request_url)
+    with span('http', url=request_url) as record:
+        response_nodes = requests.get(request_url)
+        record.update(status=response_nodes.status_code, latency=response_nodes.elapsed.total_seconds(),
+                      bytes=len(response_nodes.content))
 
     if response_nodes.status_code != 200:
         print("Status code ", response_nodes.status_code)
-    data_nodes = response_nodes.content.decode('utf-8')
 
-    meta_data = list(csv.reader(data_nodes.splitlines(), delimiter=','))
-    df = pd.DataFrame(meta_data[1:], columns=meta_data[0])
-    return df
+    return _parse_metadata(response_nodes.content)
+
+
+def _parse_metadata(content):
+    """
+    Parse the bytes of a metadata catalogue into a DataFrame of strings.
+    """
+    # all columns are kept as strings, as they are in the catalogue
+    return pd.read_csv(io.BytesIO(content), sep=',', dtype=str, keep_default_na=False, encoding='utf-8')
+
 
 def read_data():
     pass
@@ -0,0 +1,64 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def create_session(retries=3, backoff_factor=0.5, pool_maxsize=10):
+    """
+    Create a requests.Session with pooled connections and bounded retries.
+
+    Parameters:
+    -----------
+    retries : int, optional
+        Number of retries for connection errors and 429/5xx responses. Default is 3.
+
+    backoff_factor : float, optional
+        Retries wait backoff_factor * 2 ** (retry - 1) seconds. Default is 0.5.
+
+    pool_maxsize : int, optional
+        Number of connections kept open per host, set it to the number of threads sharing the session.
+        Default is 10.
+
+    Returns:
+    --------
+    requests.Session
+        A session that can be shared between threads.
+    """
+    retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=RETRY_STATUS,
+                  allowed_methods=frozenset(['GET', 'HEAD']), raise_on_status=False)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class HostLimiter:
+    """
+    Limit the number of concurrent requests sent to the same host.
+
+    Example:
+    --------
+     limiter = HostLimiter(4)
+     with limiter('https://meter.ac/gs/meteo/M08/data-rain.php'):
+         response = session.get(...)
+    """
+
+    def __init__(self, max_per_host=4):
+        self.max_per_host = max_per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
@@ -0,0 +1,316 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from pydataman.instrumentation import instrumented, span
+from .cache import DEFAULT_CACHE_DIR, RainfallCache
+from .data_access import _parse_metadata
+
+
+METADATA_URL = 'https://meter.ac/gs/metadata/{name}'
+
+LATITUDE_COLUMNS = ('latitude', 'lat')
+LONGITUDE_COLUMNS = ('longitude', 'lon', 'lng', 'long')
+
+
+class MetadataRegistry:
+    """
+    Typed and indexed station catalogues of meter.ac, downloaded once and cached in memory and on disk.
+
+    A catalogue (meteo.csv, nodes.csv, earth.csv) is read from memory while it is younger than the TTL, then from
+    disk, and only then from the server with a conditional request. Its columns are converted to proper dtypes:
+    coordinates to float64, columns whose values are all numbers to numbers and the station ID to strings. Rows
+    are looked up by station ID in O(1).
+
+    Parameters:
+    -----------
+    url : str, optional
+        URL template of the catalogues, '{name}' in it is replaced by the catalogue name. Default is meter.ac.
+
+    cache_dir : str, optional
+        Directory of the on-disk copies, None keeps the catalogues in memory only. Default is
+        ~/.cache/pydataman/metadata.
+
+    ttl : float, optional
+        Number of seconds during which a catalogue is used without contacting the server. Default is 86400.
+
+    session : requests.Session, optional
+        Session used for the requests, see ioutils.meterac.http.create_session.
+
+    timeout : float, optional
+        Timeout of the requests in seconds. Default is 30.
+
+    Example:
+    --------
+     registry = MetadataRegistry()
+     registry.station('M08')['Location']
+     registry.within(42.0, 43.0, 23.0, 24.0)
+    """
+
+    META_SUFFIX = '.meta.json'
+
+    def __init__(self, url=None, cache_dir=os.path.join(DEFAULT_CACHE_DIR, 'metadata'), ttl=86400, session=None,
+                 timeout=30):
+        self.url = url or METADATA_URL
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.session = session
+        self.timeout = timeout
+        self._catalogues = {}
+        self._lock = threading.Lock()
+
+    @instrumented
+    def catalogue(self, name='meteo.csv'):
+        """
+        Return a catalogue as a typed DataFrame.
+
+        Parameters:
+        -----------
+        name : str, optional
+            Name of the catalogue. Default is 'meteo.csv'.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            The catalogue, one row per station. The DataFrame is shared between calls and must not be modified.
+        """
+        return self._entry(name)['df']
+
+    @instrumented
+    def station(self, station_id, name='meteo.csv'):
+        """
+        Return the row of a station as a dict of column values.
+
+        Raises:
+        -------
+        KeyError
+            If the catalogue has no station with this ID.
+        """
+        return self._entry(name)['rows'][str(station_id)]
+
+    @instrumented
+    def stations(self, station_ids, name='meteo.csv'):
+        """
+        Return the rows of several stations, in the given order, as a DataFrame indexed by station ID.
+
+        Unknown IDs give rows of missing values. The first row of an ID listed twice in the catalogue is used,
+        like by station.
+        """
+        return self._entry(name)['indexed'].reindex([str(i) for i in station_ids])
+
+    @instrumented
+    def within(self, lat_min, lat_max, lon_min, lon_max, name='meteo.csv'):
+        """
+        Return the stations whose coordinates lie in a bounding box, bounds included.
+
+        Parameters:
+        -----------
+        lat_min, lat_max : float
+            Latitude range in degrees.
+
+        lon_min, lon_max : float
+            Longitude range in degrees.
+
+        name : str, optional
+            Name of the catalogue. Default is 'meteo.csv'.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            The rows of the stations inside the box.
+        """
+        entry = self._entry(name)
+        if entry['lat'] is None or entry['lon'] is None:
+            raise KeyError(f'{name} has no latitude and longitude columns')
+        lat, lon = entry['lat'], entry['lon']
+        inside = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+        return entry['df'][inside]
+
+    def refresh(self, name='meteo.csv'):
+        """
+        Check a catalogue with the server now, whatever its age.
+        """
+        with self._lock:
+            self._catalogues.pop(name, None)
+            return self._load(name, force=True)['df']
+
+    def clear(self):
+        """
+        Forget all catalogues, in memory and on disk.
+        """
+        with self._lock:
+            self._catalogues.clear()
+            if self.cache_dir is not None and os.path.isdir(self.cache_dir):
+                for file_name in os.listdir(self.cache_dir):
+                    os.remove(os.path.join(self.cache_dir, file_name))
+
+    def _entry(self, name):
+        entry = self._catalogues.get(name)
+        if entry is not None and time.time() - entry['fetched'] < self.ttl:
+            return entry
+        with self._lock:
+            return self._load(name)
+
+    def _load(self, name, force=False):
+        entry = self._catalogues.get(name)
+        if entry is not None and not force and time.time() - entry['fetched'] < self.ttl:
+            return entry
+
+        content, meta = self._read_disk(name)
+        fetched = meta.get('fetched', 0)
+        if content is None or force or time.time() - fetched >= self.ttl:
+            try:
+                content, meta = self._fetch(name, content, meta)
+                fetched = meta['fetched']
+            except Exception as e:
+                if content is None:
+                    raise
+                # keep using the stored copy for another TTL instead of retrying on every lookup
+                print(f"Using the stored copy of {name}: {e}")
+                fetched = time.time()
+
+        entry = _index_catalogue(_parse_metadata(content))
+        entry['fetched'] = fetched
+        self._catalogues[name] = entry
+        return entry
+
+    def _fetch(self, name, content, meta):
+        """
+        Download a catalogue, or confirm the stored copy with a conditional request, and store it.
+        """
+        headers = RainfallCache.validators(meta) if content is not None else {}
+        if self.session is not None:
+            get = self.session.get
+        else:
+            import requests
+            get = requests.get
+
+        url = self.url.format(name=name)
+        with span('http', url=url) as record:
+            response = get(url, headers=headers, timeout=self.timeout)
+            record.update(status=response.status_code, latency=response.elapsed.total_seconds(),
+                          bytes=len(response.content))
+        response.raise_for_status()
+        if response.status_code != 304:
+            content = response.content
+            meta = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+        meta['fetched'] = time.time()
+        self._write_disk(name, content, meta)
+        return content, meta
+
+    def _read_disk(self, name):
+        if self.cache_dir is None:
+            return None, {}
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            with open(path + self.META_SUFFIX) as f:
+                return content, json.load(f)
+        except (OSError, ValueError):
+            return None, {}
+
+    def _write_disk(self, name, content, meta):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, name)
+        for target, data, mode in [(path, content, 'wb'), (path + self.META_SUFFIX, json.dumps(meta), 'w')]:
+            with open(target + '.tmp', mode) as f:
+                f.write(data)
+            os.replace(target + '.tmp', target)
+
+
+@instrumented
+def coerce_metadata(df):
+    """
+    Convert the string columns of a catalogue from read_metadata to proper dtypes.
+
+    The station ID (the first column whose name ends with 'ID', or the first column) becomes a string column,
+    latitude and longitude columns become float64 with NaN for missing values and every other column whose
+    non-empty values are all numbers becomes numeric. The other columns are left as they are.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        A catalogue as returned by read_metadata.
+
+    Returns:
+    --------
+    pandas.DataFrame
+        A new DataFrame with the converted columns.
+    """
+    df = df.copy()
+    id_column = station_id_column(df)
+    for column in df.columns:
+        if column == id_column:
+            df[column] = df[column].astype('string')
+            continue
+        values = df[column].replace('', np.nan) if df[column].dtype == object else df[column]
+        numbers = pd.to_numeric(values, errors='coerce')
+        if str(column).lower() in LATITUDE_COLUMNS + LONGITUDE_COLUMNS:
+            df[column] = numbers.astype('float64')
+        elif numbers.notna().sum() == values.notna().sum() and values.notna().any():
+            df[column] = numbers
+    return df
+
+
+def station_id_column(df):
+    """
+    Return the station ID column of a catalogue: the first column whose name ends with 'ID', or the first column.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        A catalogue as returned by read_metadata.
+
+    Returns:
+    --------
+    str or None
+        The name of the column, None for a DataFrame without columns.
+    """
+    for column in df.columns:
+        if str(column).lower().endswith('id'):
+            return column
+    return df.columns[0] if len(df.columns) else None
+
+
+def find_column(df, names):
+    """
+    Return the first column of df whose lower-case name is one of names, e.g. LATITUDE_COLUMNS or ('unixtime',).
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        A catalogue as returned by read_metadata or the data of a station.
+
+    names : tuple
+        The accepted column names in lower case.
+
+    Returns:
+    --------
+    str or None
+        The name of the column, None if df has none of the names.
+    """
+    for column in df.columns:
+        if str(column).lower() in names:
+            return column
+    return None
+
+
+def _index_catalogue(raw):
+    df = coerce_metadata(raw)
+    id_column = station_id_column(df)
+    lat = find_column(df, LATITUDE_COLUMNS)
+    lon = find_column(df, LONGITUDE_COLUMNS)
+    # the first row of a duplicated ID wins
+    indexed = df.drop_duplicates(id_column).set_index(id_column, drop=False) if id_column else df
+    return {'df': df,
+            'indexed': indexed,
+            'rows': indexed.to_dict(orient='index') if id_column else {},
+            'lat': df[lat].to_numpy() if lat else None,
+            'lon': df[lon].to_numpy() if lon else None}
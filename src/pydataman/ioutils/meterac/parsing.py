@@ -0,0 +1,224 @@
+import io
+import re
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from pydataman.instrumentation import instrumented
+
+
+METER_AC_SEPARATOR = '[;, ]+'
+DELIMITERS = (';', ',', ' ')
+SAMPLE_BYTES = 64 * 1024
+# a copy of a streamed payload is kept in memory up to this size, then on disk, to parse it again if needed
+SPOOL_BYTES = 32 * 2**20
+
+
+def detect_delimiter(sample):
+    """
+    Detect the single-character delimiter of a meter.ac CSV payload.
+
+    Parameters:
+    -----------
+    sample : str
+        The first complete lines of the payload.
+
+    Returns:
+    --------
+    str or None
+        The delimiter, or None if the fields are separated by runs or mixtures of ';', ',' and ' ' that only the
+        regular expression separator [;, ]+ can split.
+    """
+    lines = [line.strip() for line in sample.splitlines() if line.strip()]
+    for delimiter in DELIMITERS:
+        if all(line.split(delimiter) == re.split(METER_AC_SEPARATOR, line) for line in lines):
+            return delimiter
+    return None
+
+
+@instrumented
+def parse_rainfall_csv(source, value_dtype='float64', engine='c', chunksize=None):
+    """
+    Parse a meter.ac rainfall payload into a DataFrame with compact dtypes.
+
+    The delimiter is detected from the first lines so the payload can be read by the C or pyarrow engine of
+    pandas. The unixtime column is read as int64 and the other numeric columns as value_dtype. Payloads that
+    mix separators fall back to the python engine with the [;, ]+ separator.
+
+    The dtypes are chosen from the first lines. If a later row does not fit them, e.g. an empty unixtime or a
+    value that is not a number, the payload is parsed again with the dtypes pandas infers for the whole of it
+    (a float unixtime with missing values, an object column) and value_dtype is only applied to the columns
+    that are still numeric. A copy of a streamed payload is kept for that, in memory up to SPOOL_BYTES and on
+    disk beyond.
+
+    Parameters:
+    -----------
+    source : str, bytes or binary file-like
+        The payload. A file-like source such as requests' response.raw is read in blocks, so the full text is
+        never held in memory.
+
+    value_dtype : str or numpy.dtype, optional
+        The dtype of the numeric columns other than unixtime, e.g. 'float32'. Default is 'float64'.
+
+    engine : str, optional
+        'c' or 'pyarrow'. Default is 'c'.
+
+    chunksize : int, optional
+        If given, return an iterator over DataFrames of chunksize rows instead of a single DataFrame.
+        Not supported by the pyarrow engine.
+
+    Returns:
+    --------
+    pandas.DataFrame or iterator
+        The parsed payload, or an iterator over its chunks. Every chunk gets the dtypes its columns can take.
+    """
+    if isinstance(source, str):
+        source = source.encode('utf-8')
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    sample = source.read(SAMPLE_BYTES)
+
+    lines = sample.decode('utf-8', errors='replace')
+    if len(sample) == SAMPLE_BYTES:
+        lines = lines[:lines.rfind('\n') + 1]
+
+    delimiter = detect_delimiter(lines)
+    if delimiter is None:
+        options = {'sep': METER_AC_SEPARATOR, 'engine': 'python'}
+        dtype = _column_dtypes(lines, METER_AC_SEPARATOR, value_dtype)
+    else:
+        options = {'sep': delimiter, 'engine': engine}
+        dtype = _column_dtypes(lines, delimiter, value_dtype)
+
+    if chunksize is not None:
+        stream = io.BufferedReader(_PrefixedStream(sample, source))
+        return _cast_chunks(pd.read_csv(stream, chunksize=chunksize, **options), dtype)
+
+    if dtype is None:
+        return pd.read_csv(io.BufferedReader(_PrefixedStream(sample, source)), **options)
+
+    seekable = getattr(source, 'seekable', lambda: False)()
+    if seekable:
+        start = source.tell() - len(sample)
+        spool = None
+        stream = io.BufferedReader(_PrefixedStream(sample, source))
+    else:
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        spool.write(sample)
+        stream = io.BufferedReader(_PrefixedStream(sample, _RecordingStream(source, spool)))
+
+    try:
+        return pd.read_csv(stream, dtype=dtype, **options)
+    except ValueError:
+        # a row past the sample does not fit the dtypes, parse everything again without them
+        if seekable:
+            source.seek(start)
+            stream = io.BufferedReader(_PrefixedStream(b'', source))
+        else:
+            spool.seek(0)
+            stream = io.BufferedReader(_PrefixedStream(b'', _ChainedStream(spool, source)))
+        return _cast(pd.read_csv(stream, **options), dtype)
+    finally:
+        if spool is not None:
+            spool.close()
+
+
+def _column_dtypes(lines, delimiter, value_dtype):
+    """
+    Choose the dtype of every numeric column from the dtypes pandas infers for the sample lines.
+    """
+    if not lines.strip():
+        return None
+
+    head = pd.read_csv(io.StringIO(lines), sep=delimiter, engine='c' if len(delimiter) == 1 else 'python')
+    dtype = {}
+    for column, inferred in head.dtypes.items():
+        if str(column).lower() == 'unixtime':
+            dtype[column] = 'int64' if inferred.kind in 'iu' else 'float64'
+        elif inferred.kind in 'iuf':
+            dtype[column] = value_dtype
+    return dtype
+
+
+def _cast(df, dtype):
+    """
+    Apply the dtypes to the columns of df that can take them without losing values, an integer dtype only to
+    columns parsed as integers.
+    """
+    for column, column_dtype in (dtype or {}).items():
+        kinds = 'iu' if np.dtype(column_dtype).kind in 'iu' else 'iuf'
+        if column in df.columns and df[column].dtype.kind in kinds:
+            df[column] = df[column].astype(column_dtype)
+    return df
+
+
+def _cast_chunks(reader, dtype):
+    with reader:
+        for chunk in reader:
+            yield _cast(chunk, dtype)
+
+
+class _PrefixedStream(io.RawIOBase):
+    """
+    A binary stream returning the already read prefix before the rest of the wrapped stream.
+    """
+
+    def __init__(self, prefix, stream):
+        self._prefix = prefix
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            n = min(len(buffer), len(self._prefix))
+            buffer[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class _RecordingStream(io.RawIOBase):
+    """
+    A binary stream copying everything read from the wrapped stream to a file.
+    """
+
+    def __init__(self, stream, copy):
+        self._stream = stream
+        self._copy = copy
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        self._copy.write(data)
+        return len(data)
+
+
+class _ChainedStream(io.RawIOBase):
+    """
+    A binary stream returning the rest of one stream and then the rest of another.
+    """
+
+    def __init__(self, first, second):
+        self._first = first
+        self._second = second
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._first.read(len(buffer)) if self._first is not None else b''
+        if not data:
+            self._first = None
+            data = self._second.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
@@ -0,0 +1,161 @@
+import argparse
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from pydataman.meteo.synthetic import synthetic_rainfall
+
+
+class MeterAcStub:
+    """
+    Local HTTP stand-in for meter.ac serving synthetic station data.
+
+    It answers /gs/meteo/<device>/data-rain.php with a synthetic_rainfall payload seeded by the device ID and
+    /gs/metadata/meteo.csv with the list of devices, sends ETag headers and honours If-None-Match.
+
+    Parameters:
+    -----------
+    devices : iterable of str, optional
+        IDs of the served stations. Default is M01 to M10.
+
+    rows : int, optional
+        Number of rows of every rainfall payload. Default is 10000.
+
+    host : str, optional
+        Address to listen on. Default is '127.0.0.1'.
+
+    port : int, optional
+        Port to listen on, 0 picks a free one. Default is 0.
+
+    Example:
+    --------
+     with MeterAcStub(rows=100_000) as stub:
+         df = read_rainfall_data('M01', url=stub.rainfall_url)
+         df_meteo = read_metadata(stub.metadata_url('meteo.csv'))
+    """
+
+    def __init__(self, devices=None, rows=10_000, host='127.0.0.1', port=0):
+        self.devices = list(devices) if devices is not None else [f'M{i:02d}' for i in range(1, 11)]
+        self.rows = rows
+        self.requests = 0
+        self._payloads = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def rainfall_url(self):
+        return self.base_url + '/gs/meteo/{device}/data-rain.php'
+
+    def metadata_url(self, name='meteo.csv'):
+        return f'{self.base_url}/gs/metadata/{name}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def payload(self, path):
+        """
+        Return the body for a request path, or None if the path is unknown.
+        """
+        parts = path.split('?')[0].strip('/').split('/')
+        if parts == ['gs', 'metadata', 'meteo.csv']:
+            return self._cached(path, self._metadata)
+        if len(parts) == 4 and parts[:2] == ['gs', 'meteo'] and parts[3] == 'data-rain.php' \
+                and parts[2] in self.devices:
+            return self._cached(path, lambda: self._rainfall(parts[2]))
+        return None
+
+    def _cached(self, path, build):
+        with self._lock:
+            if path not in self._payloads:
+                self._payloads[path] = build()
+            return self._payloads[path]
+
+    def _rainfall(self, device):
+        seed = int(hashlib.md5(device.encode('utf-8')).hexdigest()[:8], 16)
+        return synthetic_rainfall(self.rows, seed=seed).to_csv(sep=';', index=False).encode('utf-8')
+
+    def _metadata(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({'MeteoID': self.devices,
+                           'Location': [f'Station {device}' for device in self.devices],
+                           'Latitude': np.round(rng.uniform(41.2, 44.2, len(self.devices)), 5),
+                           'Longitude': np.round(rng.uniform(22.4, 28.6, len(self.devices)), 5)})
+        return df.to_csv(index=False).encode('utf-8')
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                body = stub.payload(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve synthetic meter.ac station data on a local port.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--rows', type=int, default=10_000, help='rows of every rainfall payload')
+    parser.add_argument('--devices', type=int, default=10, help='number of stations')
+    args = parser.parse_args()
+
+    stub = MeterAcStub([f'M{i:02d}' for i in range(1, args.devices + 1)], args.rows, args.host, args.port)
+    print(f'serving {stub.rainfall_url} and {stub.metadata_url()}')
+    stub.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
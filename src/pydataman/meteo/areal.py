@@ -0,0 +1,324 @@
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+from pydataman.instrumentation import instrumented
+from pydataman.ioutils.meterac.metadata import (LATITUDE_COLUMNS, LONGITUDE_COLUMNS, coerce_metadata, find_column,
+                                                station_id_column)
+from pydataman.processing.memoize import fingerprint
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class ArealInterpolator:
+    """
+    Gridded and catchment precipitation from the data of many stations with precomputed spatial weights.
+
+    The weights of a set of targets (points, a grid or polygons) are computed once with a KD-tree over the station
+    coordinates and kept as a sparse matrix of shape (targets, stations), in memory and optionally on disk. A map
+    of every time step is then one sparse matrix product with a stations x time matrix, e.g. of station_matrix.
+    Stations with missing values in a time step are left out and the weights of the others are scaled to sum
+    to one.
+
+    Parameters:
+    -----------
+    station_ids : array-like
+        The IDs of the stations, the order of the rows of the value matrices.
+
+    lat, lon : array-like
+        The coordinates of the stations in degrees. Stations without coordinates get no weight.
+
+    method : str, optional
+        'idw' weights the k nearest stations by the inverse of their distance to the power of power, 'nearest'
+        weights them equally (k=1 gives Thiessen polygons). Default is 'idw'.
+
+    k : int, optional
+        The number of stations used for every target. Default is 8.
+
+    power : float, optional
+        The power of the distance of 'idw'. Default is 2.
+
+    max_distance_km : float, optional
+        Stations farther than this from a target get no weight. Default is None, no limit.
+
+    cache_dir : str, optional
+        Directory in which the weight matrices are stored as .npz files, None keeps them in memory only. Default
+        is None.
+
+    Example:
+    --------
+     interpolator = ArealInterpolator.from_metadata(MetadataRegistry().catalogue('meteo.csv'))
+     daily = station_matrix({device: sum_by_period(df, 'pq', standard='bg') for device, df in data.items()})
+     lat, lon = np.arange(41.2, 44.3, 0.05), np.arange(22.3, 28.7, 0.05)
+     maps = interpolator.interpolate(daily, interpolator.grid_weights(lat, lon))
+     maps.to_numpy().reshape(len(lat), len(lon), -1)
+    """
+
+    FILE_SUFFIX = '.npz'
+
+    def __init__(self, station_ids, lat, lon, method='idw', k=8, power=2.0, max_distance_km=None, cache_dir=None):
+        if method not in ('idw', 'nearest'):
+            raise ValueError(f"method must be 'idw' or 'nearest', got {method!r}")
+        self.station_ids = pd.Index(np.asarray(station_ids).astype(str))
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.method = method
+        self.k = k
+        self.power = power
+        self.max_distance_km = max_distance_km
+        self.cache_dir = cache_dir
+
+        located = np.isfinite(self.lat) & np.isfinite(self.lon)
+        if not located.any():
+            raise ValueError('no station has coordinates')
+        # the column of the weight matrix of every point of the tree
+        self._columns = np.flatnonzero(located)
+        self._tree = cKDTree(_unit_vectors(self.lat[located], self.lon[located]))
+        self._weights = {}
+
+    @classmethod
+    def from_metadata(cls, metadata, station_ids=None, **kwargs):
+        """
+        Create an interpolator from a station catalogue, as returned by read_metadata or MetadataRegistry.
+
+        Parameters:
+        -----------
+        metadata : pandas.DataFrame
+            The catalogue with a station ID column and latitude and longitude columns.
+
+        station_ids : list, optional
+            The stations to use, in this order. Default is all stations of the catalogue.
+
+        **kwargs
+            The other parameters of ArealInterpolator.
+        """
+        df = coerce_metadata(metadata)
+        id_column = station_id_column(df)
+        lat, lon = find_column(df, LATITUDE_COLUMNS), find_column(df, LONGITUDE_COLUMNS)
+        if lat is None or lon is None:
+            raise KeyError('the metadata has no latitude and longitude columns')
+        df = df.drop_duplicates(id_column).set_index(df[id_column].astype(str).to_numpy())
+        if station_ids is not None:
+            df = df.reindex([str(station_id) for station_id in station_ids])
+        return cls(df.index, df[lat], df[lon], **kwargs)
+
+    def point_weights(self, lat, lon):
+        """
+        Return the weights of target points as a sparse matrix of shape (points, stations).
+
+        Parameters:
+        -----------
+        lat, lon : array-like
+            The coordinates of the points in degrees, flattened in C order.
+
+        Returns:
+        --------
+        scipy.sparse.csr_matrix
+            The weights, every row sums to one unless no station is within max_distance_km.
+        """
+        lat = np.asarray(lat, dtype=np.float64).ravel()
+        lon = np.asarray(lon, dtype=np.float64).ravel()
+        return self._cached(('points', lat, lon), lambda: self._point_weights(lat, lon))
+
+    def grid_weights(self, lat, lon):
+        """
+        Return the weights of the points of a regular grid, the rows running over lon within lat so that the
+        maps reshape to (len(lat), len(lon)).
+
+        Parameters:
+        -----------
+        lat, lon : array-like
+            The latitudes and longitudes of the grid in degrees.
+        """
+        grid_lat, grid_lon = np.meshgrid(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64),
+                                         indexing='ij')
+        return self.point_weights(grid_lat, grid_lon)
+
+    def polygon_weights(self, polygons, resolution=0.01):
+        """
+        Return the weights of the mean precipitation over polygons, e.g. catchments.
+
+        Every polygon is covered by sample points at the centers of a grid of the given resolution and its row is
+        the area weighted mean of the weights of the points inside. A polygon too small to hold a point gets the
+        weights of the mean of its vertices.
+
+        Parameters:
+        -----------
+        polygons : list or dict
+            The vertices of every polygon as an array of shape (n, 2) of (lon, lat) pairs in degrees. For a dict
+            the rows follow the order of its values.
+
+        resolution : float, optional
+            The spacing of the sample points in degrees. Default is 0.01.
+
+        Returns:
+        --------
+        scipy.sparse.csr_matrix
+            The weights, of shape (polygons, stations).
+        """
+        from matplotlib.path import Path
+
+        polygons = list(polygons.values()) if isinstance(polygons, dict) else list(polygons)
+        polygons = [np.asarray(vertices, dtype=np.float64) for vertices in polygons]
+
+        def compute():
+            sample_lat, sample_lon, rows, area = [], [], [], []
+            for row, vertices in enumerate(polygons):
+                lo, hi = vertices.min(axis=0), vertices.max(axis=0)
+                grid_lon, grid_lat = np.meshgrid(np.arange(lo[0] + resolution / 2, hi[0], resolution),
+                                                 np.arange(lo[1] + resolution / 2, hi[1], resolution))
+                points = np.column_stack([grid_lon.ravel(), grid_lat.ravel()])
+                points = points[Path(vertices).contains_points(points)] if len(points) else points
+                if not len(points):
+                    points = vertices.mean(axis=0, keepdims=True)
+                sample_lon.append(points[:, 0])
+                sample_lat.append(points[:, 1])
+                rows.append(np.full(len(points), row))
+                # the area of a cell shrinks with the cosine of the latitude
+                cells = np.cos(np.radians(points[:, 1]))
+                area.append(cells / cells.sum())
+            means = sparse.csr_matrix((np.concatenate(area), (np.concatenate(rows), np.arange(sum(map(len, rows))))),
+                                      shape=(len(polygons), sum(map(len, rows))))
+            return (means @ self._point_weights(np.concatenate(sample_lat), np.concatenate(sample_lon))).tocsr()
+
+        return self._cached(('polygons', polygons, resolution), compute)
+
+    @instrumented
+    def interpolate(self, values, weights, index=None):
+        """
+        Apply weights to the values of the stations.
+
+        Parameters:
+        -----------
+        values : pandas.DataFrame or numpy.ndarray
+            Stations x time values. The rows of a DataFrame are matched to the stations by ID (stations missing
+            from it count as missing values), those of an array are taken in the order of station_ids.
+
+        weights : scipy.sparse matrix
+            Weights returned by point_weights, grid_weights or polygon_weights.
+
+        index : array-like, optional
+            Labels of the targets for a DataFrame result. Default is a RangeIndex.
+
+        Returns:
+        --------
+        pandas.DataFrame or numpy.ndarray
+            Targets x time values, missing where no station with a value has weight. A DataFrame keeps the columns
+            of values.
+        """
+        columns = None
+        if isinstance(values, pd.DataFrame):
+            columns = values.columns
+            values = values.set_axis(values.index.astype(str)).reindex(self.station_ids).to_numpy(dtype=np.float64)
+        else:
+            values = np.asarray(values, dtype=np.float64)
+        if values.shape[0] != len(self.station_ids):
+            raise ValueError(f'values have {values.shape[0]} rows for {len(self.station_ids)} stations')
+
+        present = ~np.isnan(values)
+        if present.all():
+            result = np.asarray(weights @ values, dtype=np.float64)
+            coverage = np.asarray(weights.sum(axis=1)).reshape((-1,) + (1,) * (values.ndim - 1))
+            result = np.where(coverage > 0, result, np.nan)
+        else:
+            # scale the weights of the stations with values to sum to one in every time step
+            totals = np.asarray(weights @ np.where(present, values, 0.0))
+            coverage = np.asarray(weights @ present.astype(np.float64))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = np.where(coverage > 0, totals / coverage, np.nan)
+
+        if columns is None:
+            return result
+        return pd.DataFrame(result, index=index, columns=columns)
+
+    def clear(self):
+        """
+        Remove the stored weights, in memory and on disk.
+        """
+        self._weights.clear()
+        if self.cache_dir is not None and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(self.FILE_SUFFIX):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def _cached(self, targets, compute):
+        key = fingerprint(targets, self.station_ids, self.lat, self.lon, self.method, self.k, self.power,
+                          self.max_distance_km)
+        if key in self._weights:
+            return self._weights[key]
+
+        path = None if self.cache_dir is None else os.path.join(self.cache_dir, key + self.FILE_SUFFIX)
+        if path is not None and os.path.exists(path):
+            weights = sparse.load_npz(path).tocsr()
+        else:
+            weights = compute()
+            if path is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                sparse.save_npz(path + '.tmp' + self.FILE_SUFFIX, weights)
+                os.replace(path + '.tmp' + self.FILE_SUFFIX, path)
+        self._weights[key] = weights
+        return weights
+
+    def _point_weights(self, lat, lon):
+        k = min(self.k, self._tree.n)
+        chords, neighbours = self._tree.query(_unit_vectors(lat, lon), k=k)
+        chords, neighbours = chords.reshape(len(lat), k), neighbours.reshape(len(lat), k)
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chords / 2, 0, 1))
+
+        if self.method == 'nearest':
+            weights = np.ones_like(distances)
+        else:
+            exact = distances == 0
+            with np.errstate(divide='ignore'):
+                weights = np.where(exact.any(axis=1, keepdims=True), exact, 1 / distances ** self.power)
+        if self.max_distance_km is not None:
+            weights[distances > self.max_distance_km] = 0
+        totals = weights.sum(axis=1, keepdims=True)
+        weights = np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+        rows = np.repeat(np.arange(len(lat)), k)
+        matrix = sparse.csr_matrix((weights.ravel(), (rows, self._columns[neighbours].ravel())),
+                                   shape=(len(lat), len(self.station_ids)))
+        matrix.eliminate_zeros()
+        return matrix
+
+
+@instrumented
+def station_matrix(sums, date_column='Date/Time', value_column='PQ (mm)'):
+    """
+    Combine the period sums of many stations into a stations x time matrix.
+
+    Parameters:
+    -----------
+    sums : dict
+        The output of sum_by_period (or any DataFrame with a date and a value column) of every station by ID.
+
+    date_column : str, optional
+        The name of the column with the start of the periods. Default is 'Date/Time'.
+
+    value_column : str, optional
+        The name of the column with the values. Default is 'PQ (mm)'.
+
+    Returns:
+    --------
+    pandas.DataFrame
+        One row per station and one column per period start, missing where a station has no value.
+    """
+    if not sums:
+        return pd.DataFrame(index=pd.Index([], dtype=str), columns=pd.DatetimeIndex([], name=date_column))
+    stacked = pd.concat({str(device): df.set_index(date_column)[value_column] for device, df in sums.items()},
+                        names=['Device', date_column])
+    return stacked.unstack(date_column)
+
+
+def _unit_vectors(lat, lon):
+    """
+    Return the points on the unit sphere of coordinates in degrees, whose Euclidean distances (chords) order the
+    points like their great circle distances.
+    """
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
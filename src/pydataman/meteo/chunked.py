@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from pydataman.instrumentation import instrumented
+from .rainfall import _day_start, _rain_event_bounds, _rain_periods, _segment_sums
+from .series import RainfallSeries, _as_frame
+
+
+def subtract_next_value_chunks(chunks, column):
+    """
+    Apply subtract_next_value to data split into chunks, e.g. from a chunked CSV reader or a Parquet archive.
+
+    The last value of every chunk is carried to the next one, so the chunks yielded are exactly the rows
+    subtract_next_value returns for the whole data, while only one chunk is held in memory.
+
+    Parameters:
+    - chunks (iterable): DataFrames (or RainfallSeries) with consecutive rows of the data, in time order.
+    - column (str): Name of the column from which values will be subtracted.
+
+    Returns:
+    generator: The chunks with the values subtracted.
+
+    Example:
+    --------
+     chunks = (convert_unix_time(df, 'unixtime', inplace=False) for df in archive.iter_months('M08'))
+     periods = find_rain_periods_chunks(subtract_next_value_chunks(chunks, 'pq'), 'pq')
+    """
+    previous = None
+    for chunk in chunks:
+        if isinstance(chunk, RainfallSeries):
+            if len(chunk):
+                first = chunk.values[:1] if previous is None else np.array([previous], dtype=chunk.values.dtype)
+                previous = chunk.values[-1]
+                chunk = chunk.with_values(np.abs(np.diff(chunk.values, prepend=first)))
+            yield chunk
+            continue
+
+        subtracted = chunk.copy()
+        if len(subtracted):
+            values = subtracted[column]
+            shifted = values.shift(1)
+            if previous is not None:
+                shifted.iloc[0] = previous
+            subtracted[column] = abs(values - shifted)
+            if previous is None:
+                subtracted.iloc[0, subtracted.columns.get_loc(column)] = 0
+            previous = values.iloc[-1]
+        yield subtracted
+
+
+@instrumented
+def find_rain_periods_chunks(chunks, rainfall_col, threshold=0.01, stop_window=10, date_column='Date/Time'):
+    """
+    Apply find_rain_periods to data split into chunks in time order.
+
+    Only the rows of the event still open at the end of a chunk (or its last row if there is none) are carried
+    to the next chunk, so the memory needed is bounded by the chunk size and the length of the longest event,
+    and the result is identical to find_rain_periods on the whole data.
+
+    Parameters:
+    - chunks (iterable): DataFrames (or RainfallSeries) with consecutive rows of the data, in time order.
+    - rainfall_col, threshold, stop_window, date_column: see find_rain_periods.
+
+    Returns:
+    pandas.DataFrame: The rainfall periods, as returned by find_rain_periods.
+    """
+    dates, values = None, None
+    periods = []
+    open_event = False
+    for chunk in chunks:
+        chunk = _as_frame(chunk, rainfall_col, date_column)
+        if chunk.empty:
+            continue
+        chunk_dates = pd.DatetimeIndex(chunk[date_column])
+        chunk_values = chunk[rainfall_col].to_numpy()
+        if dates is None:
+            dates, values = chunk_dates, chunk_values
+        else:
+            dates, values = dates.append(chunk_dates), np.concatenate([values, chunk_values])
+
+        starts, stops, open_start, _ = _rain_event_bounds(values, threshold, stop_window)
+        if starts.size:
+            periods.append(_rain_periods(dates, values, starts, stops))
+
+        # an open event is detected again from its first row with the next chunk, otherwise the last row is
+        # needed for the change to the next chunk
+        open_event = open_start is not None
+        keep = open_start if open_event else len(values) - 1
+        dates, values = dates[keep:], values[keep:]
+
+    if open_event:
+        # an event still open at the end of the data is closed on the last row
+        periods.append(_rain_periods(dates, values, np.array([0]), np.array([len(values) - 1])))
+    if not periods:
+        empty = np.empty(0, dtype=np.int64)
+        return _rain_periods(pd.DatetimeIndex([]), np.empty(0), empty, empty)
+    return pd.concat(periods, ignore_index=True)
+
+
+@instrumented
+def sum_by_period_chunks(chunks, rainfall_col, interval_hours=24, date_column='Date/Time',
+                         standard='international'):
+    """
+    Apply sum_by_period to data split into chunks in time order.
+
+    Every period that ends within a chunk is summed when the chunk is read and only the rows of the partial
+    period at the end of the chunk are carried to the next one, so the memory needed is bounded by the chunk
+    size and the result is identical to sum_by_period on the whole data.
+
+    Parameters:
+    - chunks (iterable): DataFrames (or RainfallSeries) with consecutive rows of the data, in time order.
+    - rainfall_col, interval_hours, date_column, standard: see sum_by_period.
+
+    Returns:
+    pandas.DataFrame: The start of every period in date_column and its rainfall in 'PQ (mm)'.
+    """
+    interval = pd.Timedelta(hours=interval_hours)
+    step = np.timedelta64(interval.value, 'ns')
+    day_start = _day_start(standard)
+
+    first = last = start = None
+    dates, values = None, None
+    sums = []
+    summed = 0
+    for chunk in chunks:
+        chunk = _as_frame(chunk, rainfall_col, date_column)
+        if chunk.empty:
+            continue
+        chunk_dates = pd.DatetimeIndex(chunk[date_column])
+        chunk_values = chunk[rainfall_col].to_numpy()
+        if first is None:
+            first = chunk_dates.min()
+            start = first.replace(hour=day_start[0], minute=day_start[1])
+            origin = start.to_datetime64().astype('datetime64[ns]')
+            dates, values = chunk_dates.values[:0].astype('datetime64[ns]'), chunk_values[:0]
+        last = chunk_dates.max() if last is None else max(last, chunk_dates.max())
+
+        dates = np.concatenate([dates, chunk_dates.values.astype('datetime64[ns]')])
+        values = np.concatenate([values, chunk_values])
+        order = np.argsort(dates, kind='stable')
+        dates, values = dates[order], values[order]
+
+        # the periods before the one of the last row are complete
+        current = int((dates[-1] - origin) // step)
+        if current > summed:
+            period_starts = origin + np.arange(summed, current) * step
+            lo = np.searchsorted(dates, period_starts, side='left')
+            hi = np.searchsorted(dates, period_starts + step, side='left')
+            sums.append(_segment_sums(values, lo, hi))
+            summed = current
+        keep = np.searchsorted(dates, origin + summed * step, side='left')
+        dates, values = dates[keep:], values[keep:]
+
+    if first is None:
+        return pd.DataFrame({date_column: pd.DatetimeIndex([]), 'PQ (mm)': np.empty(0)})
+
+    periods = (last - first) // interval + 1
+    if periods > summed:
+        period_starts = origin + np.arange(summed, periods) * step
+        lo = np.searchsorted(dates, period_starts, side='left')
+        hi = np.searchsorted(dates, period_starts + step, side='left')
+        sums.append(_segment_sums(values, lo, hi))
+    return pd.DataFrame({date_column: pd.date_range(start, periods=periods, freq=interval),
+                         'PQ (mm)': np.concatenate(sums)[:periods]})
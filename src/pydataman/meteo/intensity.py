@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+from pydataman.instrumentation import instrumented
+from .rainfall import find_rain_periods
+from .series import _as_frame
+
+
+DURATIONS = (5, 10, 15, 30, 60, 120, 360, 720, 1440)
+
+
+@instrumented
+def max_rainfall_intensity(df, rainfall_col, durations=DURATIONS, by='year', periods=None, date_column='Date/Time'):
+    """
+    Find the maximum rainfall accumulated over rolling windows of several durations, as for
+    intensity-duration-frequency (IDF) tables.
+
+    The window of a duration d ending on a row holds the rows in (time - d, time]. All durations are evaluated on
+    one cumulative sum of the rainfall: the sum of a window is the difference of two of its entries, found by a
+    binary search per duration, so the cost is O(rows * log(rows)) per duration instead of a pass per window.
+
+    Parameters:
+    - df (pandas.DataFrame or RainfallSeries): Input DataFrame with the rainfall of every row (not the cumulative
+      counter, see subtract_next_value) and its date and time. Missing values count as no rainfall.
+    - rainfall_col (str): Name of the column containing rainfall data in mm.
+    - durations (iterable): Window lengths in minutes. Default is 5, 10, 15, 30, 60, 120, 360, 720 and 1440.
+    - by (str, optional): 'year' finds the maxima of every calendar year, 'event' of every rain event and None of
+      the whole data. Windows do not reach across years or events. Default is 'year'.
+    - periods (pandas.DataFrame, optional): The events for by='event', as returned by find_rain_periods. Default
+      is find_rain_periods(df, rainfall_col).
+    - date_column (str): Name of the column containing date and time information. Default is 'Date/Time'.
+
+    Returns:
+    pandas.DataFrame: One row per duration (and year or event) with the columns 'Year' or 'Start_Time' of the
+                      event, 'Duration_(min)', 'Max_Rainfall_(mm)', 'Intensity_(mm/h)' and 'End_Time', the end of
+                      the first window with the maximum.
+
+    Example:
+    --------
+     df = subtract_next_value(df, 'pq')
+     idf = max_rainfall_intensity(df, 'pq', by='year')
+     idf.pivot(index='Duration_(min)', columns='Year', values='Intensity_(mm/h)')
+    """
+    df = _as_frame(df, rainfall_col, date_column)
+    if by not in ('year', 'event', None):
+        raise ValueError(f"by must be 'year', 'event' or None, got {by!r}")
+
+    dates = pd.DatetimeIndex(df[date_column])
+    order = np.argsort(dates.values, kind='stable')
+    dates = dates[order]
+    times = dates.values.astype('datetime64[ns]').view(np.int64)
+    rainfall = np.nan_to_num(df[rainfall_col].to_numpy(dtype=np.float64)[order], nan=0.0)
+    cumulative = np.r_[0.0, np.cumsum(rainfall)]
+
+    # contiguous row ranges [lo, hi) of the groups in time order
+    if by == 'event':
+        if periods is None:
+            periods = find_rain_periods(df, rainfall_col, date_column=date_column)
+        keys = pd.DatetimeIndex(periods['Start_Time'])
+        lo = np.searchsorted(dates, keys, side='left')
+        hi = np.searchsorted(dates, pd.DatetimeIndex(periods['Stop_Time']), side='right')
+        key_column = 'Start_Time'
+    elif by == 'year':
+        years = dates.year.to_numpy()
+        lo = np.flatnonzero(np.diff(years, prepend=years[:1] - 1)) if len(years) else np.empty(0, dtype=np.int64)
+        hi = np.append(lo[1:], len(years))
+        keys = years[lo]
+        key_column = 'Year'
+    else:
+        lo, hi = np.array([0]), np.array([len(times)])
+        keys, key_column = None, None
+
+    # the start of the group of every row, rows outside of all groups are skipped
+    lengths = hi - lo
+    segments = np.cumsum(lengths) - lengths
+    group_start = np.repeat(lo, lengths)
+    group_rows = np.arange(lengths.sum()) - np.repeat(segments, lengths) + group_start
+    filled = hi > lo
+
+    rows = []
+    for duration in durations:
+        window = int(pd.Timedelta(minutes=duration).value)
+        first = np.searchsorted(times, times[group_rows] - window, side='right')
+        sums = cumulative[group_rows + 1] - cumulative[np.maximum(first, group_start)]
+
+        maxima = np.full(len(lo), np.nan)
+        ends = np.full(len(lo), np.datetime64('NaT'), dtype='datetime64[ns]')
+        if filled.any():
+            maxima[filled] = np.maximum.reduceat(sums, segments[filled])
+            # position of the first window reaching the maximum of its group
+            reached = sums == np.repeat(maxima, lengths)
+            position = np.where(reached, np.arange(sums.size), sums.size)
+            ends[filled] = dates.values[group_rows[np.minimum.reduceat(position, segments[filled])]]
+
+        table = {'Duration_(min)': duration,
+                 'Max_Rainfall_(mm)': maxima,
+                 'Intensity_(mm/h)': maxima * 60 / duration,
+                 'End_Time': ends}
+        if key_column is not None:
+            table = {key_column: keys, **table}
+        rows.append(pd.DataFrame(table))
+
+    columns = ([key_column] if key_column else []) + ['Duration_(min)', 'Max_Rainfall_(mm)', 'Intensity_(mm/h)',
+                                                      'End_Time']
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    result = pd.concat(rows, ignore_index=True)
+    if key_column is not None:
+        result = result.sort_values([key_column, 'Duration_(min)'], kind='stable', ignore_index=True)
+    return result[columns]
@@ -0,0 +1,158 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from pydataman.instrumentation import instrumented
+from pydataman.processing.filters import date_range_bounds
+from .rainfall import find_rain_periods, subtract_next_value, sum_by_period
+
+
+@instrumented
+def process_stations(stations, max_workers=None, chunksize=1, rainfall_col='pq', time_column='unixtime',
+                     cumulative=True, threshold=0.01, stop_window=10, standard='bg', start_date=None,
+                     end_date=None):
+    """
+    Compute rain periods, daily sums and monthly totals for many stations in parallel processes.
+
+    Every station is processed by a worker of a ProcessPoolExecutor. Workers receive only the Unix times and
+    rainfall values of a station as two NumPy arrays, or the path of a StationArchive to read them from, instead
+    of a pickled DataFrame. Column names are matched without regard to case, so both raw frames from
+    read_rainfall_data and frames passed through convert_unix_time can be used.
+
+    Parameters:
+    -----------
+    stations : dict
+        Station data by MeteoID, either a DataFrame with Unix times and rainfall or the root of a StationArchive
+        holding the station.
+
+    max_workers : int, optional
+        Number of worker processes, 1 processes the stations in the calling process. Default is the number of
+        CPUs.
+
+    chunksize : int, optional
+        Number of stations sent to a worker at once. Default is 1.
+
+    rainfall_col : str, optional
+        The name of the rainfall column. Default is 'pq'.
+
+    time_column : str, optional
+        The name of the column with Unix timestamps. Default is 'unixtime'.
+
+    cumulative : bool, optional
+        If True, the rainfall column is the cumulative counter and is differenced with subtract_next_value
+        first. Default is True.
+
+    threshold, stop_window : optional
+        Parameters of find_rain_periods.
+
+    standard : str, optional
+        Day start convention of the daily sums, see sum_by_period. Default is 'bg'.
+
+    start_date, end_date : str, optional
+        Limit the processing to this window, see filter_df_by_date_range.
+
+    Returns:
+    --------
+    tuple
+        A dict with the long-format DataFrames 'periods' (find_rain_periods), 'daily' (sum_by_period) and
+        'monthly' (the daily sums added up by month), each with a leading 'MeteoID' column, and a dict of errors
+        by MeteoID with the keys 'error' and 'message'.
+
+    Example:
+    --------
+     frames, errors = read_rainfall_data_many(df_meteo['MeteoID'])
+     results, failed = process_stations(frames, max_workers=8)
+     results['daily']
+    """
+    bounds = date_range_bounds(start_date, end_date)
+    options = {'cumulative': cumulative, 'threshold': threshold, 'stop_window': stop_window,
+               'standard': standard}
+
+    tasks, errors = [], {}
+    for device, data in stations.items():
+        try:
+            payload = _payload(device, data, rainfall_col, time_column, bounds, start_date, end_date)
+        except Exception as e:
+            errors[device] = _error(e)
+            continue
+        tasks.append((payload, options))
+
+    if max_workers == 1:
+        outputs = list(map(_process_station, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            outputs = list(executor.map(_process_station, tasks, chunksize=chunksize))
+
+    results = {'periods': [], 'daily': [], 'monthly': []}
+    for device, output, error in outputs:
+        if error is not None:
+            errors[device] = error
+            continue
+        for name, df in output.items():
+            df.insert(0, 'MeteoID', device)
+            results[name].append(df)
+
+    results = {name: pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['MeteoID'])
+               for name, frames in results.items()}
+    return results, errors
+
+
+def _payload(device, data, rainfall_col, time_column, bounds, start_date, end_date):
+    """
+    Reduce the data of a station to what a worker needs: its times and values, or where to read them.
+    """
+    if isinstance(data, str):
+        return device, data, time_column, rainfall_col, start_date, end_date
+
+    times = data[_column(data, time_column)].to_numpy(dtype=np.int64)
+    values = data[_column(data, rainfall_col)].to_numpy(dtype=np.float64)
+    if bounds is not None:
+        start, stop = ((bound - pd.Timestamp(0)) // pd.Timedelta(seconds=1) for bound in bounds)
+        inside = (times >= start) & (times < stop)
+        times, values = times[inside], values[inside]
+    return device, times, values
+
+
+def _process_station(task):
+    payload, options = task
+    device = payload[0]
+    try:
+        if isinstance(payload[1], str):
+            from pydataman.ioutils.archive import StationArchive  # pyarrow is only loaded by workers reading archives
+
+            _, root, time_column, rainfall_col, start_date, end_date = payload
+            df = StationArchive(root, time_column=time_column).read(device, start_date, end_date)
+            times = df[_column(df, time_column)].to_numpy(dtype=np.int64)
+            values = df[_column(df, rainfall_col)].to_numpy(dtype=np.float64)
+        else:
+            _, times, values = payload
+        return device, _station_results(times, values, **options), None
+    except Exception as e:
+        return device, None, _error(e)
+
+
+def _station_results(times, values, cumulative, threshold, stop_window, standard):
+    df = pd.DataFrame({'Date/Time': pd.to_datetime(times, unit='s'), 'pq': values})
+    if cumulative:
+        df = subtract_next_value(df, 'pq')
+
+    periods = find_rain_periods(df, 'pq', threshold=threshold, stop_window=stop_window)
+    daily = sum_by_period(df, 'pq', standard=standard)
+    monthly = daily.groupby(daily['Date/Time'].dt.to_period('M'))['PQ (mm)'].sum()
+    monthly = pd.DataFrame({'Month': monthly.index.to_timestamp(), 'PQ (mm)': monthly.to_numpy()})
+    return {'periods': periods, 'daily': daily, 'monthly': monthly}
+
+
+def _error(exception):
+    return {'error': type(exception).__name__, 'message': str(exception)}
+
+
+def _column(df, name):
+    """
+    Return the column of df whose name matches name without regard to case.
+    """
+    for column in df.columns:
+        if str(column).lower() == name.lower():
+            return column
+    raise KeyError(name)
@@ -0,0 +1,133 @@
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.subplots as sp
+from matplotlib import pyplot as plt
+
+from pydataman.processing.decimation import decimate
+
+
+def plot_precipitation(df, rainfall_column, date_column='Date/Time', max_points=2000, method='minmax', webgl=False):
+    """
+    Plot the daily precipitation, and the monthly sums when the data spans more than one month.
+
+    The rows are added up by day before plotting and at most max_points days are drawn, so the size of the figure
+    does not grow with the length of the data. df is not modified.
+
+    Parameters:
+    - df (pandas.DataFrame): Input DataFrame with rainfall values and their date and time.
+    - rainfall_column (str): Name of the column containing rainfall data in mm.
+    - date_column (str): Name of the column containing date and time information. Default is 'Date/Time'.
+    - max_points (int, optional): Maximal number of drawn days, None draws all of them. Default is 2000.
+    - method (str): Downsampling of the days, 'minmax' or 'lttb', see processing.decimation.decimate.
+      Default is 'minmax'.
+    - webgl (bool): Draw the daily precipitation as a WebGL (scattergl) step line instead of bars. Default is False.
+
+    Returns:
+    plotly.graph_objects.Figure: The figure.
+    """
+    dates = pd.DatetimeIndex(df[date_column])
+    daily = pd.DataFrame({'Date': dates.normalize(), rainfall_column: df[rainfall_column].to_numpy()})
+    daily = daily.groupby('Date', as_index=False)[rainfall_column].sum()
+    daily['Month'] = daily['Date'].dt.month
+    daily['Year'] = daily['Date'].dt.year
+
+    shown = daily
+    if max_points is not None and len(daily) > max_points:
+        shown = daily.iloc[decimate(daily['Date'], daily[rainfall_column], max_points, method)]
+
+    if webgl:
+        daily_precipitation = go.Figure(go.Scattergl(x=shown['Date'], y=shown[rainfall_column], mode='lines',
+                                                     line_shape='hv', name='Rainfall (mm)'))
+    else:
+        daily_precipitation = px.bar(shown, x='Date', y=rainfall_column,
+                                     # color='Month',
+                                     labels={rainfall_column: 'Rainfall (mm)'},
+                                     hover_data={'Date': True})
+
+    # Plotting daily precipitation
+    if daily['Month'].nunique() > 1:
+        fig = sp.make_subplots(rows=2, cols=1, shared_xaxes=False,
+                               subplot_titles=['Daily Precipitation', 'Monthly Precipitation'],
+                               row_heights=[0.8, 0.2])
+
+        daily_precipitation.update_xaxes(
+            dtick="M1",
+            tickformat="%b\n%Y",
+            ticklabelmode="period")
+
+        # Add daily precipitation subplot
+        for trace in daily_precipitation.data:
+            fig.add_trace(trace, row=1, col=1)
+
+        # Calculate the sum of precipitation for each month and year
+        monthly_sum = daily.groupby(['Year', 'Month'])[rainfall_column].sum().reset_index()
+
+        # Plotting monthly sum with the same color palette
+        monthly_sum_chart = px.bar(monthly_sum, x='Month', y=rainfall_column,
+                                   # facet_col='Year',
+                                   # text='Year',
+                                   labels={rainfall_column: 'Monthly Sum'},
+                                   hover_data={'Month': True, 'Year':True})
+
+        monthly_sum_chart.update_xaxes(
+            dtick="M1",
+            tickformat="%b\n%Y",
+            ticklabelmode="period")
+
+        # Use the same color palette as the first subplot
+        for i, trace in enumerate(monthly_sum_chart.data):
+            fig.add_trace(trace, row=2, col=1)
+
+        fig.update_yaxes(title_text='Precipitation (mm)', row=1, col=1)
+        fig.update_yaxes(title_text='Precipitation (mm)', row=2, col=1)
+        return fig
+
+    else:
+        daily_precipitation.update_xaxes(
+            dtick='D1',
+            tickformat="%d-%m",
+            ticklabelmode="period")
+
+        daily_precipitation.update_layout(xaxis_title='Date', yaxis_title='Precipitation (mm)')
+        return daily_precipitation
+
+
+def plot_rainfall_intensity(df, x_col, y_col, device, threshold=0.0001, max_points=2000, method='minmax'):
+    """
+    Plot the rainfall of every row at or above the threshold.
+
+    At most max_points rows are drawn, selected so that the peaks of the storms are kept, which is enough for the
+    1000 pixels wide figure.
+
+    Parameters:
+    - df (pandas.DataFrame): Input DataFrame, its rows in any order.
+    - x_col (str): Name of the column containing date and time information.
+    - y_col (str): Name of the column containing rainfall data in mm.
+    - device (str): ID of the station, shown in the title.
+    - threshold (float): Rows with less rainfall are left out. Default is 0.0001.
+    - max_points (int, optional): Maximal number of drawn rows, None draws all of them. Default is 2000.
+    - method (str): Downsampling of the rows, 'minmax' or 'lttb', see processing.decimation.decimate.
+      Default is 'minmax'.
+
+    Returns:
+    module: matplotlib.pyplot with the plot in the current figure.
+    """
+    plt.figure(figsize=(10, 6))
+
+    filtered_df = df[df[y_col] >= threshold]
+    if max_points is not None and len(filtered_df) > max_points:
+        # the buckets of the decimation run from the first to the last row
+        if not filtered_df[x_col].is_monotonic_increasing:
+            filtered_df = filtered_df.sort_values(x_col, kind='stable')
+        filtered_df = filtered_df.iloc[decimate(filtered_df[x_col], filtered_df[y_col], max_points, method)]
+
+    plt.plot(filtered_df[x_col], filtered_df[y_col], marker='o', linestyle='', markersize=7,
+             markerfacecolor='MidnightBlue', markeredgewidth=0.1, markeredgecolor='white')
+
+    plt.xlabel('Date and time')
+    plt.ylabel('Rainfall (mm)')
+    plt.title(f'Rainfall Intensity for device: {device}')
+    plt.grid(True, color='gray', linestyle='-', linewidth=0.1)
+
+    return plt
@@ -1,28 +1,50 @@
+import numpy as np
 import pandas as pd
-import requests
-from matplotlib import pyplot as plt
-from requests.exceptions import HTTPError, JSONDecodeError
-from io import StringIO
-from datetime import datetime, timedelta
-import plotly.subplots as sp
-import plotly.express as px
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 
+from pydataman.instrumentation import instrumented, span
+from pydataman.ioutils.meterac.parsing import parse_rainfall_csv
+from .series import RainfallSeries, _as_frame
+
+
+# requests and the plotting libraries are imported on first use, so that the numeric functions load with numpy
+# and pandas only
+_PLOTTING = ('plot_precipitation', 'plot_rainfall_intensity')
+
+
+def __getattr__(name):
+    if name in _PLOTTING:
+        from . import plotting
+        return getattr(plotting, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+RAINFALL_URL = 'https://meter.ac/gs/meteo/{device}/data-rain.php'
+
+
+@instrumented
+def read_rainfall_data(device, url=None, cache=None, session=None, timeout=None):
+    """
+    Fetch the rainfall data of a meteo station from meter.ac.
+
+    Parameters:
+    - device (str): ID of the station, e.g. 'M08'.
+    - url (str, optional): URL to read instead of meter.ac, '{device}' in it is replaced by the device ID.
+    - cache (RainfallCache, optional): Local store of earlier downloads. Data younger than the cache TTL is
+      returned without a request, otherwise a conditional request is sent and only the rows past the stored
+      unixtime high-water mark are added to the store.
+    - session (requests.Session, optional): Session used for the request, see ioutils.meterac.http.create_session.
+    - timeout (float, optional): Timeout of the request in seconds. Default is no timeout.
+
+    Returns:
+    pandas.DataFrame: The raw rainfall data, empty if it could not be read and nothing is cached.
+    """
+    from requests.exceptions import HTTPError, JSONDecodeError
 
-def read_rainfall_data(device, url=None):
-    headers = {'Accept': 'application/json'}
-    query = f'https://meter.ac/gs/meteo/{device}/data-rain.php'
     df_rainfall = pd.DataFrame()
     try:
-        response = requests.get(query, headers=headers)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx and 5xx)
-
-        # Check if the response contains JSON data
-        if response.headers.get('content-type') == 'application/json':
-            data2 = response.json()
-        else:
-            # read response as a txt file
-            # print("Response does not contain JSON data. Status code:", response.status_code)
-            df_rainfall = pd.read_csv(StringIO(response.text), sep="[;, ]+", engine='python')
+        df_rainfall = _fetch_rainfall_data(device, url, cache, session, timeout)
 
     except HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
@@ -31,16 +53,120 @@ def read_rainfall_data(device, url=None):
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
+    if df_rainfall.empty and cache is not None:
+        cached, _ = cache.load(device)
+        if cached is not None:
+            df_rainfall = cached
     return df_rainfall
 
 
+@instrumented
+def read_rainfall_data_many(devices, url=None, cache=None, max_workers=8, max_per_host=4, timeout=30, retries=3,
+                            backoff_factor=0.5, as_frame=False):
+    """
+    Fetch the rainfall data of several meteo stations concurrently.
+
+    The requests are sent from a thread pool sharing one pooled requests.Session, with a timeout per request,
+    bounded retries with exponential backoff for connection errors and 429/5xx responses, and at most
+    max_per_host requests in flight to the same host.
+
+    Parameters:
+    - devices (iterable): IDs of the stations, e.g. df_meteo['MeteoID'].
+    - url (str, optional): URL to read instead of meter.ac, '{device}' in it is replaced by the device ID.
+    - cache (RainfallCache, optional): Local store of earlier downloads, see read_rainfall_data.
+    - max_workers (int): Number of threads. Default is 8.
+    - max_per_host (int): Maximal number of concurrent requests to one host. Default is 4.
+    - timeout (float): Timeout of every request in seconds. Default is 30.
+    - retries (int): Number of retries of a failed request. Default is 3.
+    - backoff_factor (float): Retries wait backoff_factor * 2 ** (retry - 1) seconds. Default is 0.5.
+    - as_frame (bool): Return one long DataFrame with a 'MeteoID' column instead of a dict. Default is False.
+
+    Returns:
+    tuple: The data of every station read successfully (a dict of DataFrames by device, or a single DataFrame
+           when as_frame is True) and a dict of errors by device. Every error is a dict with the keys 'error'
+           (exception class name), 'message' and 'status' (HTTP status code or None).
+
+    Example:
+    --------
+     frames, errors = read_rainfall_data_many(df_meteo['MeteoID'], max_workers=16)
+    """
+    from pydataman.ioutils.meterac.http import HostLimiter, create_session
+
+    devices = list(dict.fromkeys(devices))
+    session = create_session(retries=retries, backoff_factor=backoff_factor, pool_maxsize=max_workers)
+    limiter = HostLimiter(max_per_host)
+
+    frames, errors = {}, {}
+    with session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_fetch_rainfall_data, device, url, cache, session, timeout, limiter): device
+                   for device in devices}
+        for future in as_completed(futures):
+            device = futures[future]
+            try:
+                frames[device] = future.result()
+            except Exception as e:
+                response = getattr(e, 'response', None)
+                errors[device] = {'error': type(e).__name__,
+                                  'message': str(e),
+                                  'status': response.status_code if response is not None else None}
+
+    frames = {device: frames[device] for device in devices if device in frames}
+    if as_frame:
+        frames = pd.concat(frames, names=['MeteoID', None]).reset_index(level='MeteoID') if frames \
+            else pd.DataFrame(columns=['MeteoID'])
+        frames.reset_index(drop=True, inplace=True)
+    return frames, errors
+
+
+def _fetch_rainfall_data(device, url=None, cache=None, session=None, timeout=None, limiter=None):
+    """
+    Fetch the rainfall data of a station, see read_rainfall_data. Errors are raised instead of printed.
+    """
+    headers = {'Accept': 'application/json'}
+    query = (url or RAINFALL_URL).format(device=device)
+
+    cached, meta = cache.load(device) if cache is not None else (None, {})
+    if cached is not None and cache.is_fresh(meta):
+        return cached
+    if cached is not None:
+        headers.update(cache.validators(meta))
+
+    if session is not None:
+        get = session.get
+    else:
+        import requests
+        get = requests.get
+    with limiter(query) if limiter is not None else nullcontext(), span('http', url=query) as record:
+        with get(query, headers=headers, timeout=timeout, stream=True) as response:
+            record.update(status=response.status_code, latency=response.elapsed.total_seconds())
+            response.raise_for_status()  # Raise HTTPError for bad responses (4xx and 5xx)
+
+            df_rainfall = pd.DataFrame()
+            if response.status_code == 304:
+                cache.touch(device, meta)
+                df_rainfall = cached
+            # Check if the response contains JSON data
+            elif response.headers.get('content-type') == 'application/json':
+                data2 = response.json()
+            else:
+                # read response as a csv file, streaming the body instead of keeping its text in memory
+                response.raw.decode_content = True
+                df_rainfall = parse_rainfall_csv(response.raw)
+                if cache is not None:
+                    df_rainfall = cache.update(device, cached, df_rainfall, response.headers)
+            # the bytes received, before decompression
+            record['bytes'] = response.raw.tell()
+    return df_rainfall
+
+
+@instrumented
 def amount_precipitation(df, interval_h=24, rainfall_column='rainfall', date_column='Date/Time'):
     """
     Calculate the total precipitation for each specified time interval in the given DataFrame.
     This function is create to recalculate Precipitation quantity in mm from tipping bucket devices.
 
     Parameters:
-    - df (pandas.DataFrame): Input DataFrame containing columns 'Date/Time' and 'rainfall'.
+    - df (pandas.DataFrame or RainfallSeries): Input DataFrame containing columns 'Date/Time' and 'rainfall'.
     - interval_hours (int): Time interval in hours for calculating precipitation. Default is 24 hours.
     - rainfall_column (str): Name of the column containing rainfall data. Default is 'rainfall'.
     - date_column (str): Name of the column containing date and time information. Default is 'Date/Time'.
@@ -67,33 +193,21 @@ def amount_precipitation(df, interval_h=24, rainfall_column='rainfall', date_col
                     Date    PQ
     0 2023-11-30 00:00:00  35.0
     """
-    result_list = []
+    df = _as_frame(df, rainfall_column, date_column)
+    rainfall_mm = _tipping_bucket_mm(df[rainfall_column].to_numpy())
     if interval_h == 0:
-        for index, row in df.iterrows():
-            calc = row[rainfall_column] / 10 * 0.2
-            res = {date_column: row[date_column], 'pq': calc}
-            result_list.append(res)
-    else:
-        interval_minutes = interval_h * 60
-
-        for start_date in pd.date_range(start=df[date_column].min(), end=df[date_column].max(), freq=f'{interval_minutes}T'):
-            end_date = start_date + pd.Timedelta(minutes=interval_minutes)
-
-            filtered_df = df[(df[date_column] >= start_date) & (df[date_column] < end_date)]
-            calc = sum(filtered_df[rainfall_column] / 10 * 0.2)
-            res = {date_column: start_date, 'pq': calc}
-            result_list.append(res)
-
-    result_df = pd.DataFrame(result_list)
+        return pd.DataFrame({date_column: df[date_column].to_numpy(), 'pq': rainfall_mm})
 
-    return result_df
+    starts, sums = _interval_sums(df[date_column], rainfall_mm, pd.Timedelta(hours=interval_h))
+    return pd.DataFrame({date_column: starts, 'pq': sums})
 
 
+@instrumented
 def find_rain_periods(df, rainfall_col, threshold=0.01, stop_window=10, date_column='Date/Time'):
     """
     Detects periods of rainfall in a DataFrame based on specified criteria.
 
-    Parameters: df (DataFrame): The DataFrame containing rainfall data. rainfall_col (str): The name of the column
+    Parameters: df (DataFrame or RainfallSeries): The DataFrame containing rainfall data. rainfall_col (str): The name of the column
     containing rainfall data. threshold (float, optional): The threshold value to consider as rainfall. Default is
     0.01. stop_window (int, optional): The window size (in minutes) to consider as the end of rainfall if no rain is
     detected. Default is 10. date_column (str, optional): The name of the column containing datetime information.
@@ -106,160 +220,196 @@ def find_rain_periods(df, rainfall_col, threshold=0.01, stop_window=10, date_col
             - Duration_(min): The duration of the rainfall period in minutes.
             - Amount_Rainfall_(mm): The total amount of rainfall during the period in millimeters.
     """
-    rain_periods = []
-
-    start_time = None
-    consecutive_zeros = 0
-
-    for index, row in df.iterrows():
-        current_value = row[rainfall_col]
-        next_value = df.at[index + 1, rainfall_col] if index + 1 < len(df) else None
-
-        if next_value is None:
-            if start_time is not None:
-                stop_time = row[date_column]
-                rainfall_sum = df[(df[date_column] >= start_time) & (df[date_column] <= stop_time)][rainfall_col].sum()
-                rain_periods.append({'Start_Time': start_time,
-                                     'Stop_Time': stop_time,
-                                     'Duration_(min)': (stop_time - start_time).total_seconds() / 60,
-                                     'Amount_Rainfall_(mm)': rainfall_sum})
-            break
-
-        # if abs(next_value - current_value) >= threshold:
-        if round(abs(next_value - current_value), 10) >= threshold:
-            if start_time is None:
-                start_time = pd.to_datetime(row[date_column])
-
-            consecutive_zeros = 0
-
-        elif next_value == current_value and start_time is not None:
-            consecutive_zeros += 1
-            if consecutive_zeros == stop_window:
-                stop_time = pd.to_datetime(row[date_column])
-                # stop_time = pd.to_datetime(row[date_column]) - pd.to_timedelta(stop_window, unit='minutes')
-                rainfall_sum = df[(df[date_column] >= start_time) & (df[date_column] <= stop_time)][rainfall_col].sum()
-                rain_periods.append({'Start_Time': start_time,
-                                     'Stop_Time': stop_time,
-                                     'Duration_(min)': (stop_time - start_time).total_seconds() / 60,
-                                     'Amount_Rainfall_(mm)': rainfall_sum})
-                start_time = None
-
-    return pd.DataFrame(rain_periods)
+    df = _as_frame(df, rainfall_col, date_column)
+    starts, stops, open_start, _ = _rain_event_bounds(df[rainfall_col].to_numpy(), threshold, stop_window)
+    if open_start is not None:
+        # an event still open at the end of the data is closed on the last row
+        starts = np.append(starts, open_start)
+        stops = np.append(stops, len(df) - 1)
 
+    return _rain_periods(pd.DatetimeIndex(df[date_column]), df[rainfall_col].to_numpy(), starts, stops)
 
+
+def _rain_periods(dates, rainfall, starts, stops):
+    """
+    Build the find_rain_periods table of the events with the given positional start and stop rows.
+    """
+    start_times = dates[starts]
+    stop_times = dates[stops]
+
+    # rows are selected by time, not by position, exactly like a boolean mask over the date column
+    order = np.argsort(dates.values, kind='stable')
+    sorted_dates = dates.values[order]
+    rainfall = rainfall[order]
+    if rainfall.dtype.kind == 'f':
+        rainfall = np.nan_to_num(rainfall, nan=0.0)
+    lo = np.searchsorted(sorted_dates, start_times.values, side='left')
+    hi = np.searchsorted(sorted_dates, stop_times.values, side='right')
+
+    return pd.DataFrame({'Start_Time': start_times,
+                         'Stop_Time': stop_times,
+                         'Duration_(min)': (stop_times - start_times).total_seconds() / 60,
+                         'Amount_Rainfall_(mm)': _segment_sums(rainfall, lo, hi)})
+
+
+def _rain_event_bounds(values, threshold=0.01, stop_window=10, open_zeros=None):
+    """
+    Locate rain events in a sequence of rainfall values.
+
+    An event opens on the first row whose change to the next row reaches the threshold and closes on the row
+    where the stop_window-th unchanged step since the last such change is seen.
+
+    Parameters:
+    - values (numpy.ndarray): Rainfall values in time order.
+    - threshold (float): Minimal absolute change between two rows that counts as rainfall.
+    - stop_window (int): Number of unchanged steps that closes an event.
+    - open_zeros (int, optional): If an event is already open before the first row, the number of unchanged
+      steps counted for it so far. Such an event gets the start row -1.
+
+    Returns:
+    tuple: Two int64 arrays with the positional start and stop rows of the closed events, the start row of the
+           event still open after the last row (None if there is none) and its count of unchanged steps.
+    """
+    values = np.asarray(values, dtype=float)
+    empty = np.empty(0, dtype=np.int64)
+
+    current, following = values[:-1], values[1:]
+    rising = np.round(np.abs(following - current), 10) >= threshold
+    unchanged = (following == current) & ~rising
+
+    changes = np.flatnonzero(rising)
+    zeros = np.flatnonzero(unchanged)
+    window = int(stop_window) if stop_window >= 1 and float(stop_window).is_integer() else None
+    needed = np.full(changes.size, window or 0)
+    if open_zeros is not None:
+        changes = np.r_[-1, changes]
+        needed = np.r_[max((window or 0) - open_zeros, 1), needed]
+    if changes.size == 0:
+        return empty, empty, None, 0
+
+    # the step on which each change would be closed if no other change follows it
+    closed = np.zeros(changes.size, dtype=bool)
+    closing_step = np.full(changes.size, len(values) - 1, dtype=np.int64)
+    if window is not None:
+        nth_zero = np.searchsorted(zeros, changes, side='right') + needed - 1
+        has_zero = nth_zero < zeros.size
+        closing_step[has_zero] = zeros[nth_zero[has_zero]]
+        next_change = np.append(changes[1:], len(values))
+        closed = has_zero & (closing_step < next_change)
+
+    starts = changes[np.r_[True, closed[:-1]]]
+    stops = closing_step[closed]
+    if closed[-1]:
+        return starts, stops, None, 0
+
+    open_count = zeros.size - np.searchsorted(zeros, changes[-1], side='right')
+    if changes[-1] == -1:
+        open_count += open_zeros
+    return starts[:-1], stops, int(starts[-1]), int(open_count)
+
+
+def _segment_sums(values, lo, hi):
+    """
+    Sum values[lo[i]:hi[i]] for every pair of bounds, adding the elements in order.
+
+    Empty segments (hi <= lo) sum to zero.
+    """
+    lo = np.asarray(lo, dtype=np.int64)
+    hi = np.asarray(hi, dtype=np.int64)
+    if lo.size == 0:
+        return np.zeros(0, dtype=values.dtype)
+
+    padded = np.append(values, np.zeros(1, dtype=values.dtype))
+    sums = np.add.reduceat(padded, np.column_stack([lo, hi]).ravel())[::2]
+    sums[hi <= lo] = 0
+    return sums
+
+
+@instrumented
 def subtract_next_value(df, column):
     """
     Subtract each next value from the previous value in the given column of the DataFrame.
 
     Parameters:
-    - df (pandas.DataFrame): Input DataFrame.
+    - df (pandas.DataFrame or RainfallSeries): Input DataFrame.
     - column (str): Name of the column from which values will be subtracted.
 
     Returns:
-    pandas.DataFrame: DataFrame with the values subtracted.
+    pandas.DataFrame: DataFrame with the values subtracted, or a RainfallSeries if df is one.
     """
+    if isinstance(df, RainfallSeries):
+        return df.with_values(np.abs(np.diff(df.values, prepend=df.values[:1])))
+
     subtracted_df = df.copy()
     subtracted_df[column] = abs(subtracted_df[column] - subtracted_df[column].shift(1))
-    subtracted_df.at[0, column] = 0
+    if len(subtracted_df):
+        subtracted_df.iloc[0, subtracted_df.columns.get_loc(column)] = 0
     return subtracted_df
 
 
+@instrumented
 def sum_by_period(df, rainfall_col, interval_hours=24, date_column='Date/Time', standard='international'):
-    result_list = []
+    """
+    Sum rainfall over consecutive periods of the given length.
 
-    if standard == 'bg':
-        start_hour, start_minute = 7, 30  # Bulgarian standard
-    else:
-        start_hour, start_minute = 0, 0  # international standard
-
-    for start_date in pd.date_range(start=df[date_column].min(), end=df[date_column].max(), freq=f'{interval_hours}h'):
-        start_date = start_date.replace(hour=start_hour, minute=start_minute)
-        end_date = start_date + timedelta(hours=interval_hours)
-
-        filtered_df = df[(df[date_column] >= start_date) & (df[date_column] < end_date)]
-        calc = sum(filtered_df[rainfall_col])
-        res = {date_column: start_date, 'PQ (mm)': calc}
-        result_list.append(res)
-    result_df = pd.DataFrame(result_list)
-    return result_df
-
-
-def plot_precipitation(df, rainfall_column, date_column='Date/Time'):
-    # if date_column != 'Date/Time':
-    df['Date'] = [d.date() for d in df[date_column]]
-    df['Date'] = pd.to_datetime(df['Date'])
-    df['Month'] = df['Date'].dt.month
-    df['Year'] = df['Date'].dt.year
-
-    # Plotting daily precipitation
-    if len(df['Date'].dt.month.unique()) > 1:
-        fig = sp.make_subplots(rows=2, cols=1, shared_xaxes=False,
-                               subplot_titles=['Daily Precipitation', 'Monthly Precipitation'],
-                               row_heights=[0.8, 0.2])
-
-        daily_precipitation = px.bar(df, x='Date', y=rainfall_column,
-                                     # color='Month',
-                                     labels={rainfall_column: 'Rainfall (mm)'},
-                                     hover_data={'Date': True})
-
-        daily_precipitation.update_xaxes(
-            dtick="M1",
-            tickformat="%b\n%Y",
-            ticklabelmode="period")
-
-        # Add daily precipitation subplot
-        for trace in daily_precipitation.data:
-            fig.add_trace(trace, row=1, col=1)
-
-        # Calculate the sum of precipitation for each month and year
-        monthly_sum = df.groupby(['Year', 'Month'])[rainfall_column].sum().reset_index()
-
-        # Plotting monthly sum with the same color palette
-        monthly_sum_chart = px.bar(monthly_sum, x='Month', y=rainfall_column,
-                                   # facet_col='Year',
-                                   # text='Year',
-                                   labels={rainfall_column: 'Monthly Sum'},
-                                   hover_data={'Month': True, 'Year':True})
-
-        monthly_sum_chart.update_xaxes(
-            dtick="M1",
-            tickformat="%b\n%Y",
-            ticklabelmode="period")
-
-        # Use the same color palette as the first subplot
-        for i, trace in enumerate(monthly_sum_chart.data):
-            fig.add_trace(trace, row=2, col=1)
-
-        fig.update_yaxes(title_text='Precipitation (mm)', row=1, col=1)
-        fig.update_yaxes(title_text='Precipitation (mm)', row=2, col=1)
-        return fig
+    Parameters:
+    - df (pandas.DataFrame or RainfallSeries): Input DataFrame with rainfall values and their date and time.
+    - rainfall_col (str): Name of the column containing rainfall data.
+    - interval_hours (int): Length of a period in hours. Default is 24 hours.
+    - date_column (str): Name of the column containing date and time information. Default is 'Date/Time'.
+    - standard (str): 'international' starts the first period at 00:00, 'bg' at 07:30 (Bulgarian standard).
 
-    else:
-        daily_precipitation = px.bar(df, x='Date', y=rainfall_column,
-                                     # color='Date',
-                                     labels={rainfall_column: 'Rainfall (mm)'},
-                                     hover_data={'Date': True})
+    Returns:
+    pandas.DataFrame: A new DataFrame with the start of every period in date_column and its rainfall in 'PQ (mm)'.
+    """
+    df = _as_frame(df, rainfall_col, date_column)
+    starts, sums = _interval_sums(df[date_column], df[rainfall_col].to_numpy(), pd.Timedelta(hours=interval_hours),
+                                  day_start=_day_start(standard))
+    return pd.DataFrame({date_column: starts, 'PQ (mm)': sums})
 
-        daily_precipitation.update_xaxes(
-            dtick='D1',
-            tickformat="%d-%m",
-            ticklabelmode="period")
 
-        daily_precipitation.update_layout(xaxis_title='Date', yaxis_title='Precipitation (mm)')
-        return daily_precipitation
+def _day_start(standard):
+    """
+    Return the (hour, minute) at which a meteorological day starts for the given standard.
+    """
+    if standard == 'bg':
+        return 7, 30  # Bulgarian standard
+    return 0, 0  # international standard
 
 
-def plot_rainfall_intensity(df, x_col, y_col, device, threshold=0.0001):
-    plt.figure(figsize=(10, 6))
+def _tipping_bucket_mm(values):
+    """
+    Convert tipping bucket readings to precipitation quantity in mm.
+    """
+    return values / 10 * 0.2
 
-    filtered_df = df[df[y_col] >= threshold]
 
-    plt.plot(filtered_df[x_col], filtered_df[y_col], marker='o', linestyle='', markersize=7,
-             markerfacecolor='MidnightBlue', markeredgewidth=0.1, markeredgecolor='white')
+def _interval_sums(dates, values, interval, day_start=None):
+    """
+    Sum values over consecutive intervals of equal length.
 
-    plt.xlabel('Date and time')
-    plt.ylabel('Rainfall (mm)')
-    plt.title(f'Rainfall Intensity for device: {device}')
-    plt.grid(True, color='gray', linestyle='-', linewidth=0.1)
+    The first interval starts at the earliest date, moved to the given time of day when day_start is set, and
+    intervals follow each other until the one containing the latest date. Intervals without data sum to zero.
 
-    return plt
+    Parameters:
+    - dates (pandas.Series): Date and time of every value.
+    - values (numpy.ndarray): Values to sum, aligned with dates.
+    - interval (pandas.Timedelta): Length of a single interval.
+    - day_start (tuple, optional): (hour, minute) at which the first interval starts.
+
+    Returns:
+    tuple: A DatetimeIndex with the start of every interval and an array with the interval sums.
+    """
+    dates = pd.DatetimeIndex(dates)
+    first, last = dates.min(), dates.max()
+    if pd.isna(first):
+        return dates[:0], values[:0]
+
+    start = first if day_start is None else first.replace(hour=day_start[0], minute=day_start[1])
+    starts = pd.date_range(start, periods=(last - first) // interval + 1, freq=interval)
+
+    order = np.argsort(dates.values, kind='stable')
+    sorted_dates = dates.values[order]
+    lo = np.searchsorted(sorted_dates, starts.values, side='left')
+    hi = np.searchsorted(sorted_dates, (starts + interval).values, side='left')
+    return starts, _segment_sums(values[order], lo, hi)
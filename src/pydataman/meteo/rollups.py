@@ -0,0 +1,325 @@
+import os
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+from pydataman.instrumentation import instrumented
+from .rainfall import _day_start
+from .series import _as_frame
+
+
+HOUR = 3600
+DAY = 86400
+BG_DAY_START = 3600 * _day_start('bg')[0] + 60 * _day_start('bg')[1]
+
+LEVELS = ('hourly', 'daily', 'daily_bg', 'monthly', 'yearly')
+
+
+def _bucket_keys(level, seconds):
+    """
+    Return the integer key of the bucket of every Unix time (seconds) at a level.
+    """
+    if level == 'hourly':
+        return seconds // HOUR
+    if level == 'daily':
+        return seconds // DAY
+    if level == 'daily_bg':
+        return (seconds - BG_DAY_START) // DAY
+    unit = 'M' if level == 'monthly' else 'Y'
+    return np.asarray(seconds, dtype='datetime64[s]').astype(f'datetime64[{unit}]').astype(np.int64)
+
+
+def _bucket_starts(level, keys):
+    """
+    Return the start of every bucket key at a level in Unix seconds, the inverse of _bucket_keys.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    if level == 'hourly':
+        return keys * HOUR
+    if level == 'daily':
+        return keys * DAY
+    if level == 'daily_bg':
+        return keys * DAY + BG_DAY_START
+    unit = 'M' if level == 'monthly' else 'Y'
+    return keys.astype(f'datetime64[{unit}]').astype('datetime64[s]').astype(np.int64)
+
+
+class _Level:
+    """
+    Sums and row counts of consecutive buckets, starting at the bucket key origin.
+    """
+
+    __slots__ = ('origin', 'sums', 'counts', 'length')
+
+    def __init__(self, origin=0, sums=None, counts=None):
+        self.origin = origin
+        self.sums = np.zeros(0) if sums is None else sums
+        self.counts = np.zeros(0, dtype=np.int64) if counts is None else counts
+        self.length = self.sums.size
+
+    def add(self, keys, values, counts):
+        """
+        Add values and counts to the buckets with the given sorted keys, growing the arrays when needed.
+        """
+        if keys.size == 0:
+            return
+        lo, hi = int(keys[0]), int(keys[-1]) + 1
+        if self.length == 0:
+            self.origin = lo
+        if lo < self.origin or hi - self.origin > self.sums.size:
+            # leave room to grow, so that feeding new rows costs amortized O(new buckets)
+            origin = min(lo, self.origin)
+            end = max(hi, self.origin + self.length)
+            capacity = end - origin + (end - origin) // 2 + 1
+            grown_sums, grown_counts = np.zeros(capacity), np.zeros(capacity, dtype=np.int64)
+            shift = self.origin - origin
+            grown_sums[shift:shift + self.length] = self.sums[:self.length]
+            grown_counts[shift:shift + self.length] = self.counts[:self.length]
+            self.sums, self.counts, self.origin = grown_sums, grown_counts, origin
+        self.length = max(self.length, hi - self.origin)
+        np.add.at(self.sums, keys - self.origin, values)
+        np.add.at(self.counts, keys - self.origin, counts)
+
+    def range(self, lo=None, hi=None):
+        """
+        Return the keys, sums and counts of the buckets in [lo, hi), limited to the stored ones.
+        """
+        lo = self.origin if lo is None else max(lo, self.origin)
+        hi = self.origin + self.length if hi is None else min(hi, self.origin + self.length)
+        if hi <= lo:
+            return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.int64)
+        return (np.arange(lo, hi), self.sums[lo - self.origin:hi - self.origin],
+                self.counts[lo - self.origin:hi - self.origin])
+
+    def total(self, lo, hi):
+        return float(self.range(lo, hi)[1].sum())
+
+
+class RollupStore:
+    """
+    Pre-aggregated hourly, daily, monthly and yearly precipitation of many stations.
+
+    Each station keeps the sum and the number of rows of every bucket of the levels 'hourly', 'daily' (day from
+    00:00), 'daily_bg' (day from 07:30, Bulgarian standard), 'monthly' and 'yearly' in arrays indexed by bucket.
+    Adding new raw rows only adds their values to the buckets they fall into, so an update costs O(new rows)
+    whatever the length of the history. Queries are answered from the stored buckets and totals over a time
+    range are added up from the coarsest buckets that fit inside it.
+
+    The sums differ from sum_by_period in two ways: rows with a missing value add 0 mm and are left out of the
+    row count of their bucket, where sum_by_period gives NaN for the period, and rows arriving after a newer row
+    of the same station was added are skipped, see update.
+
+    Parameters:
+    -----------
+    rainfall_col : str, optional
+        The name of the column with the rainfall of every row in mm (not the cumulative counter, see
+        subtract_next_value). Default is 'pq'.
+
+    date_column : str, optional
+        The name of the column containing datetime information. Default is 'Date/Time'.
+
+    Example:
+    --------
+     store = RollupStore()
+     store.update('M08', subtract_next_value(df, 'pq'))
+     store.query('M08', 'daily', '2024-01-01', '2024-02-01', standard='bg')
+     store.total('M08', '2024-01-15 06:00', '2024-03-02')
+    """
+
+    FILE_SUFFIX = '.npz'
+
+    def __init__(self, rainfall_col='pq', date_column='Date/Time'):
+        self.rainfall_col = rainfall_col
+        self.date_column = date_column
+        self._stations = {}
+        self._high_water = {}
+
+    def devices(self):
+        """
+        Return the IDs of the stored stations.
+        """
+        return sorted(self._stations)
+
+    @instrumented
+    def update(self, device, df):
+        """
+        Add the rows of df newer than the last row added for the device to its rollups.
+
+        Rows at or before the last added time are skipped, so the whole history returned by read_rainfall_data
+        can be passed on every call and only the new rows are counted. Late rows, older than the newest row
+        already added, are therefore never counted; rebuild the rollups of the device from a new RollupStore to
+        include them. Rows with a missing value add 0 mm and are not counted in 'Rows'.
+
+        Parameters:
+        -----------
+        device : str
+            The device ID.
+
+        df : pandas.DataFrame or RainfallSeries
+            Rainfall of every row with its date and time.
+
+        Returns:
+        --------
+        int
+            The number of added rows.
+        """
+        df = _as_frame(df, self.rainfall_col, self.date_column)
+        times = pd.DatetimeIndex(df[self.date_column])
+        if times.tz is not None:
+            times = times.tz_convert(None)
+        seconds = times.values.astype('datetime64[s]').astype(np.int64)
+        values = df[self.rainfall_col].to_numpy(dtype=np.float64)
+
+        high_water = self._high_water.get(device)
+        if high_water is not None:
+            new = seconds > high_water
+            seconds, values = seconds[new], values[new]
+        if seconds.size == 0:
+            return 0
+
+        order = np.argsort(seconds, kind='stable')
+        seconds, values = seconds[order], values[order]
+        present = (~np.isnan(values)).astype(np.int64)
+        values = np.nan_to_num(values, nan=0.0)
+
+        levels = self._stations.setdefault(device, {level: _Level() for level in LEVELS})
+        for level in LEVELS:
+            keys = _bucket_keys(level, seconds)
+            # add up the rows of every touched bucket before writing to the level
+            first = np.flatnonzero(np.diff(keys, prepend=keys[0] - 1))
+            levels[level].add(keys[first], np.add.reduceat(values, first), np.add.reduceat(present, first))
+
+        self._high_water[device] = int(seconds[-1])
+        return int(seconds.size)
+
+    def query(self, device, level, start_date=None, end_date=None, standard='international'):
+        """
+        Return the precipitation of the buckets of a level starting in [start_date, end_date).
+
+        Parameters:
+        -----------
+        device : str
+            The device ID.
+
+        level : str
+            'hourly', 'daily', 'monthly' or 'yearly'.
+
+        start_date, end_date : str or pandas.Timestamp, optional
+            Limits of the bucket starts. Default is the first and the last stored bucket.
+
+        standard : str, optional
+            Day start of 'daily', see sum_by_period. Default is 'international'.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            The start of every bucket in the date column, its rainfall in 'PQ (mm)' like sum_by_period and the
+            number of rows it holds in 'Rows'. Unlike sum_by_period, missing values count as 0 mm, a bucket
+            with 'Rows' lower than expected has gaps or missing values.
+        """
+        if level == 'daily' and standard == 'bg':
+            level = 'daily_bg'
+        if level not in LEVELS:
+            raise ValueError(f"level must be 'hourly', 'daily', 'monthly' or 'yearly', got {level!r}")
+
+        stored = self._levels(device)[level]
+        lo = None if start_date is None else int(_bucket_keys(level, _seconds(start_date) - 1)) + 1
+        hi = None if end_date is None else int(_bucket_keys(level, _seconds(end_date) - 1)) + 1
+        keys, sums, counts = stored.range(lo, hi)
+        return pd.DataFrame({self.date_column: _bucket_starts(level, keys).astype('datetime64[s]'),
+                             'PQ (mm)': sums,
+                             'Rows': counts})
+
+    def total(self, device, start_date, end_date):
+        """
+        Return the precipitation between two times, added up from the coarsest buckets inside the range.
+
+        Whole years come from the yearly level, the remaining whole months from the monthly level, and so on
+        down to hours. The limits are rounded down to whole hours.
+
+        Parameters:
+        -----------
+        device : str
+            The device ID.
+
+        start_date, end_date : str or pandas.Timestamp
+            The range [start_date, end_date).
+
+        Returns:
+        --------
+        float
+            The precipitation in mm.
+        """
+        levels = self._levels(device)
+        start = _seconds(start_date) // HOUR * HOUR
+        end = _seconds(end_date) // HOUR * HOUR
+        return _range_total(levels, ('yearly', 'monthly', 'daily', 'hourly'), start, end)
+
+    def save(self, directory):
+        """
+        Write the rollups of all stations to a directory, one .npz file per station.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for device, levels in self._stations.items():
+            arrays = {'high_water': np.int64(self._high_water[device])}
+            for level, stored in levels.items():
+                arrays[f'{level}_origin'] = np.int64(stored.origin)
+                arrays[f'{level}_sums'] = stored.sums[:stored.length]
+                arrays[f'{level}_counts'] = stored.counts[:stored.length]
+            path = os.path.join(directory, quote(str(device), safe='') + self.FILE_SUFFIX)
+            np.savez(path + '.tmp' + self.FILE_SUFFIX, **arrays)
+            os.replace(path + '.tmp' + self.FILE_SUFFIX, path)
+
+    @classmethod
+    def load(cls, directory, rainfall_col='pq', date_column='Date/Time'):
+        """
+        Read the rollups written by save.
+        """
+        store = cls(rainfall_col, date_column)
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(cls.FILE_SUFFIX) or name.endswith('.tmp' + cls.FILE_SUFFIX):
+                continue
+            device = unquote(name[:-len(cls.FILE_SUFFIX)])
+            with np.load(os.path.join(directory, name)) as arrays:
+                store._high_water[device] = int(arrays['high_water'])
+                store._stations[device] = {level: _Level(int(arrays[f'{level}_origin']), arrays[f'{level}_sums'],
+                                                         arrays[f'{level}_counts'])
+                                           for level in LEVELS}
+        return store
+
+    def _levels(self, device):
+        try:
+            return self._stations[device]
+        except KeyError:
+            raise KeyError(f'no rollups for device {device!r}') from None
+
+
+def _range_total(levels, chain, start, end):
+    """
+    Sum the buckets in [start, end) (Unix seconds on whole hours), using the first level of chain for the whole
+    buckets it has in the range and the next levels for the rest on both sides.
+    """
+    if end <= start:
+        return 0.0
+    level = chain[0]
+    lo = int(_bucket_keys(level, start - 1)) + 1
+    hi = int(_bucket_keys(level, end))
+    if len(chain) == 1 or hi <= lo:
+        if len(chain) == 1:
+            return levels[level].total(lo, hi)
+        return _range_total(levels, chain[1:], start, end)
+
+    first, last = int(_bucket_starts(level, lo)), int(_bucket_starts(level, hi))
+    return (levels[level].total(lo, hi) + _range_total(levels, chain[1:], start, first)
+            + _range_total(levels, chain[1:], last, end))
+
+
+def _seconds(date):
+    """
+    Convert a date to Unix seconds, naive dates being UTC.
+    """
+    timestamp = pd.Timestamp(date)
+    if timestamp.tz is not None:
+        timestamp = timestamp.tz_convert(None)
+    return int(timestamp.value // 10**9)
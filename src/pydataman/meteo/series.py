@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from pydataman.instrumentation import instrumented
+
+
+class RainfallSeries:
+    """
+    Compact array-backed rainfall record of one station.
+
+    The series holds only the Unix times as int64 seconds, the rainfall values as float32 (mm) or int32 (bucket
+    tips) and the device ID with its metadata, instead of a DataFrame with derived date, time and float64 columns.
+    find_rain_periods, sum_by_period, amount_precipitation and subtract_next_value accept it in place of a
+    DataFrame, and to_pandas builds a DataFrame that shares the arrays of the series.
+
+    Parameters:
+    -----------
+    times : array-like
+        Unix timestamps in seconds, in time order.
+
+    values : array-like
+        Rainfall values aligned with times.
+
+    device : str, optional
+        ID of the station, e.g. 'M08'.
+
+    metadata : dict, optional
+        Further information about the station, e.g. its row of read_metadata.
+
+    dtype : str or numpy.dtype, optional
+        Type of the stored values, 'float32' or 'int32'. Default is 'int32' for integer values and 'float32'
+        otherwise.
+
+    Example:
+    --------
+     series = RainfallSeries.from_pandas(df, 'pq', device='M08')
+     periods = find_rain_periods(subtract_next_value(series, 'pq'), 'pq')
+    """
+
+    __slots__ = ('times', 'values', 'device', 'metadata')
+
+    def __init__(self, times, values, device=None, metadata=None, dtype=None):
+        times = np.asarray(times, dtype=np.int64)
+        values = np.asarray(values)
+        if dtype is None:
+            dtype = np.int32 if values.dtype.kind in 'iub' else np.float32
+        if np.dtype(dtype) not in (np.dtype(np.float32), np.dtype(np.int32)):
+            raise ValueError(f"dtype must be 'float32' or 'int32', got {np.dtype(dtype).name!r}")
+        values = values.astype(dtype, copy=False)
+        if times.ndim != 1 or times.shape != values.shape:
+            raise ValueError(f'times and values must be 1-dimensional arrays of the same length, '
+                             f'got shapes {times.shape} and {values.shape}')
+
+        self.times = times
+        self.values = values
+        self.device = device
+        self.metadata = dict(metadata) if metadata else {}
+
+    def __len__(self):
+        return self.times.size
+
+    def __repr__(self):
+        return f'RainfallSeries(device={self.device!r}, rows={len(self)}, dtype={self.values.dtype.name})'
+
+    @property
+    def date_times(self):
+        """
+        The times as a datetime64[s] array sharing the memory of times.
+        """
+        return self.times.view('datetime64[s]')
+
+    @property
+    def nbytes(self):
+        """
+        Number of bytes taken by the time and value arrays.
+        """
+        return self.times.nbytes + self.values.nbytes
+
+    @classmethod
+    @instrumented
+    def from_pandas(cls, df, rainfall_col, time_column='unixtime', device=None, metadata=None, dtype=None):
+        """
+        Build a series from a DataFrame of one station.
+
+        The arrays of df are used without a copy when the time column holds int64 Unix seconds or datetime64[s]
+        values and the rainfall column already has the stored dtype.
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame
+            The station data, e.g. as returned by read_rainfall_data.
+
+        rainfall_col : str
+            The name of the column containing rainfall data.
+
+        time_column : str, optional
+            The name of the column with Unix timestamps or datetimes, e.g. 'Date/Time'. Default is 'unixtime'.
+
+        device, metadata, dtype : optional
+            See RainfallSeries.
+
+        Returns:
+        --------
+        RainfallSeries
+        """
+        times = df[time_column]
+        if pd.api.types.is_datetime64_any_dtype(times):
+            times = pd.DatetimeIndex(times)
+            if times.tz is not None:
+                times = times.tz_convert(None)
+            times = times.values.astype('datetime64[s]', copy=False).view(np.int64)
+        return cls(times.to_numpy() if isinstance(times, pd.Series) else times, df[rainfall_col].to_numpy(),
+                   device, metadata, dtype)
+
+    @instrumented
+    def to_pandas(self, rainfall_col='pq', date_column='Date/Time', time_column='unixtime'):
+        """
+        Return the series as a DataFrame sharing the arrays of the series.
+
+        Parameters:
+        -----------
+        rainfall_col : str, optional
+            The name of the rainfall column. Default is 'pq'.
+
+        date_column : str, optional
+            The name of the datetime64[s] column, None to leave it out. Default is 'Date/Time'.
+
+        time_column : str, optional
+            The name of the Unix timestamp column, None to leave it out. Default is 'unixtime'.
+
+        Returns:
+        --------
+        pandas.DataFrame
+        """
+        columns = {}
+        if time_column is not None:
+            columns[time_column] = self.times
+        if date_column is not None:
+            columns[date_column] = self.date_times
+        columns[rainfall_col] = self.values
+        return pd.DataFrame(columns, copy=False)
+
+    def with_values(self, values):
+        """
+        Return a series with the times, device and metadata of this one and new values.
+        """
+        return type(self)(self.times, values, self.device, self.metadata, self.values.dtype)
+
+
+def _as_frame(data, rainfall_col, date_column='Date/Time'):
+    """
+    Return data as a DataFrame with the given column names if it is a RainfallSeries, otherwise data itself.
+    """
+    if isinstance(data, RainfallSeries):
+        return data.to_pandas(rainfall_col, date_column, time_column=None)
+    return data
@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+
+from pydataman.instrumentation import instrumented
+from .rainfall import _rain_event_bounds, _segment_sums
+
+
+EVENT_COLUMNS = ['Event', 'Start_Time', 'Stop_Time', 'Duration_(min)', 'Amount_Rainfall_(mm)']
+
+
+class RainEventDetector:
+    """
+    Incremental rain-event detection for live station feeds.
+
+    The detector applies the threshold/stop_window rules of find_rain_periods to records fed in batches and
+    keeps only the state needed to continue: the last row, the start of the open event, its running rainfall
+    sum and its count of unchanged steps. A batch costs O(rows in the batch) and feeding the rows of a
+    DataFrame in any chunking gives the events find_rain_periods finds on the whole DataFrame (the event still
+    open at the end is closed by flush).
+
+    Parameters:
+    -----------
+    rainfall_col : str
+        The name of the column containing rainfall data.
+
+    threshold : float, optional
+        The threshold value to consider as rainfall. Default is 0.01.
+
+    stop_window : int, optional
+        Number of unchanged rows that ends a rainfall period. Default is 10.
+
+    date_column : str, optional
+        The name of the column containing datetime information. Default is 'Date/Time'.
+
+    cumulative : bool, optional
+        If True, the column holds the raw cumulative counter and is differenced like subtract_next_value before
+        the detection. Default is False.
+
+    Example:
+    --------
+     detector = RainEventDetector('pq', cumulative=True)
+     for batch in new_records():
+         events = detector.update(batch)
+         save_state(detector.get_state())
+    """
+
+    def __init__(self, rainfall_col, threshold=0.01, stop_window=10, date_column='Date/Time', cumulative=False):
+        self.rainfall_col = rainfall_col
+        self.threshold = threshold
+        self.stop_window = stop_window
+        self.date_column = date_column
+        self.cumulative = cumulative
+
+        self.last_time = None
+        self.last_value = None
+        self.last_raw = None
+        self.start_time = None
+        self.amount = 0.0
+        self.zeros = 0
+
+    @instrumented
+    def update(self, df):
+        """
+        Feed the next rows, in time order, and return the events they open, update or close.
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame
+            The new rows.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            One row per event change with the columns 'Event' ('opened', 'updated' or 'closed'), 'Start_Time',
+            'Stop_Time', 'Duration_(min)' and 'Amount_Rainfall_(mm)'. The stop time and amount of an open event
+            are those of the last row seen.
+        """
+        if df.empty:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+
+        times = pd.DatetimeIndex(df[self.date_column])
+        values = df[self.rainfall_col].to_numpy(dtype=float)
+        if self.cumulative:
+            previous = values[0] if self.last_raw is None else self.last_raw
+            self.last_raw = values[-1]
+            values = np.abs(np.diff(values, prepend=previous))
+            if self.last_time is None:
+                values[0] = 0
+
+        if self.last_time is not None:
+            times = times.insert(0, self.last_time)
+            values = np.r_[self.last_value, values]
+        open_zeros = self.zeros if self.start_time is not None else None
+        starts, stops, open_start, open_count = _rain_event_bounds(values, self.threshold, self.stop_window,
+                                                                   open_zeros)
+
+        # an event open before the batch already holds the rainfall up to the previous last row, the first row
+        rainfall = np.nan_to_num(values, nan=0.0)
+        if open_start is not None:
+            starts = np.append(starts, open_start)
+            stops = np.append(stops, len(values) - 1)
+        carried = starts == -1
+        amounts = _segment_sums(rainfall, np.where(carried, 1, starts), stops + 1) + np.where(carried, self.amount, 0)
+
+        events = []
+        for i, (start, stop, amount) in enumerate(zip(starts, stops, amounts)):
+            start_time = self.start_time if start == -1 else times[start]
+            still_open = open_start is not None and i == len(starts) - 1
+            if start != -1:
+                events.append(self._event('opened', start_time, times[stop], amount))
+            if not still_open:
+                events.append(self._event('closed', start_time, times[stop], amount))
+            elif start == -1:
+                events.append(self._event('updated', start_time, times[stop], amount))
+
+        if open_start is None:
+            self.start_time, self.amount, self.zeros = None, 0.0, 0
+        else:
+            self.start_time = self.start_time if open_start == -1 else times[open_start]
+            self.amount, self.zeros = float(amounts[-1]), open_count
+        self.last_time = times[-1]
+        self.last_value = values[-1]
+
+        return pd.DataFrame(events, columns=EVENT_COLUMNS)
+
+    @instrumented
+    def flush(self):
+        """
+        Close the open event on the last row seen, as find_rain_periods does at the end of the data.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            The closed event, in the format of update, or an empty DataFrame if no event is open.
+        """
+        events = []
+        if self.start_time is not None:
+            events.append(self._event('closed', self.start_time, self.last_time, self.amount))
+            self.start_time, self.amount, self.zeros = None, 0.0, 0
+        return pd.DataFrame(events, columns=EVENT_COLUMNS)
+
+    def get_state(self):
+        """
+        Return the state of the detector as a JSON-serializable dict.
+        """
+        return {'rainfall_col': self.rainfall_col,
+                'threshold': self.threshold,
+                'stop_window': self.stop_window,
+                'date_column': self.date_column,
+                'cumulative': self.cumulative,
+                'last_time': _isoformat(self.last_time),
+                'last_value': None if self.last_value is None else float(self.last_value),
+                'last_raw': None if self.last_raw is None else float(self.last_raw),
+                'start_time': _isoformat(self.start_time),
+                'amount': self.amount,
+                'zeros': self.zeros}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Restore a detector from the dict returned by get_state.
+        """
+        detector = cls(state['rainfall_col'], state['threshold'], state['stop_window'], state['date_column'],
+                       state['cumulative'])
+        detector.last_time = None if state['last_time'] is None else pd.Timestamp(state['last_time'])
+        detector.last_value = state['last_value']
+        detector.last_raw = state['last_raw']
+        detector.start_time = None if state['start_time'] is None else pd.Timestamp(state['start_time'])
+        detector.amount = state['amount']
+        detector.zeros = state['zeros']
+        return detector
+
+    @staticmethod
+    def _event(kind, start_time, stop_time, amount):
+        return {'Event': kind,
+                'Start_Time': start_time,
+                'Stop_Time': stop_time,
+                'Duration_(min)': (stop_time - start_time).total_seconds() / 60,
+                'Amount_Rainfall_(mm)': float(amount)}
+
+
+def _isoformat(timestamp):
+    return None if timestamp is None else timestamp.isoformat()
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_rainfall(rows=10_000, seed=0, start='2023-01-01', dry_minutes=2880, storm_minutes=240,
+                       storm_intensity=0.3, gaps=0.001, gap_minutes=60, resets=2, bucket_mm=0.2):
+    """
+    Generate a deterministic 1-minute series of a cumulative tipping bucket rain gauge.
+
+    Dry spells and storms alternate with geometrically distributed lengths. Every storm gets its own mean
+    number of bucket tips per minute and the tips of every minute are Poisson distributed around it. The rows
+    contain gaps of missing minutes and the counter is reset to zero a few times, like the raw data-rain.php
+    feeds of meter.ac. The same arguments always give the same series.
+
+    Parameters:
+    -----------
+    rows : int, optional
+        Number of rows. Default is 10000.
+
+    seed : int, optional
+        Seed of the random generator. Default is 0.
+
+    start : str, optional
+        Date and time (UTC) of the first row. Default is '2023-01-01'.
+
+    dry_minutes : float, optional
+        Mean length of a dry spell in minutes. Default is 2880 (two days).
+
+    storm_minutes : float, optional
+        Mean length of a storm in minutes. Default is 240.
+
+    storm_intensity : float, optional
+        Mean number of bucket tips per minute during storms. Default is 0.3.
+
+    gaps : float, optional
+        Probability that a row is followed by a gap. Default is 0.001.
+
+    gap_minutes : float, optional
+        Mean length of a gap in minutes. Default is 60.
+
+    resets : int, optional
+        Number of counter resets. Default is 2.
+
+    bucket_mm : float, optional
+        Rainfall of one bucket tip in mm. Default is 0.2.
+
+    Returns:
+    --------
+    pandas.DataFrame
+        A DataFrame with the columns 'UnixTime' (int64 seconds) and 'PQ' (cumulative rainfall in mm).
+
+    Example:
+    --------
+     df = synthetic_rainfall(1_000_000, seed=8)
+     convert_unix_time(df, 'UnixTime')
+    """
+    rng = np.random.default_rng(seed)
+
+    # alternate dry spells and storms until all rows are covered
+    lengths, intensity = [], []
+    covered = 0
+    while not lengths or covered < rows:
+        spells = int(rows / (dry_minutes + storm_minutes)) + 1
+        lengths.append(np.column_stack([rng.geometric(1 / dry_minutes, size=spells),
+                                        rng.geometric(1 / storm_minutes, size=spells)]).ravel())
+        intensity.append(np.column_stack([np.zeros(spells),
+                                          rng.gamma(2.0, storm_intensity / 2, size=spells)]).ravel())
+        covered += lengths[-1].sum()
+    tips = rng.poisson(np.repeat(np.concatenate(intensity), np.concatenate(lengths))[:rows])
+
+    counter = np.cumsum(tips)
+    if resets and rows > 1:
+        reset_rows = np.sort(rng.choice(rows - 1, size=min(resets, rows - 1), replace=False)) + 1
+        segment = np.searchsorted(reset_rows, np.arange(rows), side='right')
+        offsets = np.concatenate([[0], counter[reset_rows - 1]])
+        counter = counter - offsets[segment]
+
+    step = np.ones(rows, dtype=np.int64)
+    gap_rows = rng.random(rows) < gaps
+    step[gap_rows] += rng.geometric(1 / gap_minutes, size=gap_rows.sum())
+    minutes = np.concatenate([[0], np.cumsum(step[:-1])]) if rows else step[:0]
+
+    unixtime = pd.Timestamp(start).value // 10**9 + 60 * minutes
+    return pd.DataFrame({'UnixTime': unixtime, 'PQ': np.round(counter * bucket_mm, 1)})
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from pydataman.instrumentation import instrumented
+
+
+@instrumented
+def clean_rainfall(df, rainfall_col='pq', time_column='unixtime', cumulative=True, gap_minutes=10, keep='last',
+                   grid_minutes=None, reset_below=1.0):
+    """
+    Sort, deduplicate and check station data and correct the resets of a cumulative rain counter.
+
+    All steps work on the NumPy arrays of the time and rainfall columns in linear passes. The rows are only
+    sorted when they are out of order.
+
+    Parameters:
+    - df (pandas.DataFrame): Raw station data, e.g. as returned by read_rainfall_data.
+    - rainfall_col (str): Name of the column containing rainfall data. Default is 'pq'.
+    - time_column (str): Name of the column with Unix timestamps in seconds or datetimes, time zone aware ones are
+      taken in UTC. Default is 'unixtime'.
+    - cumulative (bool): If True, rainfall_col is a counter that only grows until it is reset to zero. After a
+      reset the counter is continued from the value before it, so that subtract_next_value gives the reading
+      after the reset, the rain counted since it, for the step of the reset. After any other decrease the
+      counter is continued from the value before it as well, so that the step adds no rainfall instead of the
+      size of the decrease. Default is True.
+    - gap_minutes (float): Time steps longer than this are reported as gaps. Default is 10.
+    - keep (str): Which row of a duplicated timestamp to keep, 'first' or 'last'. Default is 'last'.
+    - grid_minutes (int, optional): If set, place the rows on a regular grid with this step, from the first
+      timestamp rounded down to the step to the last one. Timestamps are rounded down to the grid and grid points
+      without a row get missing values. Default is None.
+    - reset_below (float): A decrease to a reading at or below this is reported as a reset of the counter, a
+      smaller one as a dip of the sensor. Default is 1.0.
+
+    Returns:
+    tuple: The cleaned DataFrame with a new RangeIndex and a report dict with the number of input rows ('rows'),
+           whether they had to be sorted ('sorted'), the number of dropped duplicates ('duplicates'), the times
+           of the counter resets ('resets') and of the other decreases ('dips') and the gaps as a DataFrame with
+           the columns 'Start', 'Stop' and 'Minutes' ('gaps').
+
+    Example:
+     df, report = clean_rainfall(read_rainfall_data('M08'), grid_minutes=1)
+     report['gaps']
+     convert_unix_time(df, 'unixtime')
+    """
+    if keep not in ('first', 'last'):
+        raise ValueError(f"keep must be 'first' or 'last', got {keep!r}")
+
+    times = df[time_column]
+    if isinstance(times.dtype, pd.DatetimeTZDtype):
+        times = times.dt.tz_convert(None)
+    times = times.to_numpy()
+    datetimes = times.dtype.kind == 'M'
+    ticks = times.view(np.int64) if datetimes else times.astype(np.int64, copy=False)
+    second = int(np.timedelta64(1, 's') / np.timedelta64(1, np.datetime_data(times.dtype)[0])) if datetimes else 1
+    report = {'rows': len(df), 'sorted': False, 'duplicates': 0}
+
+    # sort only when the rows are out of order
+    positions = np.arange(len(ticks))
+    if np.any(ticks[1:] < ticks[:-1]):
+        positions = np.argsort(ticks, kind='stable')
+        ticks = ticks[positions]
+        report['sorted'] = True
+
+    # drop repeated timestamps, keeping the first or the last of every run
+    if keep == 'last':
+        unique = np.append(ticks[1:] != ticks[:-1], True) if len(ticks) else np.ones(0, dtype=bool)
+    else:
+        unique = np.insert(ticks[1:] != ticks[:-1], 0, True) if len(ticks) else np.ones(0, dtype=bool)
+    report['duplicates'] = int(len(ticks) - unique.sum())
+    positions, ticks = positions[unique], ticks[unique]
+
+    steps = np.diff(ticks)
+    gaps = np.flatnonzero(steps > gap_minutes * 60 * second)
+    report['gaps'] = pd.DataFrame({'Start': _as_times(ticks[gaps], times.dtype),
+                                   'Stop': _as_times(ticks[gaps + 1], times.dtype),
+                                   'Minutes': steps[gaps] / (60 * second)})
+
+    cleaned = df.iloc[positions].reset_index(drop=True)
+    report['resets'] = report['dips'] = _as_times(np.empty(0, dtype=np.int64), times.dtype)
+    if cumulative and len(cleaned):
+        values = cleaned[rainfall_col].to_numpy(dtype=float)
+        corrected, drops, reset = _continue_counter(values, reset_below)
+        cleaned[rainfall_col] = corrected
+        report['resets'] = _as_times(ticks[drops[reset]], times.dtype)
+        report['dips'] = _as_times(ticks[drops[~reset]], times.dtype)
+
+    if grid_minutes is not None and len(cleaned):
+        step = int(grid_minutes * 60 * second)
+        slots = (ticks - ticks[0] // step * step) // step
+        # rows rounded down to the same grid point are duplicates as well
+        last_of_slot = np.append(slots[1:] != slots[:-1], True) if keep == 'last' \
+            else np.insert(slots[1:] != slots[:-1], 0, True)
+        report['duplicates'] += int(len(slots) - last_of_slot.sum())
+        cleaned = cleaned[last_of_slot].set_index(slots[last_of_slot]).reindex(np.arange(slots[-1] + 1))
+        cleaned[time_column] = _as_times(ticks[0] // step * step + np.arange(len(cleaned)) * step, times.dtype)
+        cleaned = cleaned.reset_index(drop=True)
+
+    return cleaned, report
+
+
+def _continue_counter(values, reset_below):
+    """
+    Remove the decreases of a cumulative counter. A decrease to a reading at or below reset_below is a reset:
+    the counter restarted from zero, so the reading after it is added to the last value before it. After any
+    other decrease the counter is continued from the last value before it, so the step adds nothing. Missing
+    values are left missing and skipped in the comparison.
+
+    Returns the corrected values, the positions of the decreases and a mask of the resets among them.
+    """
+    valid = np.flatnonzero(~np.isnan(values))
+    readings = values[valid]
+    drops = np.flatnonzero(readings[1:] < readings[:-1]) + 1
+    reset = readings[drops] <= reset_below
+    offsets = np.zeros(len(readings))
+    offsets[drops] = np.where(reset, readings[drops - 1], readings[drops - 1] - readings[drops])
+    corrected = values.copy()
+    corrected[valid] = readings + np.cumsum(offsets)
+    return corrected, valid[drops], reset
+
+
+def _as_times(ticks, dtype):
+    """
+    Return integer ticks in the type of the time column: datetimes of dtype or int64 Unix seconds.
+    """
+    ticks = np.asarray(ticks, dtype=np.int64)
+    return ticks.view(dtype) if dtype.kind == 'M' else ticks
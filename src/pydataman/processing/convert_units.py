@@ -1,34 +1,70 @@
 import pandas as pd
 
+from pydataman.instrumentation import instrumented
 
-def convert_unix_time(df, unixtime_column):
+
+@instrumented
+def convert_unix_time(df, unixtime_column, inplace=True, lowercase=True, derived=('Date', 'Time'),
+                      time_format='timedelta', tz=None):
     """
     Convert Unix timestamp to human-readable date and time in a pandas DataFrame.
 
     Parameters:
     - df (pd.DataFrame): The pandas DataFrame containing the Unix timestamp column.
     - unixtime_column (str): The name of the column containing Unix timestamps.
+    - inplace (bool): If True, modify df and return None, otherwise return a new DataFrame and leave df as it is.
+      The new DataFrame shares the data of the existing columns with df. Default is True.
+    - lowercase (bool): If True, lowercase the names of the existing columns. Default is True.
+    - derived (iterable): Which of the 'Date' and 'Time' columns to add. Both can be derived later from
+      'Date/Time' with its dt accessor, so pass () to skip them. Default is ('Date', 'Time').
+    - time_format (str): How 'Time' is stored: 'timedelta' (time since midnight), 'seconds' (int32 seconds since
+      midnight) or 'object' (datetime.time values, slow and large). Default is 'timedelta'.
+    - tz (str, optional): Time zone to convert to, e.g. 'Europe/Sofia'. Default is naive UTC.
 
     Returns:
-    None
+    None if inplace is True, otherwise the converted DataFrame.
 
-    Modifies the input DataFrame by adding three new columns:
+    Adds the following columns:
     - 'Date/Time': Contains the converted datetime values from the Unix timestamps.
-    - 'Date': Contains the date part extracted from 'Date/Time'.
-    - 'Time': Contains the time part extracted from 'Date/Time'.
+    - 'Date': Contains the date part of 'Date/Time' as a datetime at midnight.
+    - 'Time': Contains the time part of 'Date/Time' in the format chosen by time_format.
 
     Example:
      df = pd.DataFrame({'unix_timestamp': [1637088000, 1637091600, 1637095200]})
      convert_unix_time(df, 'unix_timestamp')
      print(df[['Date/Time', 'Date', 'Time']])
-              Date/Time        Date      Time
-    0 2021-11-16 00:00:00  2021-11-16  00:00:00
-    1 2021-11-16 01:00:00  2021-11-16  01:00:00
-    2 2021-11-16 02:00:00  2021-11-16  02:00:00
+              Date/Time       Date            Time
+    0 2021-11-16 18:40:00 2021-11-16 0 days 18:40:00
+    1 2021-11-16 19:40:00 2021-11-16 0 days 19:40:00
+    2 2021-11-16 20:40:00 2021-11-16 0 days 20:40:00
     """
-    df.columns = df.columns.str.lower()
-    df['Date/Time'] = pd.to_datetime(df[unixtime_column.lower()], unit='s')
-    df['Date'] = [d.date() for d in df['Date/Time']]
-    df['Date'] = pd.to_datetime(df['Date'])
+    if time_format not in ('timedelta', 'seconds', 'object'):
+        raise ValueError(f"time_format must be 'timedelta', 'seconds' or 'object', got {time_format!r}")
+
+    if not inplace:
+        df = df.copy(deep=False)
+
+    if lowercase:
+        df.columns = df.columns.str.lower()
+        unixtime_column = unixtime_column.lower()
+
+    if tz is None:
+        date_time = pd.to_datetime(df[unixtime_column], unit='s')
+    else:
+        date_time = pd.to_datetime(df[unixtime_column], unit='s', utc=True).dt.tz_convert(tz)
+    df['Date/Time'] = date_time
+
+    if 'Date' in derived or 'Time' in derived:
+        date = date_time.dt.normalize()
+        if 'Date' in derived:
+            df['Date'] = date
+        if 'Time' in derived:
+            if time_format == 'object':
+                df['Time'] = date_time.dt.time
+            elif time_format == 'seconds':
+                df['Time'] = ((date_time - date) // pd.Timedelta(seconds=1)).astype('int32')
+            else:
+                df['Time'] = date_time - date
 
-    df['Time'] = [d.time() for d in df['Date/Time']]
+    if not inplace:
+        return df
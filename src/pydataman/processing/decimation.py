@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from pydataman.instrumentation import instrumented
+
+
+@instrumented
+def decimate(x, y, max_points, method='minmax'):
+    """
+    Select at most max_points points of a series for plotting, keeping its peaks.
+
+    Parameters:
+    - x (array-like): Sorted x values, numbers or datetimes, time zone aware ones included.
+    - y (array-like): Values aligned with x. Points with a missing value are never selected.
+    - max_points (int): Maximal number of selected points, about twice the width of the plot in pixels gives a
+      picture that cannot be told apart from the full series.
+    - method (str): 'minmax' keeps the lowest and the highest point of max_points // 2 buckets of equal width on
+      the x axis, 'lttb' keeps the point of max_points equally filled buckets that spans the largest triangle
+      with its neighbours (Largest-Triangle-Three-Buckets). Default is 'minmax'.
+
+    Returns:
+    numpy.ndarray: Sorted positions of the selected points.
+
+    Example:
+     keep = decimate(df['Date/Time'], df['pq'], 2000)
+     df.iloc[keep]
+    """
+    if isinstance(getattr(x, 'dtype', None), pd.DatetimeTZDtype):
+        # time zone aware datetimes would become an object array, their UTC instants keep the order
+        x = pd.DatetimeIndex(x).tz_convert(None)
+    x = np.asarray(x)
+    if x.dtype.kind in 'mM':
+        x = x.view(np.int64)
+    x = x.astype(np.float64, copy=False)
+    y = np.asarray(y, dtype=np.float64)
+
+    valid = np.flatnonzero(~np.isnan(y))
+    if method == 'minmax':
+        selected = minmax_indices(x[valid], y[valid], max(int(max_points) // 2, 1))
+    elif method == 'lttb':
+        selected = lttb_indices(x[valid], y[valid], int(max_points))
+    else:
+        raise ValueError(f"method must be 'minmax' or 'lttb', got {method!r}")
+    return valid[selected]
+
+
+def minmax_indices(x, y, buckets):
+    """
+    Return the positions of the lowest and the highest y in every one of buckets equally wide x intervals.
+
+    Parameters:
+    - x (numpy.ndarray): Sorted x values as floats.
+    - y (numpy.ndarray): Values aligned with x, without NaN.
+    - buckets (int): Number of intervals between the smallest and the largest x.
+
+    Returns:
+    numpy.ndarray: Sorted positions, at most two per bucket.
+    """
+    if x.size <= 2 * buckets:
+        return np.arange(x.size)
+
+    edges = np.linspace(x[0], x[-1], buckets + 1)
+    bucket = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, buckets - 1)
+
+    # sort by value inside every bucket, so the first and the last position of a bucket are its extremes
+    order = np.lexsort((y, bucket))
+    bounds = np.flatnonzero(np.diff(bucket[order], prepend=-1, append=buckets))
+    return np.unique(np.r_[order[bounds[:-1]], order[bounds[1:] - 1]])
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Return the positions selected by the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and the last points are always kept. The points between them are split into n_out - 2 buckets of
+    equal count and of every bucket the point is kept that forms the largest triangle with the point kept in the
+    previous bucket and the mean of the next bucket.
+
+    Parameters:
+    - x (numpy.ndarray): Sorted x values as floats.
+    - y (numpy.ndarray): Values aligned with x, without NaN.
+    - n_out (int): Number of points to keep.
+
+    Returns:
+    numpy.ndarray: Sorted positions of n_out points.
+    """
+    n = x.size
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    edges = np.append(edges, n)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_x = x[hi:edges[i + 2]].mean()
+        next_y = y[hi:edges[i + 2]].mean()
+        area = np.abs((x[previous] - next_x) * (y[lo:hi] - y[previous])
+                      - (x[previous] - x[lo:hi]) * (next_y - y[previous]))
+        previous = lo + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
@@ -1,12 +1,19 @@
 import pandas as pd
 from datetime import datetime, timedelta
 
+from pydataman.instrumentation import instrumented
 
+
+@instrumented
 def filter_df_by_date_range(df, start_date=None, end_date=None, last_year=False, last_month=False,
                             date_column='Date/Time'):
     """
     Filter DataFrame based on the specified date range.
 
+    If df has a sorted DatetimeIndex (see index_by_date) the window is found with a binary search on it, which
+    makes repeated queries on the same DataFrame almost free. If the date column is sorted, it is searched in the
+    same way, otherwise it is scanned. df itself is never modified.
+
     Parameters:
     - df: pandas DataFrame
     - start_date: str, start date in 'YYYY-MM-DD' format (optional)
@@ -16,29 +23,81 @@ def filter_df_by_date_range(df, start_date=None, end_date=None, last_year=False,
     - date_column: str, the name of the date column in the DataFrame
 
     Returns:
-    - pandas DataFrame, filtered based on the specified date range
+    - pandas DataFrame, filtered based on the specified date range. When the window is found with a binary
+      search, the result shares its data with df. A DataFrame indexed by date keeps its index, otherwise the
+      index is reset.
     """
+    bounds = date_range_bounds(start_date, end_date, last_year, last_month)
+    if bounds is None:
+        return df
 
-    filtered_df = pd.DataFrame()
+    if isinstance(df.index, pd.DatetimeIndex) and df.index.is_monotonic_increasing:
+        start, stop = _localize(bounds, df.index.tz)
+        filtered_df = df.iloc[df.index.searchsorted(start):df.index.searchsorted(stop)].copy(deep=False)
+        return filtered_df
+
+    dates = df[date_column]
+    start, stop = _localize(bounds, dates.dt.tz)
+    if dates.is_monotonic_increasing:
+        filtered_df = df.iloc[dates.searchsorted(start):dates.searchsorted(stop)].copy(deep=False)
+    else:
+        filtered_df = df[(dates >= start) & (dates < stop)].copy(deep=False)
+    filtered_df.index = pd.RangeIndex(len(filtered_df))
+    return filtered_df
+
+
+@instrumented
+def index_by_date(df, date_column='Date/Time'):
+    """
+    Index a DataFrame by its date column, sorted in time, so that filter_df_by_date_range can binary search it.
+
+    The date column is kept, so the result can still be passed to functions that read it.
+
+    Parameters:
+    - df: pandas DataFrame
+    - date_column: str, the name of the date column in the DataFrame
+
+    Returns:
+    - pandas DataFrame with a sorted DatetimeIndex
+    """
+    indexed_df = df.set_index(pd.DatetimeIndex(df[date_column]).rename(None))
+    if not indexed_df.index.is_monotonic_increasing:
+        indexed_df = indexed_df.sort_index(kind='stable')
+    return indexed_df
 
+
+def _localize(bounds, tz):
+    """
+    Give naive window bounds the time zone of the dates they are compared with.
+    """
+    if tz is None:
+        return bounds
+    return tuple(bound.tz_localize(tz) for bound in bounds)
+
+
+def date_range_bounds(start_date=None, end_date=None, last_year=False, last_month=False):
+    """
+    Translate the arguments of filter_df_by_date_range into a half-open time window.
+
+    Parameters:
+    - start_date: str, start date in 'YYYY-MM-DD' format (optional)
+    - end_date: str, end date in 'YYYY-MM-DD' format (optional)
+    - last_year: bool, if True, the window is the last calendar year
+    - last_month: bool, if True, the window is the last calendar month
+
+    Returns:
+    - tuple of two pandas Timestamps (start, stop) with start <= time < stop, or None if no window is requested
+    """
     if start_date and end_date:
-        df['Date'] = [d.date() for d in df[date_column]]
-        df['Date'] = pd.to_datetime(df['Date'])
-        filtered_df = df[(df['Date'] >= start_date) & (df['Date'] <= end_date)]
+        return pd.Timestamp(start_date).ceil('D'), pd.Timestamp(end_date).floor('D') + pd.Timedelta(days=1)
 
-    elif last_year:
-        current_year = datetime.now().year
-        filtered_df = df[df[date_column].dt.year == current_year - 1]
+    current_date = datetime.now()
+    if last_year:
+        return pd.Timestamp(current_date.year - 1, 1, 1), pd.Timestamp(current_date.year, 1, 1)
 
-    elif last_month:
-        current_date = datetime.now()
+    if last_month:
         last_month_date = current_date - timedelta(days=current_date.day)
-        filtered_df = df[
-            (df[date_column].dt.year == last_month_date.year) &
-            (df[date_column].dt.month == last_month_date.month)
-            ]
+        return (pd.Timestamp(last_month_date.year, last_month_date.month, 1),
+                pd.Timestamp(current_date.year, current_date.month, 1))
 
-    else:
-        return df
-    filtered_df.reset_index(drop=True, inplace=True)
-    return filtered_df
+    return None
@@ -0,0 +1,292 @@
+import copy
+import datetime
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# arguments fingerprinted by their repr
+VALUE_TYPES = (type(None), bool, int, float, complex, str, bytes, np.generic, np.dtype, datetime.date, datetime.time,
+               datetime.timedelta, type(pd.NaT))
+
+
+class ResultCache:
+    """
+    Opt-in memoization of derived results, keyed by the content of the inputs.
+
+    The key of a call is a SHA-256 fingerprint of the function, the bytes of every DataFrame, Series or array
+    argument and the other parameters. Changed station data therefore gives a new key and never returns a stale
+    result, the entries of old data are evicted by age. Results are kept in memory in least recently used order
+    within a byte budget and, optionally, in a directory on disk that survives restarts.
+
+    Every result is returned as a deep copy, so callers may change it in place without changing the stored one.
+    Arguments other than pandas and numpy objects, RainfallSeries, containers of them and plain values (numbers,
+    strings, dates, None) cannot be fingerprinted by content and raise TypeError.
+
+    Parameters:
+    -----------
+    max_bytes : int, optional
+        Memory budget of the stored results. Default is 256 MiB.
+
+    disk_dir : str, optional
+        Directory of the disk tier, None keeps the results in memory only. Default is None.
+
+    disk_max_bytes : int, optional
+        Size limit of the disk tier, None for no limit. Default is 2 GiB.
+
+    Example:
+    --------
+     cache = ResultCache(max_bytes=512 * 2**20)
+     find_rain_periods = cache.wrap(rainfall.find_rain_periods)
+     sum_by_period = cache.wrap(rainfall.sum_by_period)
+     periods = find_rain_periods(df, 'pq')
+     cache.stats()
+    """
+
+    def __init__(self, max_bytes=256 * 2**20, disk_dir=None, disk_max_bytes=2 * 2**30):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+
+    def __call__(self, func, *args, **kwargs):
+        """
+        Return func(*args, **kwargs), computed once per distinct input.
+
+        Calls modifying their input in place (inplace=True, the default of convert_unix_time) are passed through
+        without caching.
+
+        Raises:
+        -------
+        TypeError
+            If an argument cannot be fingerprinted by content.
+        """
+        arguments = _arguments(func, args, kwargs)
+        if arguments.get('inplace', False) is True:
+            return func(*args, **kwargs)
+
+        key = self.key(func, args, kwargs)
+        found, value = self.get(key)
+        if not found:
+            value = func(*args, **kwargs)
+            # the cache keeps a copy, the caller gets the computed result
+            self.put(key, value)
+        return value
+
+    def wrap(self, func):
+        """
+        Return a version of func whose results are cached.
+        """
+        @functools.wraps(func)
+        def cached(*args, **kwargs):
+            return self(func, *args, **kwargs)
+
+        cached.cache = self
+        return cached
+
+    @staticmethod
+    def key(func, args=(), kwargs=None):
+        """
+        Return the hex fingerprint of a call. Arguments are matched to the signature of func with its defaults,
+        so passing a default value or leaving it out gives the same key.
+        """
+        hasher = hashlib.sha256()
+        hasher.update(f'{func.__module__}.{func.__qualname__}'.encode('utf-8'))
+        _feed(hasher, _arguments(func, args, kwargs or {}))
+        return hasher.hexdigest()
+
+    def get(self, key):
+        """
+        Return (True, a copy of the result) for a stored key, otherwise (False, None).
+        """
+        with self._lock:
+            found = key in self._entries
+            if found:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                value = self._entries[key][0]
+        if found:
+            return True, copy.deepcopy(value)
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self._counters['misses'] += 1
+                return False, None
+            self._counters['disk_hits'] += 1
+        self._remember(key, value[0])
+        return True, copy.deepcopy(value[0])
+
+    def put(self, key, value):
+        """
+        Store a copy of a result in memory and, if there is a disk tier, on disk.
+        """
+        self._remember(key, copy.deepcopy(value))
+        self._write_disk(key, value)
+
+    def stats(self):
+        """
+        Return the counters of hits (memory), disk hits, misses and evictions with the number of stored entries
+        and their size in bytes.
+        """
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes)
+
+    def clear(self):
+        """
+        Remove all stored results, in memory and on disk.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk_dir is not None and os.path.isdir(self.disk_dir):
+            for name in os.listdir(self.disk_dir):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.disk_dir, name))
+
+    def _remember(self, key, value):
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._counters['evictions'] += 1
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        path = os.path.join(self.disk_dir, key + '.pkl')
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+            return (value,)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _write_disk(self, key, value):
+        if self.disk_dir is None:
+            return
+        os.makedirs(self.disk_dir, exist_ok=True)
+        path = os.path.join(self.disk_dir, key + '.pkl')
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+        if self.disk_max_bytes is not None:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        files = [os.path.join(self.disk_dir, name) for name in os.listdir(self.disk_dir) if name.endswith('.pkl')]
+        files = sorted((os.stat(path).st_mtime, os.path.getsize(path), path) for path in files)
+        size = sum(file_size for _, file_size, _ in files)
+        for _, file_size, path in files:
+            if size <= self.disk_max_bytes:
+                break
+            os.remove(path)
+            size -= file_size
+            with self._lock:
+                self._counters['evictions'] += 1
+
+
+def fingerprint(*args, **kwargs):
+    """
+    Return a hex fingerprint of the content of the arguments, see ResultCache.
+    """
+    hasher = hashlib.sha256()
+    _feed(hasher, args)
+    _feed(hasher, dict(sorted(kwargs.items())))
+    return hasher.hexdigest()
+
+
+def _feed(hasher, obj):
+    """
+    Add the type and content of obj to a hasher.
+    """
+    hasher.update(type(obj).__name__.encode('utf-8'))
+    if isinstance(obj, pd.DataFrame):
+        _feed(hasher, obj.index)
+        for column in obj.columns:
+            _feed(hasher, column)
+            _feed(hasher, obj[column])
+    elif isinstance(obj, (pd.Series, pd.Index)):
+        hasher.update(str(obj.dtype).encode('utf-8'))
+        values = obj.to_numpy()
+        if values.dtype.kind in 'biufcmM':
+            _feed_array(hasher, values)
+        else:
+            _feed_array(hasher, pd.util.hash_pandas_object(obj, index=False).to_numpy())
+    elif isinstance(obj, np.ndarray):
+        if obj.dtype.kind in 'biufcmM':
+            _feed_array(hasher, obj)
+        else:
+            _feed(hasher, pd.Series(obj.ravel()))
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(str(len(obj)).encode('utf-8'))
+        for item in obj:
+            _feed(hasher, item)
+    elif isinstance(obj, dict):
+        hasher.update(str(len(obj)).encode('utf-8'))
+        for name, value in obj.items():
+            _feed(hasher, name)
+            _feed(hasher, value)
+    elif hasattr(obj, '__slots__') and hasattr(obj, 'times') and hasattr(obj, 'values'):
+        # a RainfallSeries
+        for name in obj.__slots__:
+            _feed(hasher, getattr(obj, name))
+    elif isinstance(obj, VALUE_TYPES):
+        hasher.update(repr(obj).encode('utf-8'))
+    else:
+        # the repr of other objects may hold their address, which would give a new key on every call
+        raise TypeError(f'cannot fingerprint an argument of type {type(obj).__name__}')
+
+
+def _feed_array(hasher, values):
+    if values.dtype.kind in 'mM':
+        values = values.view(np.int64)
+    hasher.update(f'{values.dtype.str}{values.shape}'.encode('utf-8'))
+    hasher.update(memoryview(np.ascontiguousarray(values)).cast('B'))
+
+
+def _nbytes(value):
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(name) + _nbytes(item) for name, item in value.items())
+    if hasattr(value, 'times') and hasattr(value, 'values') and hasattr(value, 'nbytes'):
+        # a RainfallSeries
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+def _arguments(func, args, kwargs):
+    """
+    Return the arguments of a call by parameter name, defaults included.
+    """
+    try:
+        bound = inspect.signature(func).bind(*args, **kwargs)
+    except (TypeError, ValueError):
+        return {'args': tuple(args), 'kwargs': dict(sorted(kwargs.items()))}
+    bound.apply_defaults()
+    return dict(bound.arguments)
@@ -1,7 +1,10 @@
 import pandas as pd
 import numpy as np
 
+from pydataman.instrumentation import instrumented
 
+
+@instrumented
 def time_mapping(data_node1, data_node2, feature, timestamp, closest_min=10):
     """
     Maps the values of a specified feature from one time series to another based on closest timestamps.
@@ -14,8 +17,9 @@ def time_mapping(data_node1, data_node2, feature, timestamp, closest_min=10):
     data_node2 : pandas.DataFrame
         The DataFrame containing the target time series data to which values will be mapped.
 
-    feature : str
-        The name of the feature (column) whose values will be mapped.
+    feature : str or list of str
+        The name of the feature (column) whose values will be mapped, or a list of names to map several
+        features in one call.
 
     timestamp : str
         The name of the timestamp column in both DataFrames.
@@ -26,7 +30,8 @@ def time_mapping(data_node1, data_node2, feature, timestamp, closest_min=10):
     Returns:
     --------
     pandas.DataFrame
-        A DataFrame containing the mapped values of the specified feature from data_node1 to data_node2.
+        A DataFrame containing the timestamps of data_node1 and the mapped values of the specified feature(s)
+        from data_node2.
 
     Notes:
     ------
@@ -45,33 +50,152 @@ def time_mapping(data_node1, data_node2, feature, timestamp, closest_min=10):
 
     """
 
-    df_node1 = data_node1.set_index(timestamp)
-    df_node2 = data_node2.set_index(timestamp)
+    features = [feature] if isinstance(feature, str) else list(feature)
+
+    weights = _neighbour_weights(_epoch_ns(data_node1[timestamp]), _epoch_ns(data_node2[timestamp]), closest_min)
+    mapped = _interpolate(data_node2[features].to_numpy(dtype=float), *weights)
+
+    mapped_df_node2 = pd.DataFrame(mapped, columns=features)
+    mapped_df_node2.insert(0, timestamp, data_node1[timestamp].to_numpy())
+
+    return mapped_df_node2
+
+
+@instrumented
+def time_mapping_many(target, sources, features, timestamp, closest_min=10, separator='_'):
+    """
+    Maps the features of many source time series onto one target timestamp grid in a single wide DataFrame.
+
+    The target timestamps are converted once, the neighbour positions and interpolation weights are computed
+    once per source and applied to all features of that source as one matrix operation. Every column of the
+    result is the time_mapping of one (source, feature) pair.
+
+    Parameters:
+    -----------
+    target : pandas.DataFrame or array-like
+        The DataFrame whose timestamp column is the target grid, or the target timestamps themselves.
+
+    sources : dict
+        The DataFrames containing the source time series, by name, e.g. node IDs.
+
+    features : list of str or dict
+        The features (columns) to map from every source, or a dict with the list of features of every source.
+
+    timestamp : str
+        The name of the timestamp column in the target and the source DataFrames.
+
+    closest_min : int, optional
+        The maximum time difference in minutes to consider a timestamp as closest. Default is 10.
+
+    separator : str, optional
+        Separator between the source name and the feature in the column names. Default is '_'.
+
+    Returns:
+    --------
+    pandas.DataFrame
+        A DataFrame with the target timestamps followed by one column '<source><separator><feature>' per
+        source and feature, in the order of sources and features.
+
+    Example:
+    --------
+     nodes = {node: read_node_data(node) for node in df_nodes['NodeID']}
+     aligned = time_mapping_many(df_rainfall, nodes, ['temperature', 'moisture'], 'Date/Time')
+    """
 
-    mapped_features = []
+    target_times = target[timestamp] if isinstance(target, pd.DataFrame) else pd.Series(target)
+    times = _epoch_ns(target_times)
 
-    for t1_idx, t1 in enumerate(df_node1.index):
-        closest_idx = np.abs((df_node2.index - t1).total_seconds() / 60) <= closest_min
-        closest_timestamps = df_node2.index[closest_idx]
-        if len(closest_timestamps) < 2:
-            mapped_features.append([t1, np.nan])
+    blocks, columns = [], []
+    for name, source in sources.items():
+        source_features = features[name] if isinstance(features, dict) else features
+        source_features = [source_features] if isinstance(source_features, str) else list(source_features)
+        if not source_features:
             continue
+        weights = _neighbour_weights(times, _epoch_ns(source[timestamp]), closest_min)
+        blocks.append(_interpolate(source[source_features].to_numpy(dtype=float), *weights))
+        columns.extend(f'{name}{separator}{feature}' for feature in source_features)
 
-        time_diffs = np.abs((closest_timestamps - t1).total_seconds())
-        sorted_indices = np.argsort(time_diffs)
-        t1_closest = closest_timestamps[sorted_indices[0]]
-        t2_closest = closest_timestamps[sorted_indices[1]]
-        s1 = df_node2.loc[t1_closest, feature]
-        s2 = df_node2.loc[t2_closest, feature]
-        t_diff = (t2_closest - t1_closest).total_seconds() / 60
+    mapped = np.hstack(blocks) if blocks else np.empty((len(times), 0))
+    mapped_df = pd.DataFrame(mapped, columns=columns)
+    mapped_df.insert(0, timestamp, target_times.to_numpy())
 
-        if t_diff == 0:
-            t_diff = 1
+    return mapped_df
 
-        S = ((t1 - t1_closest).total_seconds() / 60) * (s2 - s1) / t_diff + s1
 
-        mapped_features.append([t1, S])
+def _epoch_ns(times):
+    """
+    Convert timestamps to int64 nanoseconds since the epoch, tz-aware timestamps are taken in UTC.
+    """
+    times = pd.DatetimeIndex(times)
+    if times.tz is not None:
+        times = times.tz_convert('UTC').tz_localize(None)
+    return times.values.astype('datetime64[ns]').view(np.int64)
 
-    mapped_df_node2 = pd.DataFrame(mapped_features, columns=[timestamp, feature])
 
-    return mapped_df_node2
+def _neighbour_weights(times, reference_times, closest_min):
+    """
+    Find the two reference timestamps closest to every timestamp and the terms of the linear interpolation.
+
+    Only the four reference timestamps around the insertion point of a timestamp can be the two closest ones,
+    so they are found with a binary search instead of comparing against the whole reference index. Ties are
+    resolved in favour of the earlier reference timestamp.
+
+    Parameters:
+    -----------
+    times : numpy.ndarray
+        Timestamps to map, as int64 nanoseconds.
+
+    reference_times : numpy.ndarray
+        Timestamps of the series providing the values, as int64 nanoseconds.
+
+    closest_min : int
+        The maximum time difference in minutes to consider a timestamp as closest.
+
+    Returns:
+    --------
+    tuple
+        Positions of the closest (first) and second closest (second) reference rows, the time from the closest
+        reference timestamp in minutes (offset), the time between the two reference timestamps in minutes (span)
+        and a mask of the timestamps that have two reference timestamps within closest_min (found).
+    """
+    n = len(reference_times)
+    if n == 0:
+        nowhere = np.zeros(len(times), dtype=np.int64)
+        return nowhere, nowhere, np.zeros(len(times)), np.ones(len(times)), np.zeros(len(times), dtype=bool)
+
+    order = np.argsort(reference_times, kind='stable')
+    reference_times = reference_times[order]
+
+    candidates = np.searchsorted(reference_times, times)[:, None] + np.arange(-2, 2)
+    valid = (candidates >= 0) & (candidates < n)
+    candidates = np.clip(candidates, 0, n - 1)
+
+    distances = np.abs((reference_times[candidates] - times[:, None]) / 1e9 / 60)
+    distances[~valid] = np.inf
+
+    closest = np.argsort(distances, axis=1, kind='stable')[:, :2]
+    first, second = np.take_along_axis(candidates, closest, axis=1).T
+    found = np.take_along_axis(distances, closest, axis=1)[:, 1] <= closest_min
+
+    offset = (times - reference_times[first]) / 1e9 / 60
+    span = (reference_times[second] - reference_times[first]) / 1e9 / 60
+    span[span == 0] = 1
+
+    return order[first], order[second], offset, span, found
+
+
+def _interpolate(values, first, second, offset, span, found):
+    """
+    Interpolate the rows of values with the terms computed by _neighbour_weights.
+
+    S(t) = (t - t1) * (s2 - s1) / (t2 - t1) + s1 is evaluated for all columns at once, rows without two close
+    reference timestamps are NaN.
+    """
+    if not found.any():
+        return np.full((len(found), values.shape[1]), np.nan)
+
+    s1 = values[first]
+    s2 = values[second]
+    mapped = offset[:, None] * (s2 - s1) / span[:, None] + s1
+    mapped[~found] = np.nan
+    return mapped
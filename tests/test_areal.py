@@ -0,0 +1,155 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pydataman.meteo.areal import EARTH_RADIUS_KM, ArealInterpolator, station_matrix
+from pydataman.meteo.rainfall import sum_by_period
+
+
+def stations(seed, count=30):
+    rng = np.random.default_rng(seed)
+    return [f'M{i:02d}' for i in range(count)], rng.uniform(41.2, 44.2, count), rng.uniform(22.4, 28.6, count)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def brute_force_weights(lat, lon, station_lat, station_lon, method, k, power, max_distance_km):
+    """
+    The dense weights of every point from the haversine distances to all stations.
+    """
+    weights = np.zeros((len(lat), len(station_lat)))
+    for row in range(len(lat)):
+        distances = haversine_km(lat[row], lon[row], station_lat, station_lon)
+        distances = np.where(np.isnan(distances), np.inf, distances)
+        nearest = np.argsort(distances, kind='stable')[:k]
+        nearest = nearest[np.isfinite(distances[nearest])]
+        if max_distance_km is not None:
+            nearest = nearest[distances[nearest] <= max_distance_km]
+        if not len(nearest):
+            continue
+        if method == 'nearest':
+            weights[row, nearest] = 1
+        elif (distances[nearest] == 0).any():
+            weights[row, nearest[distances[nearest] == 0]] = 1
+        else:
+            weights[row, nearest] = 1 / distances[nearest] ** power
+        weights[row] /= weights[row].sum()
+    return weights
+
+
+@pytest.mark.parametrize('method, k, power, max_distance_km',
+                         [('idw', 8, 2.0, None), ('idw', 4, 1.0, None), ('idw', 8, 2.0, 60), ('nearest', 1, 2.0, None),
+                          ('nearest', 5, 2.0, 80), ('idw', 50, 3.0, None)])
+@pytest.mark.parametrize('seed', range(3))
+def test_point_weights_match_brute_force(seed, method, k, power, max_distance_km):
+    ids, station_lat, station_lon = stations(seed)
+    station_lat[3] = np.nan
+    interpolator = ArealInterpolator(ids, station_lat, station_lon, method=method, k=k, power=power,
+                                     max_distance_km=max_distance_km)
+    rng = np.random.default_rng(seed + 100)
+    lat, lon = rng.uniform(41, 44.5, 200), rng.uniform(22, 29, 200)
+    # a target on a station takes all of its weight
+    lat[0], lon[0] = station_lat[5], station_lon[5]
+
+    weights = interpolator.point_weights(lat, lon)
+    assert weights.shape == (200, len(ids))
+    expected = brute_force_weights(lat, lon, station_lat, station_lon, method, k, power, max_distance_km)
+    np.testing.assert_allclose(weights.toarray(), expected, atol=1e-9)
+    assert weights[:, 3].nnz == 0
+    if method == 'idw':
+        assert weights[0, 5] == pytest.approx(1)
+
+
+def test_grid_weights_follow_the_grid():
+    interpolator = ArealInterpolator(*stations(0))
+    lat, lon = np.arange(41.5, 43.5, 0.5), np.arange(23, 28, 1.0)
+    grid = interpolator.grid_weights(lat, lon)
+    points = interpolator.point_weights(np.repeat(lat, len(lon)), np.tile(lon, len(lat)))
+    np.testing.assert_allclose(grid.toarray(), points.toarray())
+
+
+def test_polygon_inside_a_thiessen_cell():
+    ids, station_lat, station_lon = stations(1)
+    interpolator = ArealInterpolator(ids, station_lat, station_lon, method='nearest', k=1)
+    square = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) * 0.005 + [station_lon[7], station_lat[7]]
+    weights = interpolator.polygon_weights({'catchment': square}, resolution=0.001)
+    np.testing.assert_allclose(weights.toarray(), np.eye(len(ids))[[7]])
+
+
+def test_interpolate():
+    ids, station_lat, station_lon = stations(2, count=10)
+    interpolator = ArealInterpolator(ids, station_lat, station_lon, k=4, max_distance_km=150)
+    rng = np.random.default_rng(2)
+    weights = interpolator.point_weights(rng.uniform(41, 44.5, 50), rng.uniform(22, 29, 50))
+    dense = weights.toarray()
+    values = rng.uniform(0, 20, (10, 6))
+
+    np.testing.assert_allclose(interpolator.interpolate(values, weights)[dense.sum(axis=1) > 0],
+                               (dense @ values)[dense.sum(axis=1) > 0])
+    assert np.isnan(interpolator.interpolate(values, weights)[dense.sum(axis=1) == 0]).all()
+
+    # missing values leave their stations out, the other weights are scaled to one
+    values[[1, 4], 2] = np.nan
+    result = interpolator.interpolate(values, weights)
+    present = ~np.isnan(values[:, 2])
+    covered = dense[:, present].sum(axis=1) > 0
+    scaled = dense[covered][:, present] / dense[covered][:, present].sum(axis=1, keepdims=True)
+    np.testing.assert_allclose(result[covered, 2], scaled @ values[present, 2])
+    assert np.isnan(result[~covered, 2]).all()
+
+    # DataFrame rows are matched by ID, missing stations count as missing values
+    dates = pd.date_range('2024-01-01', periods=6)
+    frame = pd.DataFrame(values, index=ids, columns=dates).drop(index=['M01', 'M04']).iloc[::-1]
+    by_id = interpolator.interpolate(frame, weights, index=np.arange(50) + 100)
+    assert list(by_id.columns) == list(dates) and by_id.index[0] == 100
+    np.testing.assert_allclose(by_id[dates[2]].to_numpy(), result[:, 2])
+
+    with pytest.raises(ValueError):
+        interpolator.interpolate(values[:5], weights)
+
+
+def test_station_matrix():
+    dates = pd.date_range('2024-01-01 07:30', periods=3 * 1440, freq='min')
+    rain = pd.DataFrame({'Date/Time': dates, 'pq': np.tile([0.0, 0.2], len(dates) // 2)})
+    sums = {'M01': sum_by_period(rain, 'pq', standard='bg'),
+            'M02': sum_by_period(rain.iloc[1440:], 'pq', standard='bg')}
+    matrix = station_matrix(sums)
+    assert list(matrix.index) == ['M01', 'M02']
+    assert list(matrix.columns) == list(sums['M01']['Date/Time'])
+    np.testing.assert_allclose(matrix.loc['M01'], sums['M01']['PQ (mm)'])
+    assert np.isnan(matrix.loc['M02'].iloc[0]) and matrix.loc['M02'].iloc[1:].tolist() == [144.0, 144.0]
+    assert station_matrix({}).empty
+
+
+def test_from_metadata():
+    ids, station_lat, station_lon = stations(3, count=5)
+    catalogue = pd.DataFrame({'MeteoID': ids, 'Location': list('abcde'), 'Latitude': station_lat.astype(str),
+                              'Longitude': station_lon.astype(str)})
+    interpolator = ArealInterpolator.from_metadata(catalogue, station_ids=['M04', 'M00'], method='nearest', k=1)
+    assert list(interpolator.station_ids) == ['M04', 'M00']
+    np.testing.assert_allclose(interpolator.lat, station_lat[[4, 0]])
+    with pytest.raises(KeyError):
+        ArealInterpolator.from_metadata(catalogue.drop(columns='Latitude'))
+
+
+def test_weights_on_disk(tmp_path):
+    ids, station_lat, station_lon = stations(4)
+    lat, lon = np.arange(41.5, 43.5, 0.25), np.arange(23, 28, 0.5)
+    weights = ArealInterpolator(ids, station_lat, station_lon, cache_dir=str(tmp_path)).grid_weights(lat, lon)
+    assert len(os.listdir(tmp_path)) == 1
+
+    interpolator = ArealInterpolator(ids, station_lat, station_lon, cache_dir=str(tmp_path))
+    interpolator._point_weights = None  # the weights must come from the file
+    np.testing.assert_allclose(interpolator.grid_weights(lat, lon).toarray(), weights.toarray())
+    # other parameters give other weights
+    other = ArealInterpolator(ids, station_lat, station_lon, power=1.0, cache_dir=str(tmp_path))
+    other.grid_weights(lat, lon)
+    assert len(os.listdir(tmp_path)) == 2
+    other.clear()
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from pydataman.ioutils.meterac.cache import RainfallCache
+
+
+def test_rows_after_an_empty_first_fetch(tmp_path):
+    cache = RainfallCache(str(tmp_path))
+    empty = pd.DataFrame({'unixtime': pd.Series([], dtype='int64'), 'pq': pd.Series([], dtype='float64')})
+    cached = cache.update('M01', None, empty)
+    assert cached.empty
+
+    cached, meta = cache.load('M01')
+    fetched = pd.DataFrame({'unixtime': [60, 120], 'pq': [0.0, 0.2]})
+    assert len(cache.update('M01', cached, fetched)) == 2
+
+    cached, meta = cache.load('M01')
+    assert cached['unixtime'].tolist() == [60, 120]
+    assert meta['high_water'] == 120
+
+
+def test_only_new_rows_are_appended(tmp_path):
+    cache = RainfallCache(str(tmp_path))
+    cache.update('M01', None, pd.DataFrame({'unixtime': [60, 120], 'pq': [0.0, 0.2]}))
+    cached, _ = cache.load('M01')
+    merged = cache.update('M01', cached, pd.DataFrame({'unixtime': [60, 120, 180], 'pq': [0.0, 0.2, 0.4]}))
+    assert merged['unixtime'].tolist() == [60, 120, 180]
+    assert cache.load('M01')[0]['unixtime'].tolist() == [60, 120, 180]
+
+
+def test_threads_evicting_each_other(tmp_path):
+    # every update evicts all other devices, while other threads write theirs
+    cache = RainfallCache(str(tmp_path), max_bytes=1)
+    fetched = pd.DataFrame({'unixtime': np.arange(20_000) * 60, 'pq': np.zeros(20_000)})
+    devices = [f'M{i:02d}' for i in range(16)] * 4
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        merged = list(executor.map(lambda device: cache.update(device, None, fetched), devices))
+    assert all(len(df) == len(fetched) for df in merged)
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pydataman.meteo.chunked import find_rain_periods_chunks, subtract_next_value_chunks, sum_by_period_chunks
+from pydataman.meteo.rainfall import find_rain_periods, subtract_next_value, sum_by_period
+from pydataman.meteo.series import RainfallSeries
+
+
+def station_frame(seed, rows, open_at_end=False):
+    """
+    Random 1-minute data with the cumulative counter of a tipping bucket in 'pq', optionally raining until the
+    last row so that an event is still open at the end.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-01 05:13', periods=rows, freq='min')
+    wet = rng.random(rows) < rng.uniform(0.05, 0.4)
+    if open_at_end:
+        wet[-5:] = True
+    return pd.DataFrame({'unixtime': dates.astype('int64') // 10**9, 'Date/Time': dates,
+                         'pq': np.cumsum(np.where(wet, rng.choice([0.1, 0.2, 0.005], rows), 0.0))})
+
+
+def random_chunks(df, seed):
+    """
+    Split df at random rows, with empty chunks at the start, the end and between the others.
+    """
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.choice(np.arange(1, len(df)), size=rng.integers(0, min(25, len(df) - 1)), replace=False))
+    chunks = [df.iloc[rows] for rows in np.split(np.arange(len(df)), cuts)]
+    for position in rng.choice(len(chunks) + 1, size=3):
+        chunks.insert(position, df.iloc[:0])
+    return chunks
+
+
+@pytest.mark.parametrize('open_at_end', [False, True])
+@pytest.mark.parametrize('seed', range(20))
+def test_subtract_and_find_periods_match_batch(seed, open_at_end):
+    df = station_frame(seed, int(np.random.default_rng(seed).integers(2, 3000)), open_at_end)
+    chunks = random_chunks(df, seed)
+
+    subtracted = list(subtract_next_value_chunks(chunks, 'pq'))
+    expected = subtract_next_value(df, 'pq')
+    pd.testing.assert_frame_equal(pd.concat(subtracted), expected)
+
+    result = find_rain_periods_chunks(subtracted, 'pq')
+    pd.testing.assert_frame_equal(result, find_rain_periods(expected, 'pq'), check_exact=False, rtol=1e-9)
+
+
+def test_event_open_at_the_end():
+    df = station_frame(3, 500, open_at_end=True)
+    periods = find_rain_periods_chunks(subtract_next_value_chunks(random_chunks(df, 3), 'pq'), 'pq')
+    assert periods['Stop_Time'].iloc[-1] == df['Date/Time'].iloc[-1]
+
+
+def test_empty_chunks_only():
+    df = station_frame(0, 10).iloc[:0]
+    pd.testing.assert_frame_equal(find_rain_periods_chunks([df, df], 'pq'), find_rain_periods(df, 'pq'),
+                                  check_dtype=False, check_index_type=False)
+    assert sum_by_period_chunks([df, df], 'pq').empty
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_rainfall_series_chunks(seed):
+    df = station_frame(seed, 1500)
+    chunks = [RainfallSeries.from_pandas(chunk, 'pq') for chunk in random_chunks(df, seed)]
+    subtracted = list(subtract_next_value_chunks(chunks, 'pq'))
+    expected = subtract_next_value(RainfallSeries.from_pandas(df, 'pq'), 'pq')
+    np.testing.assert_array_equal(np.concatenate([chunk.values for chunk in subtracted]), expected.values)
+    pd.testing.assert_frame_equal(find_rain_periods_chunks(subtracted, 'pq'), find_rain_periods(expected, 'pq'))
+
+
+@pytest.mark.parametrize('standard', ['international', 'bg'])
+@pytest.mark.parametrize('interval_hours', [1, 24])
+@pytest.mark.parametrize('seed', range(10))
+def test_sum_by_period_matches_batch(seed, interval_hours, standard):
+    df = subtract_next_value(station_frame(seed, int(np.random.default_rng(seed).integers(2, 6000))), 'pq')
+    result = sum_by_period_chunks(random_chunks(df, seed), 'pq', interval_hours, standard=standard)
+    expected = sum_by_period(df, 'pq', interval_hours, standard=standard)
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-9, atol=1e-12)
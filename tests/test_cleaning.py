@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from pydataman.meteo.rainfall import subtract_next_value
+from pydataman.processing.cleaning import clean_rainfall
+
+
+def test_sensor_dip_adds_no_rain():
+    df = pd.DataFrame({'unixtime': [0, 60, 120, 180], 'pq': [500.0, 500.2, 500.0, 500.2]})
+    cleaned, report = clean_rainfall(df)
+    np.testing.assert_allclose(subtract_next_value(cleaned, 'pq')['pq'], [0, 0.2, 0, 0.2])
+    assert report['dips'].tolist() == [120]
+    assert report['resets'].size == 0
+
+
+def test_counter_reset_continues_the_counter():
+    df = pd.DataFrame({'unixtime': [0, 60, 120, 180], 'pq': [500.0, 500.2, 0.0, 0.3]})
+    cleaned, report = clean_rainfall(df)
+    np.testing.assert_allclose(subtract_next_value(cleaned, 'pq')['pq'], [0, 0.2, 0, 0.3])
+    assert report['resets'].tolist() == [120]
+    assert report['dips'].size == 0
+
+
+def test_rain_counted_after_a_reset_is_kept():
+    df = pd.DataFrame({'unixtime': [0, 60, 120, 180, 240], 'pq': [500.0, 500.2, 500.4, 0.2, 0.4]})
+    cleaned, report = clean_rainfall(df)
+    np.testing.assert_allclose(subtract_next_value(cleaned, 'pq')['pq'], [0, 0.2, 0.2, 0.2, 0.2])
+    assert report['resets'].tolist() == [180]
+    assert report['dips'].size == 0
+
+
+def test_shuffled_duplicated_rows():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'unixtime': np.arange(1000) * 60, 'pq': np.cumsum(rng.choice([0, 0, 0.2], 1000))})
+    messy = pd.concat([df, df.iloc[rng.choice(1000, 50)]]).sample(frac=1, random_state=1)
+    cleaned, report = clean_rainfall(messy)
+    pd.testing.assert_frame_equal(cleaned, clean_rainfall(df)[0])
+    assert report['sorted'] and report['duplicates'] == 50
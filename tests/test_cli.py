@@ -0,0 +1,63 @@
+import json
+
+import pandas as pd
+import pytest
+
+from pydataman.cli import build_parser, main
+
+
+def test_defaults():
+    args = build_parser().parse_args(['M08'])
+    assert (args.stations, args.ops, args.standard, args.format, args.output) == (['M08'], 'periods,sums', 'bg',
+                                                                                 'parquet', '.')
+    assert args.stub is None and build_parser().parse_args(['M08', '--stub']).stub == 10_000
+
+
+@pytest.mark.parametrize('argv', [['M01', '--ops', 'periods,plots'], ['M01', '--start', '2023-01-01'],
+                                  ['M01', '--format', 'xlsx'], []])
+def test_invalid_arguments(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(argv)
+    assert exit_info.value.code == 2
+    assert 'error' in capsys.readouterr().err
+
+
+def test_run_against_the_stub(tmp_path, capsys):
+    trace = tmp_path / 'trace.jsonl'
+    code = main(['M01', 'M02', 'M01', '--stub', '20000', '--workers', '1', '--output', str(tmp_path / 'out'),
+                 '--format', 'csv', '--ops', 'fetch,periods,sums', '--trace', str(trace)])
+    assert code == 0
+
+    output = capsys.readouterr().out
+    assert 'stations  2 of 2 processed, 0 failed' in output
+    data = pd.read_csv(tmp_path / 'out' / 'data.csv')
+    assert sorted(data['MeteoID'].unique()) == ['M01', 'M02'] and len(data) == 40000
+    daily = pd.read_csv(tmp_path / 'out' / 'daily.csv', parse_dates=['Date/Time'])
+    assert (daily['Date/Time'].dt.strftime('%H:%M') == '07:30').all()
+    assert daily['PQ (mm)'].sum() > 0
+    for name in ('periods', 'monthly'):
+        assert set(pd.read_csv(tmp_path / 'out' / f'{name}.csv')['MeteoID']) == {'M01', 'M02'}
+    records = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert sum(record['name'] == 'http' for record in records) == 2
+
+
+def test_date_window(tmp_path):
+    code = main(['M03', '--stub', '3000', '--workers', '1', '--output', str(tmp_path), '--ops', 'filter,sums',
+                 '--standard', 'international', '--start', '2023-01-02', '--end', '2023-01-02'])
+    assert code == 0
+    data = pd.read_parquet(tmp_path / 'data.parquet')
+    assert len(data) and data['Date/Time'].between('2023-01-02', '2023-01-02 23:59:59').all()
+    assert pd.read_parquet(tmp_path / 'daily.parquet')['Date/Time'].tolist() == [pd.Timestamp('2023-01-02')]
+
+
+def test_all_stations(tmp_path, capsys):
+    assert main(['all', '--stub', '500', '--workers', '2', '--output', str(tmp_path), '--ops', 'sums']) == 0
+    assert 'stations  10 of 10 processed' in capsys.readouterr().out
+
+
+def test_exit_codes_of_failed_stations(tmp_path, capsys):
+    assert main(['M01', 'X99', '--stub', '500', '--workers', '1', '--retries', '0', '--output', str(tmp_path)]) == 1
+    captured = capsys.readouterr()
+    assert 'stations  1 of 2 processed, 1 failed' in captured.out
+    assert 'failed    X99' in captured.err
+    assert main(['X98', 'X99', '--stub', '500', '--workers', '1', '--retries', '0', '--output', str(tmp_path)]) == 2
@@ -0,0 +1,45 @@
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from pydataman.processing.convert_units import convert_unix_time
+from pydataman.processing.decimation import decimate
+
+matplotlib.use('Agg')
+
+
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+def test_time_zone_aware_dates(method):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'unixtime': 1_700_000_000 + np.arange(10_000) * 60, 'pq': rng.gamma(0.2, 1, 10_000)})
+    aware = convert_unix_time(df, 'unixtime', inplace=False, tz='Europe/Sofia')
+    naive = convert_unix_time(df, 'unixtime', inplace=False)
+    np.testing.assert_array_equal(decimate(aware['Date/Time'], aware['pq'], 500, method),
+                                  decimate(naive['Date/Time'], naive['pq'], 500, method))
+
+
+def test_plot_rainfall_intensity_time_zone_aware():
+    from pydataman.meteo.plotting import plot_rainfall_intensity
+
+    df = pd.DataFrame({'unixtime': 1_700_000_000 + np.arange(5_000) * 60, 'pq': np.full(5_000, 0.2)})
+    convert_unix_time(df, 'unixtime', tz='Europe/Sofia')
+    plot_rainfall_intensity(df, 'Date/Time', 'pq', 'M08', max_points=100)
+
+
+def test_plot_rainfall_intensity_unsorted():
+    from pydataman.meteo.plotting import plot_rainfall_intensity
+
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'unixtime': 1_700_000_000 + np.arange(20_000) * 60, 'pq': rng.gamma(0.2, 1, 20_000)})
+    convert_unix_time(df, 'unixtime')
+    # peaks at both ends, which an unsorted input would put outside of the range of the buckets
+    df.loc[[0, len(df) - 1], 'pq'] = [50.0, 60.0]
+
+    drawn = []
+    for frame in (df, df.sample(frac=1, random_state=2)):
+        plot = plot_rainfall_intensity(frame, 'Date/Time', 'pq', 'M08', max_points=500)
+        drawn.append(np.sort(plot.gca().lines[0].get_ydata()))
+        plot.close()
+    np.testing.assert_array_equal(drawn[1], drawn[0])
+    assert drawn[1][-2:].tolist() == [50.0, 60.0]
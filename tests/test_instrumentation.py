@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from pydataman import instrumentation
+from pydataman.ioutils.meterac.metadata import MetadataRegistry, station_id_column
+from pydataman.ioutils.meterac.stub_server import MeterAcStub
+from pydataman.meteo.chunked import find_rain_periods_chunks, sum_by_period_chunks
+from pydataman.meteo.rainfall import subtract_next_value
+from pydataman.meteo.series import RainfallSeries
+from pydataman.meteo.streaming import RainEventDetector
+
+
+def chunks(df, count=3):
+    return [df.iloc[rows] for rows in np.array_split(np.arange(len(df)), count)]
+
+
+def station_frame(rows=600):
+    dates = pd.date_range('2024-01-01', periods=rows, freq='min')
+    values = np.cumsum(np.where(np.arange(rows) % 7 == 0, 0.2, 0.0))
+    return pd.DataFrame({'unixtime': dates.astype('int64') // 10**9, 'Date/Time': dates, 'pq': values})
+
+
+def test_chunked_streaming_and_series_spans():
+    df = subtract_next_value(station_frame(), 'pq')
+    sink = instrumentation.MemorySink()
+    with instrumentation.enabled(sink):
+        find_rain_periods_chunks(chunks(df), 'pq')
+        sum_by_period_chunks(chunks(df), 'pq')
+        detector = RainEventDetector('pq')
+        detector.update(df)
+        detector.flush()
+        series = RainfallSeries.from_pandas(df, 'pq')
+        series.to_pandas()
+
+    assert sink.find('pydataman.meteo.chunked.find_rain_periods_chunks')
+    assert sink.find('pydataman.meteo.chunked.sum_by_period_chunks')
+    assert sink.find('pydataman.meteo.streaming.RainEventDetector.update')[0]['rows_in'] == len(df)
+    assert sink.find('pydataman.meteo.streaming.RainEventDetector.flush')
+    assert sink.find('pydataman.meteo.series.RainfallSeries.from_pandas')[0]['rows_in'] == len(df)
+    to_pandas = sink.find('pydataman.meteo.series.RainfallSeries.to_pandas')[0]
+    assert to_pandas['rows_in'] == to_pandas['rows_out'] == len(df)
+
+
+def test_registry_spans():
+    sink = instrumentation.MemorySink()
+    with MeterAcStub(rows=10) as stub, instrumentation.enabled(sink):
+        registry = MetadataRegistry(url=stub.base_url + '/gs/metadata/{name}', cache_dir=None)
+        stations = registry.within(-90, 90, -180, 180)
+        station_ids = stations[station_id_column(stations)].astype(str).tolist()
+        registry.stations(station_ids[:2])
+        registry.station(station_ids[0])
+
+    for method in ('station', 'stations', 'within'):
+        assert sink.find(f'pydataman.ioutils.meterac.metadata.MetadataRegistry.{method}')
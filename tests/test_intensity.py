@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pydataman.meteo.intensity import max_rainfall_intensity
+from pydataman.meteo.rainfall import find_rain_periods
+
+DURATIONS = (1, 5, 10, 30, 60, 360, 1440)
+
+
+def reference_max_rainfall_intensity(df, rainfall_col, durations, by, periods=None, date_column='Date/Time'):
+    """
+    The maxima of a pandas rolling sum over every group and duration, one pass per window length.
+    """
+    df = df.sort_values(date_column, kind='stable')
+    if by == 'year':
+        groups = [(year, group) for year, group in df.groupby(df[date_column].dt.year)]
+    elif by == 'event':
+        groups = [(start, df[(df[date_column] >= start) & (df[date_column] <= stop)])
+                  for start, stop in zip(periods['Start_Time'], periods['Stop_Time'])]
+    else:
+        groups = [(None, df)]
+
+    rows = []
+    for key, group in groups:
+        rainfall = group.set_index(date_column)[rainfall_col].fillna(0.0)
+        for duration in durations:
+            sums = rainfall.rolling(f'{duration}min').sum()
+            row = {'Duration_(min)': duration, 'Max_Rainfall_(mm)': sums.max(),
+                   'Intensity_(mm/h)': sums.max() * 60 / duration, 'End_Time': sums.idxmax()}
+            if by is not None:
+                row = {'Year' if by == 'year' else 'Start_Time': key, **row}
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def station_frame(seed, rows=4000):
+    """
+    Rainfall of irregular steps from 1 to 5 minutes across a new year, shuffled, with repeated times and missing
+    values. The amounts are multiples of 0.25 mm so that every sum is exact.
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(1, 6, rows)
+    steps[rng.random(rows) < 0.02] = 0
+    dates = pd.Timestamp('2023-12-28') + pd.to_timedelta(np.cumsum(steps), unit='min')
+    wet = rng.random(rows) < 0.15
+    values = np.where(wet, rng.choice([0.25, 0.5, 1.0], rows), 0.0)
+    values[rng.random(rows) < 0.01] = np.nan
+    df = pd.DataFrame({'Date/Time': dates, 'pq': values})
+    return df.iloc[rng.permutation(rows)].reset_index(drop=True)
+
+
+@pytest.mark.parametrize('by', ['year', 'event', None])
+@pytest.mark.parametrize('seed', range(8))
+def test_matches_rolling_sums(by, seed):
+    df = station_frame(seed)
+    periods = find_rain_periods(df.sort_values('Date/Time', kind='stable').reset_index(drop=True), 'pq')
+    result = max_rainfall_intensity(df, 'pq', DURATIONS, by=by, periods=periods)
+    expected = reference_max_rainfall_intensity(df, 'pq', DURATIONS, by, periods)
+    if by == 'year':
+        assert result['Year'].unique().tolist() == [2023, 2024]
+    if by == 'event':
+        assert len(periods) > 1
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_unknown_grouping():
+    with pytest.raises(ValueError):
+        max_rainfall_intensity(station_frame(0), 'pq', by='month')
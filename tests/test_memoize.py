@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pydataman.meteo.rainfall import sum_by_period
+from pydataman.processing.cleaning import clean_rainfall
+from pydataman.processing.memoize import ResultCache
+
+
+def station_frame(rows=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-01', periods=rows, freq='min')
+    return pd.DataFrame({'unixtime': dates.astype('int64') // 10**9, 'Date/Time': dates,
+                         'pq': rng.choice([0, 0, 0, 0.2], rows)})
+
+
+def ones(rows):
+    return np.ones(rows)
+
+
+def test_hit_and_miss_counters():
+    cache = ResultCache()
+    df = station_frame()
+    first = cache(sum_by_period, df, 'pq')
+    second = cache(sum_by_period, df, 'pq', interval_hours=24)
+    pd.testing.assert_frame_equal(first, second)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+
+
+def test_changed_input_gets_a_new_key():
+    cache = ResultCache()
+    df = station_frame()
+    changed = df.copy()
+    changed.loc[10, 'pq'] += 0.2
+    assert cache.key(sum_by_period, (df, 'pq')) != cache.key(sum_by_period, (changed, 'pq'))
+    cache(sum_by_period, df, 'pq')
+    result = cache(sum_by_period, changed, 'pq')
+    pd.testing.assert_frame_equal(result, sum_by_period(changed, 'pq'))
+    assert cache.stats()['misses'] == 2
+
+
+def test_result_changed_in_place_leaves_the_cache_intact():
+    cache = ResultCache()
+    df = station_frame()
+    result = cache(sum_by_period, df, 'pq')
+    result['PQ (mm)'].values[0] = -999
+    hit = cache(sum_by_period, df, 'pq')
+    hit['PQ (mm)'].values[1] = -999
+    pd.testing.assert_frame_equal(cache(sum_by_period, df, 'pq'), sum_by_period(df, 'pq'))
+    assert cache.stats()['hits'] == 2
+
+
+def test_lru_byte_budget():
+    cache = ResultCache(max_bytes=2 * 8000 + 100)
+    cache(ones, 1000)
+    cache(ones, 1001)
+    cache(ones, 1000)
+    cache(ones, 999)
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['entries'] == 2 and stats['bytes'] <= cache.max_bytes
+    # 1001 was the least recently used
+    cache(ones, 1000)
+    assert cache.stats()['hits'] == 2
+    cache(ones, 1001)
+    assert cache.stats()['misses'] == 4
+
+
+def test_results_larger_than_the_budget_are_not_kept():
+    cache = ResultCache(max_bytes=1000)
+    cache(ones, 1000)
+    assert cache.stats()['entries'] == 0
+
+
+def test_dict_results_count_their_frames():
+    df = station_frame(rows=20000)
+    cache = ResultCache()
+    cleaned, report = cache(clean_rainfall, df)
+    assert cache.stats()['bytes'] >= cleaned.memory_usage(deep=True).sum()
+
+    cache = ResultCache()
+    cache(lambda: {'dips': np.zeros(10_000)})
+    assert cache.stats()['bytes'] >= 80_000
+
+
+def test_disk_tier(tmp_path):
+    df = station_frame()
+    expected = ResultCache(disk_dir=str(tmp_path))(sum_by_period, df, 'pq')
+
+    cache = ResultCache(disk_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(cache(sum_by_period, df, 'pq'), expected)
+    cache(sum_by_period, df, 'pq')
+    stats = cache.stats()
+    assert (stats['disk_hits'], stats['hits'], stats['misses']) == (1, 1, 0)
+
+    cache.clear()
+    assert not list(tmp_path.glob('*.pkl'))
+
+
+def test_disk_budget(tmp_path):
+    cache = ResultCache(disk_dir=str(tmp_path), disk_max_bytes=20_000)
+    for rows in (1000, 1001, 1002):
+        cache(ones, rows)
+    assert sum(path.stat().st_size for path in tmp_path.glob('*.pkl')) <= 20_000
+    assert len(list(tmp_path.glob('*.pkl'))) == 2
+    assert cache.stats()['evictions'] == 1
+
+
+def test_unknown_argument_types_raise():
+    with pytest.raises(TypeError, match='object'):
+        ResultCache()(lambda value: value, object())
+
+
+def test_inplace_calls_are_not_cached():
+    def scale(df, inplace=True):
+        df['pq'] *= 2
+        return df
+
+    cache = ResultCache()
+    cache(scale, station_frame())
+    assert cache.stats()['entries'] == 0 and cache.stats()['misses'] == 0
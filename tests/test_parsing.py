@@ -0,0 +1,58 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pydataman.ioutils.meterac.parsing import SAMPLE_BYTES, parse_rainfall_csv
+
+
+class Unseekable(io.RawIOBase):
+    """
+    A response body that can only be read once.
+    """
+
+    def __init__(self, payload):
+        self._payload = io.BytesIO(payload)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._payload.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def payload(late_row):
+    """
+    A meter.ac payload with a row that does not fit the dtypes of the sample well past SAMPLE_BYTES.
+    """
+    rows = 3 * SAMPLE_BYTES // 16
+    lines = [f'{1_700_000_000 + 60 * i};{0.2 * i:.1f}' for i in range(rows)]
+    lines[-10] = late_row
+    return ('UnixTime;PQ\n' + '\n'.join(lines) + '\n').encode()
+
+
+@pytest.mark.parametrize('late_row', [';12.4', '1700000000;abc', '1700000000.5;12.4'])
+@pytest.mark.parametrize('source', [bytes, io.BytesIO, Unseekable])
+def test_late_row_outside_the_sample(late_row, source):
+    data = payload(late_row)
+    expected = pd.read_csv(io.BytesIO(data), sep=';')
+    pd.testing.assert_frame_equal(parse_rainfall_csv(source(data)), expected)
+
+
+@pytest.mark.parametrize('source', [bytes, io.BytesIO, Unseekable])
+def test_forced_dtypes(source):
+    df = parse_rainfall_csv(source(payload('1700000000;12.4')), value_dtype='float32')
+    assert df.dtypes.tolist() == [np.dtype('int64'), np.dtype('float32')]
+    assert len(df) == 3 * SAMPLE_BYTES // 16
+
+
+def test_chunks():
+    data = payload(';12.4')
+    chunks = list(parse_rainfall_csv(data, value_dtype='float32', chunksize=5000))
+    assert chunks[0].dtypes.tolist() == [np.dtype('int64'), np.dtype('float32')]
+    assert chunks[-1]['UnixTime'].dtype == np.dtype('float64')
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True),
+                                  pd.read_csv(io.BytesIO(data), sep=';', dtype={'PQ': 'float32'}))
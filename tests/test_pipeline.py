@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pydataman.ioutils.archive import StationArchive
+from pydataman.meteo.pipeline import process_stations
+from pydataman.meteo.rainfall import find_rain_periods, subtract_next_value, sum_by_period
+
+
+def station_frame(seed, days=5, columns=('unixtime', 'pq')):
+    """
+    Random raw meter.ac data of one station: Unix times of every minute and a cumulative counter.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-30 03:00', periods=days * 1440, freq='min')
+    wet = rng.random(dates.size) < rng.uniform(0.02, 0.2)
+    counter = np.cumsum(np.where(wet, rng.choice([0.1, 0.2], dates.size), 0.0))
+    return pd.DataFrame({columns[0]: dates.astype('int64') // 10**9, columns[1]: counter})
+
+
+def stations():
+    frames = {f'M{seed:02d}': station_frame(seed) for seed in range(6)}
+    # column names of a raw meter.ac payload
+    frames['M06'] = station_frame(6, columns=('UnixTime', 'PQ'))
+    return frames
+
+
+def assert_same_results(result, expected):
+    for name in ('periods', 'daily', 'monthly'):
+        pd.testing.assert_frame_equal(result[name], expected[name])
+
+
+def test_pool_matches_single_process():
+    frames = stations()
+    single, single_errors = process_stations(frames, max_workers=1)
+    pooled, pooled_errors = process_stations(frames, max_workers=2, chunksize=2)
+    assert single_errors == pooled_errors == {}
+    assert_same_results(pooled, single)
+    assert sorted(single['daily']['MeteoID'].unique()) == sorted(frames)
+
+
+def test_matches_the_rainfall_functions():
+    df = station_frame(3)
+    results, _ = process_stations({'M03': df}, max_workers=1)
+    increments = subtract_next_value(pd.DataFrame({'Date/Time': pd.to_datetime(df['unixtime'], unit='s'),
+                                                   'pq': df['pq']}), 'pq')
+    pd.testing.assert_frame_equal(results['periods'].drop(columns='MeteoID'), find_rain_periods(increments, 'pq'))
+    daily = sum_by_period(increments, 'pq', standard='bg')
+    pd.testing.assert_frame_equal(results['daily'].drop(columns='MeteoID'), daily)
+    monthly = results['monthly'].set_index('Month')['PQ (mm)']
+    assert monthly.sum() == pytest.approx(daily['PQ (mm)'].sum())
+    assert list(monthly.index) == [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01')]
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_errors_are_collected(max_workers, tmp_path):
+    frames = stations()
+    frames['bad column'] = station_frame(7, columns=('unixtime', 'rain'))
+    frames['no archive'] = str(tmp_path / 'missing')
+    results, errors = process_stations(frames, max_workers=max_workers)
+    assert sorted(errors) == ['bad column', 'no archive']
+    assert errors['bad column']['error'] == 'KeyError'
+    assert set(errors['no archive']) == {'error', 'message'}
+    assert 'bad column' not in set(results['daily']['MeteoID'])
+    expected, _ = process_stations(stations(), max_workers=1)
+    assert_same_results(results, expected)
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_archive_and_date_window(max_workers, tmp_path):
+    frames = stations()
+    archive = StationArchive(str(tmp_path))
+    archive.write('M01', frames['M01'])
+    window = {'start_date': '2024-01-31', 'end_date': '2024-02-02'}
+    from_archive, errors = process_stations({'M01': str(tmp_path)}, max_workers=max_workers, **window)
+    from_frame, _ = process_stations({'M01': frames['M01']}, max_workers=1, **window)
+    assert errors == {}
+    assert_same_results(from_archive, from_frame)
+    assert from_frame['daily']['Date/Time'].tolist() == list(pd.date_range('2024-01-31 07:30', periods=3, freq='D'))
+
+
+def test_no_stations():
+    results, errors = process_stations({}, max_workers=1)
+    assert errors == {} and all(df.empty for df in results.values())
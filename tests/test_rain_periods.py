@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pydataman.meteo.rainfall import find_rain_periods
+
+
+def reference_find_rain_periods(df, rainfall_col, threshold=0.01, stop_window=10, date_column='Date/Time'):
+    """
+    The iterrows implementation of find_rain_periods that the vectorized one replaced, kept as the reference.
+    """
+    rain_periods = []
+
+    start_time = None
+    consecutive_zeros = 0
+
+    for index, row in df.iterrows():
+        current_value = row[rainfall_col]
+        next_value = df.at[index + 1, rainfall_col] if index + 1 < len(df) else None
+
+        if next_value is None:
+            if start_time is not None:
+                stop_time = row[date_column]
+                rainfall_sum = df[(df[date_column] >= start_time) & (df[date_column] <= stop_time)][rainfall_col].sum()
+                rain_periods.append({'Start_Time': start_time,
+                                     'Stop_Time': stop_time,
+                                     'Duration_(min)': (stop_time - start_time).total_seconds() / 60,
+                                     'Amount_Rainfall_(mm)': rainfall_sum})
+            break
+
+        if round(abs(next_value - current_value), 10) >= threshold:
+            if start_time is None:
+                start_time = pd.to_datetime(row[date_column])
+
+            consecutive_zeros = 0
+
+        elif next_value == current_value and start_time is not None:
+            consecutive_zeros += 1
+            if consecutive_zeros == stop_window:
+                stop_time = pd.to_datetime(row[date_column])
+                rainfall_sum = df[(df[date_column] >= start_time) & (df[date_column] <= stop_time)][rainfall_col].sum()
+                rain_periods.append({'Start_Time': start_time,
+                                     'Stop_Time': stop_time,
+                                     'Duration_(min)': (stop_time - start_time).total_seconds() / 60,
+                                     'Amount_Rainfall_(mm)': rainfall_sum})
+                start_time = None
+
+    return pd.DataFrame(rain_periods)
+
+
+def station_frame(seed, kind, rows=None):
+    """
+    Random 1-minute data: 'cumulative' tipping bucket counter in mm, 'integer' tip counts or 'unsorted' cumulative
+    data with shuffled rows.
+    """
+    rng = np.random.default_rng(seed)
+    rows = rows or int(rng.integers(2, 300))
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(rows), unit='min')
+    # dry spells with a few showers, so that events open and close
+    wet = rng.random(rows) < rng.uniform(0.05, 0.5)
+    if kind == 'integer':
+        values = np.where(wet, rng.integers(0, 4, rows), 0)
+    else:
+        values = np.cumsum(np.where(wet, rng.choice([0.1, 0.2, 0.005], rows), 0.0))
+    df = pd.DataFrame({'Date/Time': dates, 'pq': values})
+    if kind == 'unsorted':
+        df['Date/Time'] = df['Date/Time'].to_numpy()[rng.permutation(rows)]
+    return df
+
+
+def assert_same_periods(result, expected):
+    if expected.empty:
+        assert result.empty
+        return
+    assert list(result.columns) == ['Start_Time', 'Stop_Time', 'Duration_(min)', 'Amount_Rainfall_(mm)']
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected[list(result.columns)],
+                                  check_dtype=False, check_exact=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize('kind', ['cumulative', 'integer', 'unsorted'])
+@pytest.mark.parametrize('seed', range(40))
+def test_matches_reference(kind, seed):
+    df = station_frame(seed, kind)
+    assert_same_periods(find_rain_periods(df, 'pq'), reference_find_rain_periods(df, 'pq'))
+
+
+@pytest.mark.parametrize('stop_window', [0, 1, 3, 2.5, 10_000])
+@pytest.mark.parametrize('kind', ['cumulative', 'integer', 'unsorted'])
+@pytest.mark.parametrize('seed', range(10))
+def test_stop_window(stop_window, kind, seed):
+    df = station_frame(seed, kind)
+    assert_same_periods(find_rain_periods(df, 'pq', stop_window=stop_window),
+                        reference_find_rain_periods(df, 'pq', stop_window=stop_window))
+
+
+@pytest.mark.parametrize('threshold', [0.005, 0.1, 1])
+def test_threshold(threshold):
+    df = station_frame(3, 'cumulative', rows=500)
+    assert_same_periods(find_rain_periods(df, 'pq', threshold=threshold),
+                        reference_find_rain_periods(df, 'pq', threshold=threshold))
+
+
+@pytest.mark.parametrize('rows', [0, 1, 2])
+def test_short_input(rows):
+    df = pd.DataFrame({'Date/Time': pd.date_range('2024-01-01', periods=rows, freq='min'),
+                       'pq': np.arange(rows, dtype=float)})
+    assert_same_periods(find_rain_periods(df, 'pq', threshold=0.5),
+                        reference_find_rain_periods(df, 'pq', threshold=0.5))
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pydataman.meteo.rainfall import sum_by_period
+from pydataman.meteo.rollups import RollupStore
+
+
+def station_frame(seed, start='2023-12-30 07:30', days=70):
+    """
+    Random rainfall in mm of every minute for a number of whole days.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days * 1440, freq='min')
+    values = np.where(rng.random(dates.size) < 0.05, rng.choice([0.1, 0.2, 0.4], dates.size), 0.0)
+    return pd.DataFrame({'Date/Time': dates, 'pq': values})
+
+
+def chunked_store(df, seed, device='M08'):
+    store = RollupStore()
+    cuts = np.sort(np.random.default_rng(seed).choice(len(df), size=5, replace=False))
+    for chunk in np.split(np.arange(len(df)), cuts):
+        store.update(device, df.iloc[chunk])
+    return store
+
+
+@pytest.mark.parametrize('standard', ['international', 'bg'])
+@pytest.mark.parametrize('seed', range(3))
+def test_daily_matches_sum_by_period(standard, seed):
+    df = station_frame(seed)
+    if standard == 'international':
+        df = df[df['Date/Time'] >= '2023-12-31'].iloc[:60 * 1440]
+    expected = sum_by_period(df, 'pq', standard=standard)
+    result = chunked_store(df, seed).query('M08', 'daily', standard=standard)
+    np.testing.assert_array_equal(result['Date/Time'].to_numpy(), expected['Date/Time'].to_numpy())
+    np.testing.assert_allclose(result['PQ (mm)'], expected['PQ (mm)'], rtol=1e-9, atol=1e-9)
+    assert (result['Rows'] == 1440).all()
+
+
+@pytest.mark.parametrize('level, freq', [('hourly', 'h'), ('monthly', 'MS'), ('yearly', 'YS')])
+def test_levels_match_a_direct_sum(level, freq):
+    df = station_frame(4)
+    expected = df.groupby(pd.Grouper(key='Date/Time', freq=freq))['pq'].agg(['sum', 'size'])
+    result = chunked_store(df, 4).query('M08', level)
+    np.testing.assert_array_equal(result['Date/Time'].to_numpy(), expected.index.to_numpy())
+    np.testing.assert_allclose(result['PQ (mm)'], expected['sum'], rtol=1e-9, atol=1e-9)
+    np.testing.assert_array_equal(result['Rows'], expected['size'])
+
+
+def test_query_limits():
+    df = station_frame(5)
+    store = chunked_store(df, 5)
+    result = store.query('M08', 'daily', '2024-01-10', '2024-01-20')
+    assert result['Date/Time'].iloc[0] == pd.Timestamp('2024-01-10')
+    assert result['Date/Time'].iloc[-1] == pd.Timestamp('2024-01-19')
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_total_matches_a_direct_sum(seed):
+    df = station_frame(6)
+    store = chunked_store(df, 6)
+    rng = np.random.default_rng(seed)
+    start, end = np.sort(rng.choice(df['Date/Time'].dt.floor('h').unique(), size=2, replace=False))
+    expected = df.loc[(df['Date/Time'] >= start) & (df['Date/Time'] < end), 'pq'].sum()
+    assert store.total('M08', start, end) == pytest.approx(expected, abs=1e-9)
+
+
+def test_rows_already_added_are_skipped():
+    df = station_frame(7, days=3)
+    store = RollupStore()
+    assert store.update('M08', df.iloc[:2000]) == 2000
+    assert store.update('M08', df) == len(df) - 2000
+    assert store.update('M08', df) == 0
+    # a late row older than the newest added row is not counted
+    late = pd.DataFrame({'Date/Time': [df['Date/Time'].iloc[10] + pd.Timedelta(seconds=30)], 'pq': [5.0]})
+    assert store.update('M08', late) == 0
+    assert store.query('M08', 'yearly')['PQ (mm)'].sum() == pytest.approx(df['pq'].sum())
+
+
+def test_missing_values_count_as_zero():
+    df = station_frame(8, days=2)
+    df.loc[100, 'pq'] = np.nan
+    store = RollupStore()
+    store.update('M08', df)
+    daily = store.query('M08', 'daily', standard='bg')
+    assert daily['PQ (mm)'].iloc[0] == pytest.approx(df['pq'].iloc[:1440].sum())
+    assert daily['Rows'].tolist() == [1439, 1440]
+    assert np.isnan(sum_by_period(df, 'pq', standard='bg')['PQ (mm)'].iloc[0])
+
+
+def test_save_and_load(tmp_path):
+    df = station_frame(9, days=40)
+    store = chunked_store(df, 9)
+    store.update('A/B 1', df.iloc[:5000])
+    store.save(str(tmp_path))
+
+    loaded = RollupStore.load(str(tmp_path))
+    assert loaded.devices() == store.devices() == ['A/B 1', 'M08']
+    for device in store.devices():
+        for level in ('hourly', 'daily', 'monthly', 'yearly'):
+            pd.testing.assert_frame_equal(loaded.query(device, level), store.query(device, level))
+    # the high-water mark is kept as well
+    assert loaded.update('M08', df) == 0
+    assert loaded.update('A/B 1', df) == len(df) - 5000
+    pd.testing.assert_frame_equal(loaded.query('A/B 1', 'daily'), store.query('M08', 'daily'))
+
+
+def test_unknown_device_and_level():
+    store = RollupStore()
+    with pytest.raises(KeyError):
+        store.query('M08', 'daily')
+    store.update('M08', station_frame(10, days=1))
+    with pytest.raises(ValueError):
+        store.query('M08', 'weekly')
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pydataman.meteo.rainfall import find_rain_periods, subtract_next_value, sum_by_period
+from pydataman.meteo.series import RainfallSeries
+
+
+def station_frame(seed, rows=2000, tips=False):
+    """
+    Random raw data of one station with a cumulative counter in 'pq', in bucket tips or in float32 mm.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-03-01', periods=rows, freq='min')
+    wet = rng.random(rows) < 0.1
+    if tips:
+        counter = np.cumsum(np.where(wet, rng.integers(1, 3, rows), 0)).astype(np.int32)
+    else:
+        counter = np.cumsum(np.where(wet, rng.choice([0.1, 0.2], rows), 0.0)).astype(np.float32)
+    return pd.DataFrame({'unixtime': dates.astype('int64') // 10**9, 'Date/Time': dates, 'pq': counter})
+
+
+def test_from_pandas_shares_the_arrays():
+    df = station_frame(0)
+    series = RainfallSeries.from_pandas(df, 'pq', device='M08')
+    assert np.shares_memory(series.times, df['unixtime'].to_numpy())
+    assert np.shares_memory(series.values, df['pq'].to_numpy())
+    assert series.values.dtype == np.float32 and len(series) == len(df)
+
+    seconds = df.assign(**{'Date/Time': df['Date/Time'].astype('datetime64[s]')})
+    series = RainfallSeries.from_pandas(seconds, 'pq', time_column='Date/Time')
+    assert np.shares_memory(series.times, seconds['Date/Time'].to_numpy())
+    np.testing.assert_array_equal(series.times, df['unixtime'])
+
+
+def test_from_pandas_converts_other_dtypes():
+    df = station_frame(1)
+    df['pq'] = df['pq'].astype(np.float64)
+    df['Date/Time'] = df['Date/Time'].dt.tz_localize('Europe/Sofia')
+    series = RainfallSeries.from_pandas(df, 'pq', time_column='Date/Time')
+    assert not np.shares_memory(series.values, df['pq'].to_numpy())
+    assert series.values.dtype == np.float32
+    np.testing.assert_array_equal(series.times, df['Date/Time'].dt.tz_convert(None).astype('int64') // 10**9)
+
+
+def test_to_pandas_shares_the_arrays():
+    series = RainfallSeries.from_pandas(station_frame(2), 'pq')
+    df = series.to_pandas()
+    assert list(df.columns) == ['unixtime', 'Date/Time', 'pq']
+    assert np.shares_memory(df['unixtime'].to_numpy(), series.times)
+    assert np.shares_memory(df['Date/Time'].to_numpy(), series.times)
+    assert np.shares_memory(df['pq'].to_numpy(), series.values)
+    assert list(series.to_pandas('rain', date_column=None, time_column=None).columns) == ['rain']
+
+
+def test_round_trip():
+    df = station_frame(3, tips=True)
+    series = RainfallSeries.from_pandas(df, 'pq', device='M08', metadata={'Location': 'Sofia'})
+    assert series.values.dtype == np.int32
+    back = series.to_pandas()
+    np.testing.assert_array_equal(back['unixtime'], df['unixtime'])
+    np.testing.assert_array_equal(back['Date/Time'], df['Date/Time'])
+    np.testing.assert_array_equal(back['pq'], df['pq'])
+
+
+def test_with_values():
+    series = RainfallSeries.from_pandas(station_frame(4), 'pq', device='M08', metadata={'Location': 'Sofia'})
+    doubled = series.with_values(series.values.astype(np.float64) * 2)
+    assert doubled.times is series.times
+    assert (doubled.device, doubled.metadata) == ('M08', {'Location': 'Sofia'})
+    assert doubled.values.dtype == np.float32
+    np.testing.assert_allclose(doubled.values, series.values * 2)
+    with pytest.raises(ValueError):
+        series.with_values(series.values[1:])
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError, match='dtype'):
+        RainfallSeries([0, 60], [0.0, 0.2], dtype='float64')
+    with pytest.raises(ValueError, match='same length'):
+        RainfallSeries([0, 60, 120], [0.0, 0.2])
+
+
+@pytest.mark.parametrize('tips', [False, True])
+def test_subtract_next_value_returns_a_series(tips):
+    df = station_frame(5, tips=tips)
+    series = RainfallSeries.from_pandas(df, 'pq', device='M08')
+    subtracted = subtract_next_value(series, 'pq')
+    assert isinstance(subtracted, RainfallSeries)
+    assert subtracted.values.dtype == series.values.dtype and subtracted.device == 'M08'
+    assert subtracted.values[0] == 0
+    np.testing.assert_allclose(subtracted.values, subtract_next_value(df, 'pq')['pq'], atol=1e-4)
+    assert len(subtract_next_value(RainfallSeries([], []), 'pq')) == 0
+
+
+def test_find_rain_periods_and_sums_take_a_series():
+    df = subtract_next_value(station_frame(6, rows=5000, tips=True), 'pq')
+    series = RainfallSeries.from_pandas(df, 'pq')
+    periods = find_rain_periods(series, 'pq')
+    assert len(periods)
+    pd.testing.assert_frame_equal(periods, find_rain_periods(df, 'pq'), check_dtype=False)
+    pd.testing.assert_frame_equal(sum_by_period(series, 'pq', standard='bg'),
+                                  sum_by_period(df, 'pq', standard='bg'), check_dtype=False)
+
+
+def test_find_rain_periods_in_float32():
+    df = subtract_next_value(station_frame(7, rows=5000), 'pq')
+    periods = find_rain_periods(RainfallSeries.from_pandas(df, 'pq'), 'pq')
+    expected = find_rain_periods(df, 'pq')
+    pd.testing.assert_frame_equal(periods.drop(columns='Amount_Rainfall_(mm)'),
+                                  expected.drop(columns='Amount_Rainfall_(mm)'), check_dtype=False)
+    np.testing.assert_allclose(periods['Amount_Rainfall_(mm)'], expected['Amount_Rainfall_(mm)'], rtol=1e-5)
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pydataman.meteo.rainfall import find_rain_periods, subtract_next_value
+from pydataman.meteo.streaming import RainEventDetector
+
+
+def station_frame(seed, rows):
+    """
+    Random 1-minute data with the cumulative counter of a tipping bucket in 'pq'.
+    """
+    rng = np.random.default_rng(seed)
+    wet = rng.random(rows) < rng.uniform(0.05, 0.4)
+    return pd.DataFrame({'Date/Time': pd.date_range('2024-01-01', periods=rows, freq='min'),
+                         'pq': np.cumsum(np.where(wet, rng.choice([0.1, 0.2, 0.005], rows), 0.0))})
+
+
+def closed_events(df, cumulative, seed):
+    """
+    Feed df in random chunks, restoring the detector from its JSON state between them, and return the closed
+    events.
+    """
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.choice(np.arange(1, len(df)), size=rng.integers(0, min(20, len(df) - 1)), replace=False))
+    detector = RainEventDetector('pq', cumulative=cumulative)
+    events = []
+    for chunk in np.split(np.arange(len(df)), cuts):
+        events.append(detector.update(df.iloc[chunk]))
+        detector = RainEventDetector.from_state(json.loads(json.dumps(detector.get_state())))
+    events.append(detector.flush())
+    return _closed(events)
+
+
+def _closed(events):
+    events = [batch for batch in events if not batch.empty]
+    if not events:
+        return pd.DataFrame()
+    events = pd.concat(events, ignore_index=True)
+    return events[events['Event'] == 'closed'].drop(columns='Event').reset_index(drop=True)
+
+
+@pytest.mark.parametrize('cumulative', [True, False])
+@pytest.mark.parametrize('seed', range(30))
+def test_any_chunking_matches_batch(cumulative, seed):
+    df = station_frame(seed, rows=int(np.random.default_rng(seed).integers(2, 400)))
+    increments = subtract_next_value(df, 'pq')
+    expected = find_rain_periods(increments, 'pq')
+
+    result = closed_events(df if cumulative else increments, cumulative, seed)
+    if expected.empty:
+        assert result.empty
+        return
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_exact=False, rtol=1e-9)
+
+
+def test_single_rows():
+    df = station_frame(5, rows=200)
+    detector = RainEventDetector('pq', cumulative=True)
+    closed = _closed([detector.update(df.iloc[[i]]) for i in range(len(df))] + [detector.flush()])
+    pd.testing.assert_frame_equal(closed, find_rain_periods(subtract_next_value(df, 'pq'), 'pq'), check_dtype=False,
+                                  check_exact=False, rtol=1e-9)